@@ -0,0 +1,110 @@
+# app/async_crud.py
+# Author: Thanh Trieu
+# Description: Asyncio versions of the CRUD operations, running the ORM code in app/crud.py on an AsyncSession.
+
+from datetime import date
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, low_stock, sales, schemas
+
+# Each function runs its synchronous counterpart through AsyncSession.run_sync, so the
+# queries go through the asyncio driver without duplicating the ORM logic here. Anything
+# the caller serializes must be loaded before run_sync returns.
+
+async def get_product(db: AsyncSession, product_id: int):
+    """Retrieve a product by its ID."""
+    return await db.run_sync(crud.get_product, product_id)
+
+async def get_product_row(db: AsyncSession, product_id: int):
+    """Retrieve a product by its ID as a plain dict shaped like schemas.Product."""
+    return await db.run_sync(crud.get_product_row, product_id)
+
+async def get_products(db: AsyncSession, skip: int = 0, limit: int = 10, after_id: int = None):
+    """Retrieve a list of products ordered by id, paged by offset or by the last seen id."""
+    return await db.run_sync(crud.get_products, skip, limit, after_id)
+
+async def get_product_rows(db: AsyncSession, skip: int = 0, limit: int = 10, after_id: int = None) -> List[dict]:
+    """Retrieve a page of products as plain dicts shaped like schemas.Product."""
+    return await db.run_sync(crud.get_product_rows, skip, limit, after_id)
+
+async def get_product_rows_by_ids(db: AsyncSession, product_ids: List[int]):
+    """Retrieve several products as plain dicts with one query; returns (rows, missing ids)."""
+    return await db.run_sync(crud.get_product_rows_by_ids, product_ids)
+
+async def search_product_rows(db: AsyncSession, query: str, limit: int = 10, after: tuple = None):
+    """Search products by name and description; returns (rows, next position or None)."""
+    return await db.run_sync(crud.search_product_rows, query, limit, after)
+
+async def create_product(db: AsyncSession, product: schemas.ProductCreate, image_url: str = None):
+    """Create a new product and add it to the database."""
+    return await db.run_sync(crud.create_product, product, image_url)
+
+async def update_product(db: AsyncSession, product_id: int, product: schemas.ProductUpdate, expected: tuple = None):
+    """Update an existing product's details, optionally only if it is still at the expected (version, stock)."""
+    return await db.run_sync(crud.update_product, product_id, product, expected)
+
+async def set_product_image(db: AsyncSession, product_id: int, image_url: str):
+    """Store the S3 URL of a product's image."""
+    return await db.run_sync(crud.set_product_image, product_id, image_url)
+
+async def set_product_image_variants(db: AsyncSession, product_id: int, image_url: str, variants: dict) -> bool:
+    """Record the variant URLs of a product image, unless the product has a different image by now."""
+    return await db.run_sync(crud.set_product_image_variants, product_id, image_url, variants)
+
+async def delete_product(db: AsyncSession, product_id: int):
+    """Delete a product by its ID."""
+    return await db.run_sync(crud.delete_product, product_id)
+
+async def get_inventory(db: AsyncSession, skip: int = 0, limit: int = 10, after_id: int = None) -> List[dict]:
+    """Retrieve a list of products for inventory management, paged by offset or by the last seen id."""
+    return await db.run_sync(crud.get_inventory, skip, limit, after_id)
+
+async def get_inventory_product(db: AsyncSession, product_id: int):
+    """Retrieve a product from the inventory by its ID."""
+    return await db.run_sync(crud.get_inventory_product, product_id)
+
+async def get_inventory_by_ids(db: AsyncSession, product_ids: List[int]):
+    """Retrieve the stock level of several products with one query; returns (items, missing ids)."""
+    return await db.run_sync(crud.get_inventory_by_ids, product_ids)
+
+async def set_stock_shards(db: AsyncSession, product_id: int, shards: int):
+    """Split a product's stock across shards, or fold it back into one row with shards=0."""
+    return await db.run_sync(crud.set_stock_shards, product_id, shards)
+
+async def adjust_stock(db: AsyncSession, adjustments: List[schemas.StockAdjustment], allow_negative: bool = False):
+    """Apply many stock adjustments in one transaction; returns a report with one result per line."""
+    return await db.run_sync(crud.adjust_stock, adjustments, allow_negative)
+
+async def create_order(db: AsyncSession, order: schemas.OrderCreate):
+    """Create a new order and reduce stock for every line in a single transaction."""
+    return await db.run_sync(crud.create_order, order)
+
+async def create_order_once(db: AsyncSession, order: schemas.OrderCreate, idempotency_key: str, request_hash: str):
+    """Create an order at most once per idempotency key; returns (response, replayed)."""
+    return await db.run_sync(crud.create_order_once, order, idempotency_key, request_hash)
+
+async def get_order(db: AsyncSession, order_id: int):
+    """Retrieve an order by its ID with its items loaded."""
+    return await db.run_sync(crud.get_order, order_id)
+
+async def get_orders(db: AsyncSession, skip: int = 0, limit: int = 10, after_id: int = None,
+                     product_id: int = None):
+    """Retrieve a list of orders with their items, optionally only those containing product_id."""
+    return await db.run_sync(crud.get_orders, skip, limit, after_id, product_id)
+
+async def get_top_products(db: AsyncSession, limit: int = 10) -> List[dict]:
+    """Return the best-selling products by units sold, from the sales summaries."""
+    return await db.run_sync(sales.top_products, limit)
+
+async def get_daily_revenue(db: AsyncSession, start: date, end: date) -> List[dict]:
+    """Return orders, units and revenue per day between start and end, from the sales summaries."""
+    return await db.run_sync(sales.daily_revenue, start, end)
+
+async def get_low_stock(db: AsyncSession, limit: int = 100, after_id: int = None) -> List[dict]:
+    """Return the products at or below their reorder threshold, from the low-stock watchlist."""
+    return await db.run_sync(low_stock.watchlist, limit, after_id)
+
+async def get_low_stock_events(db: AsyncSession, after_id: int = None, limit: int = 100) -> List[dict]:
+    """Return the threshold crossings recorded after the event id after_id."""
+    return await db.run_sync(low_stock.events_since, after_id, limit)
@@ -0,0 +1,46 @@
+# app/async_database.py
+# Author: Thanh Trieu
+# Description: Contains asyncio database setup and session management for SQLAlchemy.
+
+import os
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from .database import SQLALCHEMY_DATABASE_URL
+from .db_pool import DB_POOL_STRATEGY, PoolMetrics, pool_options
+from .timing import instrument_engine
+
+# Asyncio drivers to use in place of the synchronous ones in SQLALCHEMY_DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str):
+    """Swap the driver of a synchronous database URL for its asyncio counterpart."""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername))
+
+# An explicit async URL wins; otherwise derive it from the synchronous one
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv("ASYNC_SQLALCHEMY_DATABASE_URL") or to_async_url(SQLALCHEMY_DATABASE_URL)
+
+# Counters for the connection pool of the asyncio engine
+async_pool_metrics = PoolMetrics()
+
+# Create the asyncio engine
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    **pool_options(DB_POOL_STRATEGY, async_pool_metrics, use_asyncio=True)
+)
+async_pool_metrics.attach(async_engine.sync_engine)
+instrument_engine(async_engine.sync_engine)
+
+# Objects stay loaded after commit so they can be serialized without lazy loads outside the session
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db() -> AsyncSession:
+    """Dependency for providing an asyncio database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,80 @@
+# app/bootstrap.py
+# Author: Thanh Trieu
+# Description: Lazy initialization of expensive resources (AWS clients, JWKS), with an explicit warm-up hook.
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+_UNSET = object()
+
+class LazyResource:
+    """A resource built by its factory on first use, once per process, recording how long that took."""
+
+    def __init__(self, name: str, factory: Callable):
+        self.name = name
+        self.factory = factory
+        self.init_seconds = None
+        self._value = _UNSET
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self) -> bool:
+        return self._value is not _UNSET
+
+    def get(self):
+        """Return the resource, building it on the first call."""
+        if self._value is _UNSET:
+            with self._lock:
+                if self._value is _UNSET:
+                    start = time.perf_counter()
+                    self._value = self.factory()
+                    self.init_seconds = time.perf_counter() - start
+        return self._value
+
+    def reset(self):
+        """Forget the built resource so the next get() builds it again."""
+        with self._lock:
+            self._value = _UNSET
+            self.init_seconds = None
+
+# Every lazily initialized resource in the app, by name
+_resources: Dict[str, LazyResource] = {}
+
+def lazy_resource(name: str):
+    """Decorator turning a zero-argument factory into a getter for a lazily built, shared resource."""
+    def decorator(factory: Callable):
+        resource = LazyResource(name, factory)
+        _resources[name] = resource
+
+        def getter():
+            return resource.get()
+
+        getter.__name__ = factory.__name__
+        getter.__doc__ = factory.__doc__
+        getter.resource = resource
+        return getter
+    return decorator
+
+def warm_up(names: Optional[Iterable[str]] = None) -> Dict[str, Optional[float]]:
+    """
+    Build registered resources ahead of the first request (all of them by default) and
+    return their initialization times. Failures are reported as None rather than raised.
+    """
+    timings = {}
+    for name in names or list(_resources):
+        try:
+            _resources[name].get()
+            timings[name] = _resources[name].init_seconds
+        except Exception:
+            timings[name] = None
+    return timings
+
+def init_timings() -> Dict[str, Optional[float]]:
+    """Return the initialization time of each registered resource, None if it has not been built yet."""
+    return {name: resource.init_seconds for name, resource in _resources.items()}
+
+def reset_resources():
+    """Forget every built resource."""
+    for resource in _resources.values():
+        resource.reset()
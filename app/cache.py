@@ -0,0 +1,311 @@
+# app/cache.py
+# Author: Thanh Trieu
+# Description: Read-through cache for product and inventory lookups, with an in-process LRU and an optional shared backend.
+
+import asyncio
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional
+from dotenv import load_dotenv
+from sqlalchemy.util import await_only
+from sqlalchemy.util.concurrency import in_greenlet
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Set PRODUCT_CACHE_ENABLED=false to send every read to the database
+PRODUCT_CACHE_ENABLED = os.getenv('PRODUCT_CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+PRODUCT_CACHE_SIZE = int(os.getenv('PRODUCT_CACHE_SIZE', '10000'))
+# Without a shared backend, other processes only see a write once their local copy expires
+PRODUCT_CACHE_LOCAL_TTL = float(os.getenv('PRODUCT_CACHE_LOCAL_TTL', '5'))
+PRODUCT_CACHE_SHARED_TTL = float(os.getenv('PRODUCT_CACHE_SHARED_TTL', '300'))
+# e.g. redis://localhost:6379/0; requires the redis package
+PRODUCT_CACHE_URL = os.getenv('PRODUCT_CACHE_URL')
+
+GENERATION_KEY = "products:generation"
+
+class LocalCacheBackend:
+    """
+    In-process LRU store with per-entry TTL. Used as the local tier of the
+    product cache and as a stand-in for a shared backend in tests.
+    """
+
+    def __init__(self, max_size: int = 10000, clock=time.monotonic):
+        self.max_size = max_size
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str):
+        """Return the stored value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        """Store value for ttl seconds (forever if None), evicting the least recently used entries when full."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, None if ttl is None else self._clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: str):
+        """Remove the given keys if present."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        """Atomically increment an integer counter and return its new value."""
+        with self._lock:
+            value = (self._entries.get(key, (0, None))[0] or 0) + 1
+            self._entries[key] = (value, None)
+            return value
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+class RedisCacheBackend:
+    """
+    Shared backend on Redis, so every process sees invalidations immediately. The product cache is
+    reached from the async routers through AsyncSession.run_sync, which runs the CRUD code on the event
+    loop; there commands go through a redis.asyncio client and are awaited with SQLAlchemy's await_only,
+    so a Redis round trip never blocks the loop. Plain sync callers (threadpool routes, scripts) use
+    the blocking client.
+    """
+
+    def __init__(self, url: str, client=None, async_client_factory: Callable = None):
+        if client is None or async_client_factory is None:
+            import redis  # Optional dependency, only needed when PRODUCT_CACHE_URL is set
+            import redis.asyncio
+            client = client or redis.Redis.from_url(url)
+            async_client_factory = async_client_factory or (lambda: redis.asyncio.Redis.from_url(url))
+        self._client = client
+        self._async_client_factory = async_client_factory
+        # asyncio connections belong to the loop that opened them, so keep one client per loop
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _call(self, command: str, *args, **kwargs):
+        if not in_greenlet():
+            return getattr(self._client, command)(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = self._async_client_factory()
+        return await_only(getattr(client, command)(*args, **kwargs))
+
+    def get(self, key: str):
+        return self._call("get", key)
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        self._call("set", key, value, ex=None if ttl is None else max(1, int(ttl)))
+
+    def delete(self, *keys: str):
+        if keys:
+            self._call("delete", *keys)
+
+    def incr(self, key: str) -> int:
+        return self._call("incr", key)
+
+def product_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+def inventory_key(product_id: int) -> str:
+    return f"inventory:{product_id}"
+
+class ProductCache:
+    """
+    Read-through cache of JSON-serializable product data. Lookups try the
+    local LRU, then the shared backend (if any), then the loader. Single
+    products are invalidated by key; list pages embed a generation number
+    that every write bumps, so stale pages are simply never read again.
+    """
+
+    def __init__(self, max_size: int = PRODUCT_CACHE_SIZE, local_ttl: float = PRODUCT_CACHE_LOCAL_TTL,
+                 shared_ttl: float = PRODUCT_CACHE_SHARED_TTL, backend=None, enabled: bool = True,
+                 clock=time.monotonic):
+        self.enabled = enabled
+        self.local_ttl = local_ttl
+        self.shared_ttl = shared_ttl
+        # The backend may be given as a factory so it is only built on first use
+        self.backend = backend
+        self._local = LocalCacheBackend(max_size, clock)
+        self._generation = 0
+        self._counter_lock = threading.Lock()
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.backend_errors = 0
+        self.load_seconds = 0.0
+        self.hit_seconds = 0.0
+
+    def _count(self, name: str, amount=1):
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _shared(self):
+        if self.backend is None:
+            return None
+        if callable(self.backend) and not hasattr(self.backend, "get"):
+            self.backend = self.backend()
+        return self.backend
+
+    def _shared_call(self, method: str, *args):
+        """Call the shared backend, treating any failure as a miss so an outage never fails a read."""
+        shared = self._shared()
+        if shared is None:
+            return None
+        try:
+            return getattr(shared, method)(*args)
+        except Exception:
+            self._count("backend_errors")
+            return None
+
+    def generation(self) -> int:
+        """Return the current list-page generation."""
+        value = self._shared_call("get", GENERATION_KEY)
+        return int(value) if value is not None else self._generation
+
+    def page_key(self, name: str, *args) -> str:
+        """Build the cache key of a list page for the current generation."""
+        return ":".join([name, str(self.generation())] + [str(arg) for arg in args])
+
+    def get_or_load(self, key: str, loader: Callable):
+        """Return the cached value for key, calling loader on a miss. None results are not cached."""
+        if not self.enabled:
+            return loader()
+        start = time.perf_counter()
+        value = self._local.get(key)
+        if value is not None:
+            self._count("local_hits")
+            self._count("hit_seconds", time.perf_counter() - start)
+            return value
+        raw = self._shared_call("get", key)
+        if raw is not None:
+            value = json.loads(raw)
+            self._local.set(key, value, self.local_ttl)
+            self._count("shared_hits")
+            self._count("hit_seconds", time.perf_counter() - start)
+            return value
+
+        generation = self.generation()
+        start = time.perf_counter()
+        value = loader()
+        self._count("misses")
+        self._count("load_seconds", time.perf_counter() - start)
+        # A write that landed while we were loading may have made value stale; don't cache it
+        if value is not None and self.generation() == generation:
+            self._local.set(key, value, self.local_ttl)
+            self._shared_call("set", key, json.dumps(value), self.shared_ttl)
+        return value
+
+    def get_many_or_load(self, keys: Dict[Hashable, str], loader: Callable) -> dict:
+        """
+        Batch form of get_or_load. keys maps each id to its cache key; loader is called once with
+        the list of ids that missed and returns {id: value}. Ids the loader omits are left out.
+        """
+        if not self.enabled:
+            return loader(list(keys)) if keys else {}
+        start = time.perf_counter()
+        found, missing = {}, []
+        for item_id, key in keys.items():
+            value = self._local.get(key)
+            if value is None:
+                raw = self._shared_call("get", key)
+                if raw is not None:
+                    value = json.loads(raw)
+                    self._local.set(key, value, self.local_ttl)
+                    self._count("shared_hits")
+            else:
+                self._count("local_hits")
+            if value is None:
+                missing.append(item_id)
+            else:
+                found[item_id] = value
+        if found:
+            self._count("hit_seconds", time.perf_counter() - start)
+        if not missing:
+            return found
+
+        generation = self.generation()
+        start = time.perf_counter()
+        loaded = loader(missing)
+        self._count("misses", len(missing))
+        self._count("load_seconds", time.perf_counter() - start)
+        if self.generation() == generation:
+            for item_id, value in loaded.items():
+                if value is not None:
+                    self._local.set(keys[item_id], value, self.local_ttl)
+                    self._shared_call("set", keys[item_id], json.dumps(value), self.shared_ttl)
+        found.update(loaded)
+        return found
+
+    def invalidate_products(self, product_ids: Iterable[int] = ()):
+        """Drop the cached entries of the given products and every cached list page."""
+        keys = []
+        for product_id in product_ids:
+            keys.extend((product_key(product_id), inventory_key(product_id)))
+        self._local.delete(*keys)
+        self._shared_call("delete", *keys)
+        generation = self._shared_call("incr", GENERATION_KEY)
+        with self._counter_lock:
+            self._generation = generation if generation is not None else self._generation + 1
+            self.invalidations += 1
+
+    def clear(self):
+        """Drop every locally cached entry and reset the counters."""
+        self._local.clear()
+        with self._counter_lock:
+            self._reset_counters()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and an estimate of the database time saved by hits."""
+        with self._counter_lock:
+            hits = self.local_hits + self.shared_hits
+            lookups = hits + self.misses
+            avg_load = self.load_seconds / self.misses if self.misses else 0.0
+            return {
+                "enabled": self.enabled,
+                "shared_backend": self.backend is not None,
+                "local_hits": self.local_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "backend_errors": self.backend_errors,
+                "evictions": self._local.evictions,
+                "size": len(self._local),
+                "avg_load_ms": avg_load * 1000,
+                "avg_hit_ms": self.hit_seconds / hits * 1000 if hits else 0.0,
+                "estimated_saved_ms": max(0.0, hits * avg_load - self.hit_seconds) * 1000,
+            }
+
+product_cache = ProductCache(
+    backend=(lambda: RedisCacheBackend(PRODUCT_CACHE_URL)) if PRODUCT_CACHE_URL else None,
+    enabled=PRODUCT_CACHE_ENABLED,
+)
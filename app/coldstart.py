@@ -0,0 +1,99 @@
+# app/coldstart.py
+# Author: Thanh Trieu
+# Description: Cold-start profiler reporting where startup time goes (python -m app.coldstart).
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+
+# Lines written by `python -X importtime`: "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def profile_imports(module: str = "app.main", top: int = 15) -> list:
+    """Import module in a fresh interpreter with -X importtime and return the slowest top-level imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                "module": name,
+                "depth": (len(indent) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            })
+    # Only imports made directly by app modules or the top-level import are interesting on their own
+    shallow = [entry for entry in entries if entry["depth"] <= 1]
+    return sorted(shallow, key=lambda entry: entry["cumulative_ms"], reverse=True)[:top]
+
+def api_gateway_event(path: str) -> dict:
+    """Build a minimal API Gateway (REST) proxy event for a GET request."""
+    return {
+        "resource": "/{proxy+}",
+        "path": path,
+        "httpMethod": "GET",
+        "headers": {"host": "localhost"},
+        "multiValueHeaders": {},
+        "queryStringParameters": None,
+        "multiValueQueryStringParameters": None,
+        "pathParameters": {"proxy": path.lstrip("/")},
+        "requestContext": {"resourcePath": "/{proxy+}", "httpMethod": "GET", "path": path, "stage": "dev"},
+        "body": None,
+        "isBase64Encoded": False,
+    }
+
+def profile_startup(path: str = "/metrics", warm: bool = False) -> dict:
+    """Time importing app.main, the optional warm-up and the first Lambda invocation in this process."""
+    timings = {}
+    start = time.perf_counter()
+    from app import main
+    from app.bootstrap import init_timings, warm_up
+    timings["import_app_main_ms"] = (time.perf_counter() - start) * 1000
+
+    if warm:
+        start = time.perf_counter()
+        warm_up()
+        timings["warm_up_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    response = main.lambda_handler(api_gateway_event(path), None)
+    timings["first_invocation_ms"] = (time.perf_counter() - start) * 1000
+    timings["first_invocation_status"] = response.get("statusCode")
+
+    start = time.perf_counter()
+    main.lambda_handler(api_gateway_event(path), None)
+    timings["second_invocation_ms"] = (time.perf_counter() - start) * 1000
+
+    timings["resources_ms"] = {
+        name: seconds * 1000 if seconds is not None else None for name, seconds in init_timings().items()
+    }
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Report where cold-start time goes")
+    parser.add_argument("--path", default="/metrics", help="path requested by the first invocation")
+    parser.add_argument("--warm", action="store_true", help="run the warm-up hook before the first invocation")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    report = {"imports": profile_imports(top=args.top), "startup": profile_startup(args.path, args.warm)}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print("Slowest imports (cumulative ms):")
+    for entry in report["imports"]:
+        print(f"  {entry['cumulative_ms']:9.1f}  {'  ' * entry['depth']}{entry['module']}")
+    print("Startup:")
+    for name, value in report["startup"].items():
+        print(f"  {name}: {value}")
+
+if __name__ == "__main__":
+    main()
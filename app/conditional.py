@@ -0,0 +1,67 @@
+# app/conditional.py
+# Author: Thanh Trieu
+# Description: Weak ETags for product and inventory representations, answering If-None-Match with 304 and
+#              parsing If-Match preconditions for updates.
+
+import hashlib
+from typing import Iterable, List, Optional, Tuple
+from fastapi import HTTPException, Response
+
+# A representation changes when the row's version does, when its available stock does (orders on sharded
+# products write the shard rows, not the product row), or when its presigned image URLs are re-signed
+def row_tag(row: dict) -> str:
+    """Return the opaque part of the ETag of one product or inventory row, after its images are presigned."""
+    row_id = row["id"] if "id" in row else row["product_id"]
+    tag = f"{row_id}.{row.get('version', 1)}.{row['stock']}"
+    urls = [row.get("image_url"), *sorted((row.get("image_variants") or {}).items())]
+    if any(urls):
+        tag += "." + hashlib.blake2b(repr(urls).encode(), digest_size=8).hexdigest()
+    return tag
+
+def row_etag(row: dict) -> str:
+    """Weak ETag of a single row."""
+    return f'W/"{row_tag(row)}"'
+
+def rows_etag(rows: Iterable[dict], *extra: Optional[str]) -> str:
+    """Weak ETag of a page of rows, plus anything else that shapes the response such as the next cursor."""
+    digest = hashlib.blake2b(digest_size=12)
+    for part in [*(row_tag(row) for row in rows), *extra]:
+        digest.update(f"{part}\n".encode())
+    return f'W/"{digest.hexdigest()}"'
+
+def _entity_tags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against the current ETag; `*` matches anything."""
+    if not if_none_match:
+        return False
+    tags = _entity_tags(if_none_match)
+    return "*" in tags or _opaque(etag) in {_opaque(tag) for tag in tags}
+
+def not_modified(etag: str, headers: dict = None) -> Response:
+    """Empty 304 response carrying the ETag and the headers a 200 would have had."""
+    return Response(status_code=304, headers={**(headers or {}), "ETag": etag})
+
+def expected_version(if_match: Optional[str], row_id: int) -> Optional[Tuple[int, int]]:
+    """
+    Turn an If-Match header holding an ETag from row_etag into the (version, stock) the caller last saw.
+    Returns None when there is no precondition or it is `*`; answers 412 for tags of another row or
+    malformed tags, which can never match. Tags are compared weakly, as they only ever come from row_etag.
+    """
+    if if_match is None:
+        return None
+    tags = _entity_tags(if_match)
+    if "*" in tags:
+        return None
+    if len(tags) == 1:
+        parts = _opaque(tags[0]).strip('"').split(".")
+        if len(parts) in (3, 4) and parts[0] == str(row_id):
+            try:
+                return int(parts[1]), int(parts[2])
+            except ValueError:
+                pass
+    raise HTTPException(status_code=412, detail="Precondition failed: the product has changed")
@@ -2,17 +2,117 @@
 # Author: Thanh Trieu
 # Description: Contains CRUD operations for managing products and orders in the database.
 
-from sqlalchemy.orm import Session
-from sqlalchemy import exc
-from . import models, schemas
+import csv
+import io
+import random
+from typing import List
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import exc as orm_exc
+from sqlalchemy import Boolean, Integer, bindparam, column, exc, select, update, insert, delete, case, func, values
+from . import idempotency, low_stock, models, sales, schemas, search
+from .cache import inventory_key, product_cache, product_key
+
+# Columns kept for a product in the product cache
+PRODUCT_CACHE_COLUMNS = ("id", "name", "description", "price", "stock", "image_url", "image_variants", "version",
+                         "reorder_threshold")
+
+def _product_row(product) -> dict:
+    """Snapshot a product as a plain dict that can be cached."""
+    if product is None:
+        return None
+    row = {column: getattr(product, column) for column in PRODUCT_CACHE_COLUMNS}
+    row["stock"] = product.available_stock
+    return row
+
+def _product_from_row(row: dict):
+    """Build a detached Product from a cached row; changes to it are never written back."""
+    return models.Product(available_stock=row["stock"], **row)
+
+def get_product_row(db: Session, product_id: int):
+    """Retrieve a product by its ID as a plain dict shaped like schemas.Product, through the product cache."""
+    row = product_cache.get_or_load(
+        product_key(product_id),
+        lambda: _product_row(db.query(models.Product).filter_by(id=product_id).first())
+    )
+    return dict(row) if row is not None else None
 
 def get_product(db: Session, product_id: int):
-    """Retrieve a product by its ID."""
-    return db.query(models.Product).filter_by(id=product_id).first()
+    """Retrieve a product by its ID, through the product cache."""
+    row = get_product_row(db, product_id)
+    return _product_from_row(row) if row is not None else None
+
+def _page(query, skip: int, limit: int, after_id: int = None, key=models.Product.id):
+    """Apply keyset pagination on key when after_id is given, falling back to offset pagination."""
+    query = query.order_by(key)
+    if after_id is not None:
+        return query.filter(key > after_id).limit(limit)
+    return query.offset(skip).limit(limit)
+
+def _product_columns():
+    return [models.Product.available_stock.label(name) if name == "stock" else getattr(models.Product, name)
+            for name in PRODUCT_CACHE_COLUMNS]
+
+def get_product_rows(db: Session, skip: int = 0, limit: int = 10, after_id: int = None) -> List[dict]:
+    """
+    Retrieve a page of products as plain dicts shaped like schemas.Product, loaded from Core
+    result rows without building ORM objects. The dicts are copies and safe to modify.
+    """
+    rows = product_cache.get_or_load(
+        product_cache.page_key("products", skip, limit, after_id),
+        lambda: [row._asdict() for row in db.execute(_page(select(*_product_columns()), skip, limit, after_id))]
+    )
+    return [dict(row) for row in rows]
 
-def get_products(db: Session, skip: int = 0, limit: int = 10):
-    """Retrieve a list of products with pagination."""
-    return db.query(models.Product).offset(skip).limit(limit).all()
+def search_product_rows(db: Session, query: str, limit: int = 10, after: tuple = None):
+    """
+    Search products by name and description, best matches first. Returns (rows shaped like
+    schemas.Product, the (rank, id) position to continue after, or None on the last page).
+    """
+    positions = search.search_products(db, query, limit, after)
+    rows, _ = get_product_rows_by_ids(db, [product_id for _, product_id in positions])
+    return rows, positions[-1] if len(positions) == limit else None
+
+def get_products(db: Session, skip: int = 0, limit: int = 10, after_id: int = None):
+    """Retrieve a list of products ordered by id, paged by offset or by the last seen id."""
+    return [_product_from_row(row) for row in get_product_rows(db, skip, limit, after_id)]
+
+def get_product_rows_by_ids(db: Session, product_ids: List[int]):
+    """
+    Retrieve several products as plain dicts, serving cached ones from the product cache and
+    the rest with a single IN query. Returns (rows in the requested order, missing ids).
+    """
+    found = product_cache.get_many_or_load(
+        {product_id: product_key(product_id) for product_id in product_ids},
+        lambda missing: {row.id: row._asdict() for row in db.execute(
+            select(*_product_columns()).where(models.Product.id.in_(missing))
+        )}
+    )
+    rows = [dict(found[product_id]) for product_id in product_ids if product_id in found]
+    return rows, [product_id for product_id in product_ids if product_id not in found]
+
+# Columns written by the catalog and inventory exports, in output order
+PRODUCT_EXPORT_COLUMNS = ("id", "name", "description", "price", "stock", "image_url")
+INVENTORY_EXPORT_COLUMNS = ("product_id", "stock")
+
+def iter_products(db: Session, batch_size: int = 1000):
+    """Stream every product as a plain dict through a server-side cursor, ordered by id."""
+    columns = [models.Product.available_stock.label(name) if name == "stock" else getattr(models.Product, name)
+               for name in PRODUCT_EXPORT_COLUMNS]
+    result = db.execute(
+        select(*columns).order_by(models.Product.id).execution_options(yield_per=batch_size)
+    )
+    for row in result:
+        yield row._asdict()
+
+def iter_inventory(db: Session, batch_size: int = 1000):
+    """Stream the stock level of every product through a server-side cursor, ordered by id."""
+    result = db.execute(
+        select(models.Product.id, models.Product.available_stock.label("stock"))
+        .order_by(models.Product.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for row in result:
+        yield {"product_id": row.id, "stock": row.stock}
 
 def create_product(db: Session, product: schemas.ProductCreate, image_url: str = None):
     """Create a new product and add it to the database."""
@@ -21,64 +121,510 @@ def create_product(db: Session, product: schemas.ProductCreate, image_url: str =
         description=product.description,
         price=product.price,
         stock=product.stock,
+        reorder_threshold=product.reorder_threshold,
         image_url=image_url
     )
     db.add(db_product)
+    if product.reorder_threshold is not None:
+        db.flush()
+        low_stock.track(db, [db_product.id])
     db.commit()
     db.refresh(db_product)
+    product_cache.invalidate_products()
+    search.product_search_index.add(db_product.id, db_product.name, db_product.description)
     return db_product
 
-def update_product(db: Session, product_id: int, product: schemas.ProductUpdate):
-    """Update an existing product's details."""
-    db_product = db.query(models.Product).filter_by(id=product_id).first()
+# Columns written by bulk product imports
+PRODUCT_IMPORT_COLUMNS = ("name", "description", "price", "stock", "reorder_threshold")
+
+def _copy_products(db: Session, rows: list):
+    """Load rows with COPY ... FROM STDIN on the session's psycopg2 connection."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([[row[column] for column in PRODUCT_IMPORT_COLUMNS] for row in rows])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {models.Product.__tablename__} ({', '.join(PRODUCT_IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+def bulk_create_products(db: Session, products: List[schemas.ProductCreate], upsert_key: str = None) -> dict:
+    """
+    Insert a chunk of validated products in one transaction. With upsert_key, rows whose
+    key matches an existing product update it instead. Returns inserted/updated counts, and under
+    merged the number of rows folded into a later row with the same key in this chunk.
+    """
+    updates = []
+    merged = 0
+    if upsert_key:
+        # Later rows win when the same key appears more than once in a chunk; the loser count is reported
+        by_key = {getattr(product, upsert_key): product for product in products}
+        merged = len(products) - len(by_key)
+        key_column = getattr(models.Product, upsert_key)
+        existing = {}
+        for product_id, key in db.execute(
+                select(models.Product.id, key_column).where(key_column.in_(list(by_key))).order_by(models.Product.id)
+        ):
+            existing.setdefault(key, product_id)
+        updates = [(existing[key], product) for key, product in by_key.items() if key in existing]
+        products = [product for key, product in by_key.items() if key not in existing]
+    rows = [{column: getattr(product, column) for column in PRODUCT_IMPORT_COLUMNS} for product in products]
+    updated_ids = [product_id for product_id, _ in updates]
+    try:
+        if updates:
+            table = models.Product.__table__
+            # A row that leaves reorder_threshold out (a CSV without the column) keeps the product's threshold
+            new_values = {column: bindparam(f"new_{column}") for column in PRODUCT_IMPORT_COLUMNS}
+            new_values["reorder_threshold"] = case(
+                (bindparam("keep_reorder_threshold", type_=Boolean), table.c.reorder_threshold),
+                else_=new_values["reorder_threshold"]
+            )
+            db.execute(
+                update(table)
+                .where(table.c.id == bindparam("product_id"))
+                .values(version=table.c.version + 1, **new_values),
+                [dict({f"new_{column}": getattr(product, column) for column in PRODUCT_IMPORT_COLUMNS},
+                      product_id=product_id,
+                      keep_reorder_threshold="reorder_threshold" not in product.model_fields_set)
+                 for product_id, product in updates]
+            )
+            _move_stock_into_shards(db, updated_ids)
+            low_stock.track(db, updated_ids)
+        if rows:
+            # Ids are not read back from COPY, so rows with a threshold are found above the highest id beforehand;
+            # a concurrent import's rows caught by the same range are only re-checked, which is harmless
+            watched = any(row["reorder_threshold"] is not None for row in rows)
+            if watched:
+                floor = db.scalar(select(func.max(models.Product.id))) or 0
+            if db.get_bind().dialect.driver == "psycopg2":
+                _copy_products(db, rows)
+            else:
+                # Core insert on the table skips ORM bookkeeping for rows we never load back
+                db.execute(insert(models.Product.__table__), rows)
+            if watched:
+                low_stock.track(db, db.scalars(
+                    select(models.Product.id)
+                    .where(models.Product.id > floor, models.Product.reorder_threshold.is_not(None))
+                ))
+        db.commit()
+    except Exception:
+        # COPY errors come straight from psycopg2, so roll back on anything
+        db.rollback()
+        raise
+    product_cache.invalidate_products(updated_ids)
+    # Inserted rows' ids are not read back, so the in-process search index reloads instead
+    search.product_search_index.reset()
+    return {"inserted": len(rows), "updated": len(updates), "merged": merged}
+
+class StaleProductError(ValueError):
+    """Raised when a product changed since the version the caller based its update on."""
+
+def update_product(db: Session, product_id: int, product: schemas.ProductUpdate, expected: tuple = None):
+    """
+    Update an existing product's details. With expected=(version, available stock) as last seen by the
+    caller, the row is locked and the update refused with StaleProductError if either has moved on; the
+    version check on flush also refuses it if another write lands between the read and the update.
+    """
+    query = db.query(models.Product).filter_by(id=product_id)
+    db_product = (query.with_for_update() if expected is not None else query).first()
     if db_product:
-        for key, value in product.dict().items():
+        if expected is not None and (db_product.version, db_product.available_stock) != tuple(expected):
+            db.rollback()
+            raise StaleProductError(f"Product {product_id} has changed")
+        # Fields left out of the request, like reorder_threshold, keep their current value
+        for key, value in product.dict(exclude_unset=True).items():
             setattr(db_product, key, value)
+        try:
+            db.flush()
+            if db_product.stock_shards:
+                _move_stock_into_shards(db, [product_id])
+            low_stock.track(db, [product_id])
+            db.commit()
+        except orm_exc.StaleDataError:
+            db.rollback()
+            raise StaleProductError(f"Product {product_id} has changed")
+        db.refresh(db_product)
+        product_cache.invalidate_products([product_id])
+        search.product_search_index.add(product_id, db_product.name, db_product.description)
+    return db_product
+
+def set_product_image(db: Session, product_id: int, image_url: str):
+    """Store the S3 URL of a product's image, dropping the variants of the previous image."""
+    db_product = db.query(models.Product).filter_by(id=product_id).first()
+    if db_product:
+        db_product.image_url = image_url
+        db_product.image_variants = None
         db.commit()
         db.refresh(db_product)
+        product_cache.invalidate_products([product_id])
     return db_product
 
+def set_product_image_variants(db: Session, product_id: int, image_url: str, variants: dict) -> bool:
+    """Record the variant URLs of a product image, unless the product has a different image by now."""
+    result = db.execute(
+        update(models.Product)
+        .where(models.Product.id == product_id, models.Product.image_url == image_url)
+        .values(image_variants=variants, version=models.Product.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    product_cache.invalidate_products([product_id])
+    return result.rowcount == 1
+
 def delete_product(db: Session, product_id: int):
     """Delete a product by its ID."""
     db_product = db.query(models.Product).filter_by(id=product_id).first()
     if db_product:
+        low_stock.forget(db, [product_id])
         db.delete(db_product)
         db.commit()
+        product_cache.invalidate_products([product_id])
+        search.product_search_index.remove(product_id)
     return db_product
 
-def get_inventory(db: Session, skip: int = 0, limit: int = 10):
-    """Retrieve a list of products for inventory management with pagination."""
-    inventory = db.query(models.Product).offset(skip).limit(limit).all()
-    return [{"product_id": product.id, "stock": product.stock} for product in inventory]
+# Columns of an inventory entry: the product id, its available stock and its version
+def _inventory_query(db: Session):
+    return db.query(models.Product.id, models.Product.available_stock.label("stock"), models.Product.version)
+
+def _inventory_item(row) -> dict:
+    return {"product_id": row.id, "stock": row.stock, "version": row.version}
+
+def get_inventory(db: Session, skip: int = 0, limit: int = 10, after_id: int = None):
+    """Retrieve a list of products for inventory management, paged by offset or by the last seen id."""
+    return [_inventory_item(row) for row in _page(_inventory_query(db), skip, limit, after_id).all()]
+
+def _load_inventory_product(db: Session, product_id: int):
+    """Load the stock level of one product from the database."""
+    row = _inventory_query(db).filter_by(id=product_id).first()
+    return _inventory_item(row) if row else None
 
 def get_inventory_product(db: Session, product_id: int):
-    """Retrieve a product from the inventory by its ID."""
-    product = db.query(models.Product).filter_by(id=product_id).first()
-    if product:
-        return {"product_id": product.id, "stock": product.stock}
+    """Retrieve a product from the inventory by its ID, through the product cache."""
+    item = product_cache.get_or_load(inventory_key(product_id), lambda: _load_inventory_product(db, product_id))
+    return dict(item) if item is not None else None
+
+def get_inventory_by_ids(db: Session, product_ids: List[int]):
+    """
+    Retrieve the stock level of several products, serving cached ones from the product cache and
+    the rest with a single IN query. Returns (items in the requested order, missing ids).
+    """
+    found = product_cache.get_many_or_load(
+        {product_id: inventory_key(product_id) for product_id in product_ids},
+        lambda missing: {row.id: _inventory_item(row)
+                         for row in _inventory_query(db).filter(models.Product.id.in_(missing))}
+    )
+    items = [dict(found[product_id]) for product_id in product_ids if product_id in found]
+    return items, [product_id for product_id in product_ids if product_id not in found]
+
+class InsufficientStockError(ValueError):
+    """Raised when one or more order lines cannot be fulfilled from current stock."""
+
+    def __init__(self, shortages: list):
+        self.shortages = shortages
+        lines = ", ".join(f"product {s['product_id']} (requested {s['requested']}, available {s['available']})"
+                          for s in shortages)
+        super().__init__(f"Not enough stock for {lines}")
+
+def _order_quantities(order: schemas.OrderCreate) -> dict:
+    """Sum the requested quantity per product, keeping the order the products first appear in."""
+    quantities = {}
+    for item in order.items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+def _find_shortages(stock: dict, quantities: dict) -> list:
+    """Return one entry per product whose available stock is below the requested quantity."""
+    return [
+        {"product_id": product_id, "requested": quantity, "available": stock.get(product_id, 0)}
+        for product_id, quantity in quantities.items()
+        if stock.get(product_id, 0) < quantity
+    ]
+
+def _take_stock(db: Session, quantities: dict) -> list:
+    """Decrement the stock column of unsharded products, returning shortages instead if any line is short."""
+    product_ids = sorted(quantities)
+    # Load every referenced product with one IN query, locking the rows in id order
+    rows = db.execute(
+        select(models.Product.id, models.Product.stock)
+        .where(models.Product.id.in_(product_ids))
+        .order_by(models.Product.id)
+        .with_for_update()
+    ).all()
+    shortages = _find_shortages({row.id: row.stock for row in rows}, quantities)
+    if shortages:
+        return shortages
+
+    # One conditional UPDATE for all lines; a row only changes if it still has enough stock
+    requested = case(quantities, value=models.Product.id)
+    result = db.execute(
+        update(models.Product)
+        .where(models.Product.id.in_(product_ids), models.Product.stock >= requested)
+        .values(stock=models.Product.stock - requested, version=models.Product.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(product_ids):
+        # Another writer got there first; report the lines that are now short
+        current = dict(db.execute(
+            select(models.Product.id, models.Product.stock).where(models.Product.id.in_(product_ids))
+        ).all())
+        return _find_shortages(current, quantities)
+    return []
+
+# How many times an order retries a single randomly chosen shard before locking them all
+SHARD_ATTEMPTS = 3
+
+def _shard_stock(db: Session, product_id: int, lock: bool = False) -> dict:
+    """Return {shard: stock} for a sharded product, optionally locking the rows in shard order."""
+    query = (select(models.ProductStockShard.shard, models.ProductStockShard.stock)
+             .where(models.ProductStockShard.product_id == product_id)
+             .order_by(models.ProductStockShard.shard))
+    if lock:
+        query = query.with_for_update()
+    return dict(db.execute(query).all())
+
+def _write_shards(db: Session, product_id: int, shards: int, total: int):
+    """Replace a product's shard rows with `shards` rows splitting `total` as evenly as possible."""
+    db.execute(delete(models.ProductStockShard).where(models.ProductStockShard.product_id == product_id))
+    if shards:
+        db.execute(insert(models.ProductStockShard), [
+            {"product_id": product_id, "shard": shard, "stock": total // shards + (1 if shard < total % shards else 0)}
+            for shard in range(shards)
+        ])
+
+def _take_from_shards(db: Session, product_id: int, quantity: int) -> dict:
+    """
+    Decrement a sharded product by quantity, returning a shortage entry if it cannot be filled.
+    A random shard holding enough stock takes the whole line, so concurrent orders rarely
+    touch the same row. When no single shard can cover the line, every shard is locked,
+    the line is taken from the total and the remainder is spread evenly again.
+    """
+    for _ in range(SHARD_ATTEMPTS):
+        candidates = [shard for shard, stock in _shard_stock(db, product_id).items() if stock >= quantity]
+        if not candidates:
+            break
+        shard = random.choice(candidates)
+        result = db.execute(
+            update(models.ProductStockShard)
+            .where(models.ProductStockShard.product_id == product_id,
+                   models.ProductStockShard.shard == shard,
+                   models.ProductStockShard.stock >= quantity)
+            .values(stock=models.ProductStockShard.stock - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            return None
+
+    stock = _shard_stock(db, product_id, lock=True)
+    total = sum(stock.values())
+    if total < quantity:
+        return {"product_id": product_id, "requested": quantity, "available": total}
+    _write_shards(db, product_id, len(stock), total - quantity)
     return None
 
+def _place_order(db: Session, order: schemas.OrderCreate, quantities: dict):
+    """Take the stock and write the order, its items and its sales totals, leaving the transaction open."""
+    product_ids = sorted(quantities)
+    sharded = dict(db.execute(
+        select(models.Product.id, models.Product.stock_shards)
+        .where(models.Product.id.in_(product_ids), models.Product.stock_shards > 0)
+    ).all())
+    # Unsharded rows are locked first, then shards in product id order, so writers never deadlock
+    shortages = []
+    plain = {product_id: quantity for product_id, quantity in quantities.items() if product_id not in sharded}
+    if plain:
+        shortages.extend(_take_stock(db, plain))
+    for product_id in sorted(sharded):
+        shortage = _take_from_shards(db, product_id, quantities[product_id])
+        if shortage:
+            shortages.append(shortage)
+    if shortages:
+        position = list(quantities)
+        raise InsufficientStockError(sorted(shortages, key=lambda line: position.index(line["product_id"])))
+
+    db_order = models.Order(total_amount=order.total_amount, created_at=models.utcnow())
+    db.add(db_order)
+    db.flush()
+    if order.items:
+        db.execute(insert(models.OrderItem), [
+            {"order_id": db_order.id, "product_id": item.product_id, "quantity": item.quantity}
+            for item in order.items
+        ])
+    sales.record_order(db, db_order, quantities)
+    low_stock.track(db, product_ids)
+    return db_order
+
 def create_order(db: Session, order: schemas.OrderCreate):
-    """Create a new order and handle stock reduction."""
+    """Create a new order and reduce stock for every line in a single transaction."""
+    quantities = _order_quantities(order)
+    try:
+        db_order = _place_order(db, order, quantities)
+        db.commit()
+    except (exc.SQLAlchemyError, InsufficientStockError):
+        db.rollback()
+        raise
+    product_cache.invalidate_products(list(quantities))
+    # Read the order back with its items in a fixed two queries, rather than lazy loads after commit
+    return get_order(db, db_order.id)
+
+def create_order_once(db: Session, order: schemas.OrderCreate, idempotency_key: str, request_hash: str):
+    """
+    Create an order at most once per idempotency key. The serialized response is stored with the key
+    in the order's transaction; a replay returns it without touching stock. Returns (response, replayed).
+    """
+    stored = idempotency.find_response(db, idempotency_key, request_hash)
+    if stored is not None:
+        return stored, True
+    quantities = _order_quantities(order)
     try:
-        db_order = models.Order(total_amount=order.total_amount)
-        db.add(db_order)
+        db_order = _place_order(db, order, quantities)
+        response = schemas.Order.model_validate(get_order(db, db_order.id), from_attributes=True)
+        response = response.model_dump(mode="json")
+        idempotency.store_response(db, idempotency_key, request_hash, db_order.id, response)
         db.commit()
-        db.refresh(db_order)
+    except exc.IntegrityError:
+        # A concurrent request with the same key committed first; this attempt's stock changes roll back
+        db.rollback()
+        stored = idempotency.find_response(db, idempotency_key, request_hash)
+        if stored is None:
+            raise
+        return stored, True
+    except (exc.SQLAlchemyError, InsufficientStockError):
+        db.rollback()
+        raise
+    product_cache.invalidate_products(list(quantities))
+    return response, False
+
+def get_order(db: Session, order_id: int):
+    """Retrieve an order by its ID with its items loaded."""
+    return db.scalars(
+        select(models.Order).options(selectinload(models.Order.items)).where(models.Order.id == order_id)
+    ).first()
+
+def get_orders(db: Session, skip: int = 0, limit: int = 10, after_id: int = None, product_id: int = None):
+    """
+    Retrieve a list of orders ordered by id with their items, paged by offset or by the last seen id,
+    optionally only orders containing product_id. Always two queries, whatever the page size.
+    """
+    query = select(models.Order).options(selectinload(models.Order.items))
+    if product_id is not None:
+        query = query.where(models.Order.items.any(models.OrderItem.product_id == product_id))
+    return db.scalars(_page(query, skip, limit, after_id, key=models.Order.id)).all()
 
-        for item in order.items:
-            db_order_item = models.OrderItem(order_id=db_order.id, product_id=item.product_id, quantity=item.quantity)
-            db.add(db_order_item)
+def _move_stock_into_shards(db: Session, product_ids: List[int]):
+    """Spread the stock column of any sharded product among the ids across its shards."""
+    rows = db.execute(
+        select(models.Product.id, models.Product.stock, models.Product.stock_shards)
+        .where(models.Product.id.in_(product_ids), models.Product.stock_shards > 0)
+    ).all()
+    for row in rows:
+        _write_shards(db, row.id, row.stock_shards, row.stock or 0)
+    if rows:
+        db.execute(
+            update(models.Product)
+            .where(models.Product.id.in_([row.id for row in rows]))
+            .values(stock=0)
+            .execution_options(synchronize_session=False)
+        )
+
+def set_stock_shards(db: Session, product_id: int, shards: int):
+    """
+    Split a product's stock across `shards` counter rows, or fold it back into the
+    stock column with shards=0. Returns the inventory entry, or None if there is no such product.
+    """
+    try:
+        db_product = db.query(models.Product).filter_by(id=product_id).with_for_update().first()
+        if db_product is None:
+            return None
+        total = db_product.available_stock or 0
+        if db_product.stock_shards:
+            # Lock the shards so no order is mid-way through taking from them
+            total = sum(_shard_stock(db, product_id, lock=True).values())
+        _write_shards(db, product_id, shards, total)
+        db_product.stock = 0 if shards else total
+        db_product.stock_shards = shards
+        db.commit()
+    except exc.SQLAlchemyError:
+        db.rollback()
+        raise
+    product_cache.invalidate_products([product_id])
+    return {"product_id": product_id, "stock": total, "shards": shards, "version": db_product.version}
+
+# Adjustments written per UPDATE ... FROM (VALUES ...) statement on PostgreSQL; each row binds two parameters
+STOCK_ADJUSTMENT_CHUNK_SIZE = 1000
+
+def _write_stock_levels(db: Session, levels: dict):
+    """Set the stock column of many products, bumping their versions."""
+    table = models.Product.__table__
+    product_ids = sorted(levels)
+    if db.get_bind().dialect.name != "postgresql":
+        # One statement executed for every row; on SQLite this is a loop inside the driver, not round trips
+        db.execute(
+            update(table).where(table.c.id == bindparam("product_id"))
+            .values(stock=bindparam("new_stock"), version=table.c.version + 1),
+            [{"product_id": product_id, "new_stock": levels[product_id]} for product_id in product_ids]
+        )
+        return
+    for start in range(0, len(product_ids), STOCK_ADJUSTMENT_CHUNK_SIZE):
+        chunk = product_ids[start:start + STOCK_ADJUSTMENT_CHUNK_SIZE]
+        # UPDATE ... FROM (VALUES ...), joining the new levels to the rows by primary key
+        adjusted = values(column("product_id", Integer), column("stock", Integer), name="adjusted").data(
+            [(product_id, levels[product_id]) for product_id in chunk]
+        )
+        db.execute(update(table).where(table.c.id == adjusted.c.product_id)
+                   .values(stock=adjusted.c.stock, version=table.c.version + 1))
+
+def adjust_stock(db: Session, adjustments: List[schemas.StockAdjustment], allow_negative: bool = False) -> dict:
+    """
+    Apply stock adjustments (a delta, or an absolute level) to many products in one transaction.
+    The products are locked in id order, each line is applied in request order, and the new levels are
+    written in bulk (UPDATE ... FROM VALUES on PostgreSQL). Unless allow_negative is set, a line that
+    would leave a product below zero is rejected and the rest still apply. Returns one result per line.
+    """
+    product_ids = sorted({adjustment.product_id for adjustment in adjustments})
+    try:
+        current, sharded = {}, set()
+        for start in range(0, len(product_ids), STOCK_ADJUSTMENT_CHUNK_SIZE):
+            for row in db.execute(
+                    select(models.Product.id, models.Product.stock, models.Product.stock_shards)
+                    .where(models.Product.id.in_(product_ids[start:start + STOCK_ADJUSTMENT_CHUNK_SIZE]))
+                    .order_by(models.Product.id)
+                    .with_for_update()
+            ):
+                current[row.id] = row.stock or 0
+                if row.stock_shards:
+                    sharded.add(row.id)
+        for product_id in sorted(sharded):
+            # Lock the shards so no order is mid-way through taking from them
+            current[product_id] = sum(_shard_stock(db, product_id, lock=True).values())
 
-            product = db.query(models.Product).filter_by(id=item.product_id).first()
-            if product:
-                if product.stock < item.quantity:
-                    raise ValueError(f"Not enough stock for product {product.name}")
-                product.stock -= item.quantity
-                db.add(product)
+        levels = dict(current)
+        results = []
+        for adjustment in adjustments:
+            product_id = adjustment.product_id
+            if product_id not in levels:
+                results.append({"product_id": product_id, "status": "not_found", "stock": None})
+                continue
+            level = adjustment.absolute if adjustment.absolute is not None else levels[product_id] + adjustment.delta
+            if level < 0 and not allow_negative:
+                results.append({"product_id": product_id, "status": "rejected", "stock": levels[product_id]})
+                continue
+            levels[product_id] = level
+            results.append({"product_id": product_id, "status": "applied", "stock": level})
 
+        changed = {product_id: level for product_id, level in levels.items() if level != current[product_id]}
+        if changed:
+            _write_stock_levels(db, changed)
+            _move_stock_into_shards(db, sorted(sharded & set(changed)))
+            low_stock.track(db, changed)
         db.commit()
-        return db_order
-    except exc.SQLAlchemyError as e:
+    except exc.SQLAlchemyError:
         db.rollback()
-        raise e
+        raise
+    if changed:
+        product_cache.invalidate_products(changed)
+    counts = {status: sum(result["status"] == status for result in results)
+              for status in ("applied", "rejected", "not_found")}
+    return dict(counts, results=results)
@@ -9,14 +9,22 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from fastapi import Depends
 
+from .db_pool import DB_POOL_STRATEGY, PoolMetrics, pool_options
+from .timing import instrument_engine
+
 # Load environment variables from a .env file if present
 load_dotenv()
 
 # Fetch the database URL from environment variables
 SQLALCHEMY_DATABASE_URL = os.getenv("SQLALCHEMY_DATABASE_URL")
 
+# Counters for the connection pool of the engine below
+pool_metrics = PoolMetrics()
+
 # Create the SQLAlchemy engine, which will interface with the database
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **pool_options(DB_POOL_STRATEGY, pool_metrics))
+pool_metrics.attach(engine)
+instrument_engine(engine)
 
 # Create a configured "Session" class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
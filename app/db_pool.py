@@ -0,0 +1,136 @@
+# app/db_pool.py
+# Author: Thanh Trieu
+# Description: Contains connection pool strategies for the database engines and pool instrumentation.
+
+import os
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+# Pool strategy: "queue" (sized pool), "null" (no pooling), "single" (one persistent
+# connection, meant for Lambda containers) or "auto" to pick from the runtime environment
+DB_POOL_STRATEGY = os.getenv("DB_POOL_STRATEGY", "auto")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+POOL_STRATEGIES = ("queue", "null", "single")
+
+def resolve_pool_strategy(strategy: str = DB_POOL_STRATEGY) -> str:
+    """Turn a configured strategy into a concrete one; "auto" picks "single" on Lambda and "queue" elsewhere."""
+    if strategy == "auto":
+        return "single" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "queue"
+    if strategy not in POOL_STRATEGIES:
+        raise ValueError(f"Unknown pool strategy {strategy!r}, expected one of {POOL_STRATEGIES} or 'auto'")
+    return strategy
+
+class PoolMetrics:
+    """Counters for one engine's connection pool, fed by pool events and checkout timing."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero every counter."""
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.soft_invalidations = 0
+            self.checked_out = 0
+            self.wait_time_total = 0.0
+            self.wait_time_max = 0.0
+            self.overflow = 0
+            self.overflow_peak = 0
+
+    def record_wait(self, seconds: float, overflow: int = 0):
+        with self._lock:
+            self.wait_time_total += seconds
+            self.wait_time_max = max(self.wait_time_max, seconds)
+            self.overflow = overflow
+            self.overflow_peak = max(self.overflow_peak, overflow)
+
+    def attach(self, engine):
+        """Listen to the pool events of a (sync) engine; listeners survive pool recreation."""
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        event.listen(engine, "soft_invalidate", self._on_soft_invalidate)
+
+    def snapshot(self) -> dict:
+        """Return the current counters."""
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "checked_out": self.checked_out,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+                "wait_time_total": self.wait_time_total,
+                "wait_time_max": self.wait_time_max,
+                "wait_time_avg": self.wait_time_total / self.checkouts if self.checkouts else 0.0,
+                "overflow": self.overflow,
+                "overflow_peak": self.overflow_peak,
+            }
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def _on_soft_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.soft_invalidations += 1
+
+def instrumented_pool_class(base, metrics: PoolMetrics):
+    """Subclass a pool class so the time spent waiting for a connection is recorded in metrics."""
+
+    class InstrumentedPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                overflow = self.overflow() if hasattr(self, "overflow") else 0
+                metrics.record_wait(time.perf_counter() - start, max(0, overflow))
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+def pool_options(strategy: str, metrics: PoolMetrics, use_asyncio: bool = False) -> dict:
+    """Return create_engine keyword arguments for a pool strategy."""
+    strategy = resolve_pool_strategy(strategy)
+    if strategy == "null":
+        return {"poolclass": instrumented_pool_class(NullPool, metrics)}
+    queue_pool = AsyncAdaptedQueuePool if use_asyncio else QueuePool
+    options = {
+        "poolclass": instrumented_pool_class(queue_pool, metrics),
+        "pool_pre_ping": True,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+    if strategy == "single":
+        # Lambda serves one request per container at a time, so one connection is enough
+        options.update(pool_size=1, max_overflow=0)
+    else:
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+    return options
@@ -2,11 +2,15 @@
 # Author: Thanh Trieu
 # Description: Contains functions for interacting with DynamoDB, including logging API calls.
 
+import asyncio
 import os
+import queue
+import threading
 import time
-import boto3
 from dotenv import load_dotenv
 
+from .bootstrap import lazy_resource
+
 # Load environment variables from a .env file if present
 load_dotenv()
 
@@ -15,24 +19,197 @@ AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 DYNAMODB_TABLE_NAME = os.getenv("DYNAMODB_TABLE_NAME")
 
-# Initialize DynamoDB resource
-dynamodb = boto3.resource(
-    'dynamodb',
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name='us-east-1'  # Set your preferred region
-)
-
-# Reference to the DynamoDB table
-table = dynamodb.Table(DYNAMODB_TABLE_NAME)
-
-def log_api_call(endpoint: str, status_code: int, execution_time: float):
-    """Log API call details to DynamoDB."""
-    table.put_item(
-        Item={
-            'endpoint': endpoint,
-            'status_code': str(status_code),  # Convert status_code to string
-            'execution_time': str(execution_time),  # Convert execution_time to string
-            'timestamp': str(int(time.time()))  # Convert timestamp to string
-        }
+# Settings for the buffered API call log pipeline
+API_LOG_QUEUE_SIZE = int(os.getenv("API_LOG_QUEUE_SIZE", "10000"))
+API_LOG_BATCH_SIZE = int(os.getenv("API_LOG_BATCH_SIZE", "25"))
+API_LOG_FLUSH_INTERVAL = float(os.getenv("API_LOG_FLUSH_INTERVAL", "1.0"))
+API_LOG_DROP_POLICY = os.getenv("API_LOG_DROP_POLICY", "drop_newest")
+
+# BatchWriteItem accepts at most 25 put requests per call
+MAX_BATCH_WRITE_ITEMS = 25
+
+DROP_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+@lazy_resource("dynamodb_table")
+def get_table():
+    """Return the API call tracking table, creating the DynamoDB resource on first use."""
+    import boto3  # Deferred: importing boto3 alone costs ~200 ms of cold start
+    dynamodb = boto3.resource(
+        'dynamodb',
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        region_name='us-east-1'  # Set your preferred region
     )
+    return dynamodb.Table(DYNAMODB_TABLE_NAME)
+
+class ApiCallLogBuffer:
+    """
+    Bounded in-process queue of API call records that a background thread
+    flushes to DynamoDB with BatchWriteItem once enough records are queued
+    or the flush interval elapses. `table` is a DynamoDB Table or a function
+    returning one, so the table can be created on the first flush.
+    """
+
+    def __init__(self, table, max_queue_size: int = API_LOG_QUEUE_SIZE, batch_size: int = API_LOG_BATCH_SIZE,
+                 flush_interval: float = API_LOG_FLUSH_INTERVAL, drop_policy: str = API_LOG_DROP_POLICY,
+                 block_timeout: float = 0.05):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy {drop_policy!r}, expected one of {DROP_POLICIES}")
+        self.table = table
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_WRITE_ITEMS))
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.block_timeout = block_timeout
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._counter_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def _count(self, name: str, amount: int = 1):
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def enqueue(self, record: dict) -> bool:
+        """Queue a record for the next flush. Returns False if the record was dropped."""
+        self._ensure_started()
+        try:
+            if self.drop_policy == "block":
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            if self.drop_policy != "drop_oldest":
+                self._count("dropped")
+                return False
+            # Make room by discarding the oldest record still waiting in the queue
+            try:
+                self._queue.get_nowait()
+                self._count("dropped")
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self._count("dropped")
+                return False
+        self._accepted()
+        return True
+
+    async def enqueue_async(self, record: dict) -> bool:
+        """
+        Queue a record from async code. Under the block policy a full queue is waited on in a worker
+        thread, so the event loop keeps serving other requests meanwhile.
+        """
+        if self.drop_policy != "block":
+            return self.enqueue(record)
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            return await asyncio.to_thread(self.enqueue, record)
+        self._accepted()
+        return True
+
+    def _accepted(self):
+        self._count("queued")
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write every queued record to DynamoDB and return how many were written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    break
+                try:
+                    table = self.table() if callable(self.table) else self.table
+                    # Not a request span: flushes run on the flusher thread or after the Lambda response
+                    with table.batch_writer() as writer:
+                        for record in batch:
+                            writer.put_item(Item=record)
+                except Exception:
+                    self._count("failed", len(batch))
+                    continue
+                self._count("flushed", len(batch))
+                written += len(batch)
+        return written
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stop the background flusher and write out whatever is still queued."""
+        thread = self._thread
+        if thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            thread.join(timeout)
+            self._thread = None
+            self._stopping.clear()
+        self.flush()
+
+    def stats(self) -> dict:
+        """Return the pipeline counters and the current queue depth."""
+        with self._counter_lock:
+            return {
+                "queued": self.queued,
+                "flushed": self.flushed,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "pending": self._queue.qsize(),
+            }
+
+    def _drain(self, limit: int) -> list:
+        records = []
+        while len(records) < limit:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="api-call-log-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+# Process-wide buffer used by the request logging middleware
+api_call_log_buffer = ApiCallLogBuffer(get_table)
+
+def _api_call_record(endpoint: str, status_code: int, execution_time: float, server_timing: str = None) -> dict:
+    record = {
+        'endpoint': endpoint,
+        'status_code': str(status_code),  # Convert status_code to string
+        'execution_time': str(execution_time),  # Convert execution_time to string
+        'timestamp': str(int(time.time()))  # Convert timestamp to string
+    }
+    if server_timing:
+        record['server_timing'] = server_timing
+    return record
+
+def log_api_call(endpoint: str, status_code: int, execution_time: float, server_timing: str = None):
+    """Queue API call details, with the Server-Timing breakdown if there is one, for a batched write to DynamoDB."""
+    api_call_log_buffer.enqueue(_api_call_record(endpoint, status_code, execution_time, server_timing))
+
+async def log_api_call_async(endpoint: str, status_code: int, execution_time: float, server_timing: str = None):
+    """log_api_call for the request middleware, never blocking the event loop on a full queue."""
+    await api_call_log_buffer.enqueue_async(_api_call_record(endpoint, status_code, execution_time, server_timing))
+
+def flush_api_call_logs() -> int:
+    """Write out all queued API call records immediately."""
+    return api_call_log_buffer.flush()
@@ -0,0 +1,77 @@
+# app/idempotency.py
+# Author: Thanh Trieu
+# Description: Idempotency-Key support for order creation: request fingerprints, stored results and the expiry
+#              sweep (python -m app.idempotency, or a scheduled {"sweep_idempotency_keys": true} Lambda event).
+
+import hashlib
+import json
+import os
+from datetime import timedelta
+from dotenv import load_dotenv
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Load environment variables from .env file
+load_dotenv()
+
+# How long a key is remembered; a retry after this runs as a new request
+IDEMPOTENCY_KEY_TTL_HOURS = float(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', '24'))
+IDEMPOTENCY_SWEEP_BATCH_SIZE = int(os.getenv('IDEMPOTENCY_SWEEP_BATCH_SIZE', '1000'))
+# Longest Idempotency-Key header accepted, matching the column
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+class IdempotencyKeyMismatch(ValueError):
+    """Raised when an Idempotency-Key is reused with a different request body."""
+
+def request_hash(payload) -> str:
+    """Fingerprint a request body (a pydantic model) so a reused key can be matched to its request."""
+    canonical = json.dumps(payload.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def _cutoff():
+    return models.utcnow() - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+
+def find_response(db: Session, key: str, fingerprint: str):
+    """
+    Return the stored response for key, or None if the key is new. An expired entry is deleted in
+    the caller's transaction so the key can be used again. Raises IdempotencyKeyMismatch if the key
+    was used with a different request.
+    """
+    entry = db.scalars(select(models.IdempotencyKey).where(models.IdempotencyKey.key == key)).first()
+    if entry is None:
+        return None
+    if entry.created_at < _cutoff():
+        db.delete(entry)
+        db.flush()
+        return None
+    if entry.request_hash != fingerprint:
+        raise IdempotencyKeyMismatch(f"Idempotency-Key {key!r} was already used with a different request")
+    return entry.response
+
+def store_response(db: Session, key: str, fingerprint: str, order_id: int, response: dict):
+    """Record the response for key in the caller's transaction, so it commits together with the order."""
+    db.add(models.IdempotencyKey(key=key, request_hash=fingerprint, order_id=order_id, response=response))
+    db.flush()
+
+def sweep_expired_keys(db: Session, batch_size: int = IDEMPOTENCY_SWEEP_BATCH_SIZE) -> int:
+    """Delete expired keys in batches, committing after each, and return how many were removed."""
+    cutoff = _cutoff()
+    removed = 0
+    while True:
+        keys = db.scalars(
+            select(models.IdempotencyKey.key).where(models.IdempotencyKey.created_at < cutoff).limit(batch_size)
+        ).all()
+        if keys:
+            db.execute(delete(models.IdempotencyKey).where(models.IdempotencyKey.key.in_(keys)))
+            db.commit()
+            removed += len(keys)
+        if len(keys) < batch_size:
+            return removed
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    with SessionLocal() as session:
+        print(f"Removed {sweep_expired_keys(session)} expired idempotency keys.")
@@ -0,0 +1,166 @@
+# app/low_stock.py
+# Author: Thanh Trieu
+# Description: Low-stock watchlist of products at or below their reorder threshold, updated incrementally by every
+#              stock write, with an event feed of threshold crossings and a rebuild (python -m app.low_stock).
+
+import argparse
+from typing import Iterable, List, Optional
+from sqlalchemy import delete, event, func, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Products checked per statement when tracking a large batch or rebuilding the watchlist
+LOW_STOCK_CHUNK_SIZE = 1000
+
+EVENT_LOW = "low"
+EVENT_CLEARED = "cleared"
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Transaction-scoped PostgreSQL advisory lock taken before inserting events, so event ids commit in id order
+EVENT_LOCK_KEY = 7_350_001
+# Session.info key of the events recorded by the current transaction, inserted just before it commits
+_PENDING_EVENTS = "low_stock_events"
+
+def _record_events(db: Session, events: List[dict]):
+    db.info.setdefault(_PENDING_EVENTS, []).extend(events)
+
+@event.listens_for(Session, "before_commit")
+def _insert_pending_events(db: Session):
+    # Sequence ids are handed out at insert time but transactions can commit in another order, which would let a
+    # poller move its cursor past an event that is still in flight. Holding the lock from the insert to the commit
+    # serializes them; it is the transaction's last statement, so it never waits on row locks while holding it.
+    events = db.info.pop(_PENDING_EVENTS, None)
+    if not events:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(EVENT_LOCK_KEY)))
+    db.execute(insert(models.LowStockEvent), events)
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_pending_events(db: Session, transaction):
+    # Rolled back or closed without committing; savepoints leave the outer transaction's events alone
+    if transaction.parent is None:
+        db.info.pop(_PENDING_EVENTS, None)
+
+def _add_to_watchlist(db: Session, row: dict) -> bool:
+    """Insert a watchlist entry; returns False when a concurrent writer already added it."""
+    dialect_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        statement = dialect_insert(models.LowStockItem).values(row).on_conflict_do_nothing(
+            index_elements=["product_id"]
+        )
+        return db.execute(statement).rowcount == 1
+    if db.get(models.LowStockItem, row["product_id"]) is not None:
+        return False
+    db.execute(insert(models.LowStockItem).values(row))
+    return True
+
+def _track_chunk(db: Session, product_ids: List[int]):
+    listed = models.LowStockItem
+    rows = db.execute(
+        select(models.Product.id, models.Product.available_stock, models.Product.reorder_threshold,
+               listed.stock.label("listed_stock"), listed.reorder_threshold.label("listed_threshold"))
+        .outerjoin(listed, listed.product_id == models.Product.id)
+        .where(models.Product.id.in_(product_ids),
+               or_(models.Product.reorder_threshold.is_not(None), listed.product_id.is_not(None)))
+    ).all()
+    now = models.utcnow()
+    events = []
+    for product_id, stock, threshold, listed_stock, listed_threshold in rows:
+        low = threshold is not None and stock <= threshold
+        if low and listed_stock is None:
+            if _add_to_watchlist(db, {"product_id": product_id, "stock": stock, "reorder_threshold": threshold,
+                                      "since": now}):
+                events.append({"product_id": product_id, "event": EVENT_LOW, "stock": stock,
+                               "reorder_threshold": threshold, "created_at": now})
+        elif low and (listed_stock, listed_threshold) != (stock, threshold):
+            db.execute(update(listed).where(listed.product_id == product_id)
+                       .values(stock=stock, reorder_threshold=threshold))
+        elif not low and listed_stock is not None:
+            if db.execute(delete(listed).where(listed.product_id == product_id)).rowcount:
+                events.append({"product_id": product_id, "event": EVENT_CLEARED, "stock": stock,
+                               "reorder_threshold": threshold, "created_at": now})
+    if events:
+        _record_events(db, sorted(events, key=lambda event: event["product_id"]))
+
+def track(db: Session, product_ids: Iterable[int]):
+    """
+    Bring the watchlist entries of the given products up to date inside the caller's transaction, after
+    their stock or threshold changed, recording an event for each product that crossed its threshold.
+    Products without a threshold that are not on the watchlist cost nothing beyond one indexed lookup.
+    """
+    product_ids = sorted(set(product_ids))
+    for start in range(0, len(product_ids), LOW_STOCK_CHUNK_SIZE):
+        _track_chunk(db, product_ids[start:start + LOW_STOCK_CHUNK_SIZE])
+
+def forget(db: Session, product_ids: Iterable[int]):
+    """Drop products that are being deleted from the watchlist, recording a cleared event for each one listed."""
+    listed = models.LowStockItem
+    product_ids = sorted(set(product_ids))
+    removed = db.scalars(select(listed.product_id).where(listed.product_id.in_(product_ids))).all()
+    if removed:
+        db.execute(delete(listed).where(listed.product_id.in_(removed)))
+        now = models.utcnow()
+        _record_events(db, [
+            {"product_id": product_id, "event": EVENT_CLEARED, "stock": None, "reorder_threshold": None,
+             "created_at": now}
+            for product_id in sorted(removed)
+        ])
+
+def watchlist(db: Session, limit: int = 100, after_id: int = None) -> List[dict]:
+    """Return the products at or below their reorder threshold in product id order, after after_id."""
+    statement = select(models.LowStockItem.product_id, models.LowStockItem.stock,
+                       models.LowStockItem.reorder_threshold, models.LowStockItem.since)
+    if after_id is not None:
+        statement = statement.where(models.LowStockItem.product_id > after_id)
+    rows = db.execute(statement.order_by(models.LowStockItem.product_id).limit(limit))
+    return [row._asdict() for row in rows]
+
+def events_since(db: Session, after_id: Optional[int] = None, limit: int = 100) -> List[dict]:
+    """
+    Return threshold crossings recorded after the event id after_id, oldest first. Events are inserted as
+    their transaction commits, serialized by an advisory lock on PostgreSQL and by SQLite's single writer,
+    so ids become visible in order and a reader polling with the last id it saw misses nothing. On other
+    databases concurrent writers can commit ids out of order, and such a reader can skip events.
+    """
+    statement = select(models.LowStockEvent.id, models.LowStockEvent.product_id, models.LowStockEvent.event,
+                       models.LowStockEvent.stock, models.LowStockEvent.reorder_threshold,
+                       models.LowStockEvent.created_at)
+    if after_id is not None:
+        statement = statement.where(models.LowStockEvent.id > after_id)
+    rows = db.execute(statement.order_by(models.LowStockEvent.id).limit(limit))
+    return [row._asdict() for row in rows]
+
+def rebuild_watchlist(db: Session, chunk_size: int = LOW_STOCK_CHUNK_SIZE) -> dict:
+    """
+    Re-check every product with a threshold or a watchlist entry, a chunk at a time, recording events for
+    any crossing the incremental tracking missed (thresholds or stock changed outside the API).
+    """
+    tracked = set(db.scalars(select(models.Product.id).where(models.Product.reorder_threshold.is_not(None))))
+    orphans = set(db.scalars(
+        select(models.LowStockItem.product_id)
+        .outerjoin(models.Product, models.Product.id == models.LowStockItem.product_id)
+        .where(models.Product.id.is_(None))
+    ))
+    forget(db, orphans)
+    product_ids = sorted(tracked | set(db.scalars(select(models.LowStockItem.product_id))))
+    db.commit()
+    for start in range(0, len(product_ids), chunk_size):
+        _track_chunk(db, product_ids[start:start + chunk_size])
+        db.commit()
+    listed = db.scalar(select(func.count()).select_from(models.LowStockItem))
+    return {"checked": len(product_ids), "listed": listed}
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild the low-stock watchlist from current stock levels")
+    parser.add_argument("--chunk-size", type=int, default=LOW_STOCK_CHUNK_SIZE)
+    args = parser.parse_args()
+    with SessionLocal() as session:
+        result = rebuild_watchlist(session, chunk_size=args.chunk_size)
+    print(f"Checked {result['checked']} products; {result['listed']} are at or below their reorder threshold.")
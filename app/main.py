@@ -2,20 +2,26 @@
 # Author: Thanh Trieu
 # Description: Main entry point for the FastAPI application, including middleware, routers, and AWS Lambda integration.
 
+import os
 import time
 from fastapi import FastAPI, Request
 from mangum import Mangum
 
-from .database import SessionLocal, engine
-from .dynamodb import log_api_call
-from .models import Base
-from .routers import products, inventory, orders
+from .bootstrap import warm_up
+from .database import SessionLocal
+from .dynamodb import log_api_call_async, flush_api_call_logs, api_call_log_buffer
+from .idempotency import sweep_expired_keys
+from .timing import TimedJSONResponse, start_request
+from .routers import products, inventory, orders, reports, metrics
 
-# Create the database tables if they don't already exist
-Base.metadata.create_all(bind=engine)
+# Schema creation is a separate step (python -m app.migrate) and no longer runs on import.
+# AWS clients and the Cognito JWKS are built on first use unless WARM_UP_ON_IMPORT is set,
+# which suits Lambda provisioned concurrency where the init phase is not on the request path.
+if os.getenv("WARM_UP_ON_IMPORT", "").lower() in ("1", "true", "yes"):
+    warm_up()
 
 # Initialize the FastAPI application
-app = FastAPI()
+app = FastAPI(default_response_class=TimedJSONResponse)
 
 # Dependency function to get a database session
 def get_db():
@@ -29,18 +35,49 @@ def get_db():
 # Middleware to measure and log the processing time of each request
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
-    """Middleware to calculate and log the request processing time."""
+    """
+    Middleware to calculate and log the request processing time. Sampled requests
+    (REQUEST_TIMING_SAMPLE_RATE) also get a per-component Server-Timing breakdown.
+    """
+    timings = start_request()
     start_time = time.time()
     response = await call_next(request)
     process_time = time.time() - start_time
     response.headers["X-Process-Time"] = str(process_time)
-    log_api_call(request.url.path, response.status_code, process_time)
+    server_timing = None
+    if timings is not None:
+        timings.add("total", process_time)
+        server_timing = timings.server_timing()
+        response.headers["Server-Timing"] = server_timing
+    await log_api_call_async(request.url.path, response.status_code, process_time, server_timing)
     return response
 
+@app.on_event("shutdown")
+def flush_logs_on_shutdown():
+    """Stop the API call log flusher and write out any queued records."""
+    api_call_log_buffer.shutdown()
+
 # Include the routers for the different API endpoints
 app.include_router(products.router)
 app.include_router(inventory.router)
 app.include_router(orders.router)
+app.include_router(reports.router)
+app.include_router(metrics.router)
 
 # Create the Mangum handler to run the FastAPI app on AWS Lambda
-lambda_handler = Mangum(app)
+mangum_handler = Mangum(app)
+
+def lambda_handler(event, context):
+    """AWS Lambda entry point that flushes buffered API call logs before the invocation ends."""
+    # Scheduled warm-up pings ({"warmup": true}) build the lazy resources without serving a request
+    if isinstance(event, dict) and event.get("warmup"):
+        return {"warmed_up": warm_up()}
+    # Scheduled clean-up ({"sweep_idempotency_keys": true}) of expired Idempotency-Key records
+    if isinstance(event, dict) and event.get("sweep_idempotency_keys"):
+        with SessionLocal() as db:
+            return {"swept_idempotency_keys": sweep_expired_keys(db)}
+    try:
+        return mangum_handler(event, context)
+    finally:
+        # Lambda freezes the container between invocations, so the background flusher cannot be relied on
+        flush_api_call_logs()
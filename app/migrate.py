@@ -0,0 +1,54 @@
+# app/migrate.py
+# Author: Thanh Trieu
+# Description: Schema migration step, run separately from serving requests (python -m app.migrate).
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+from .database import Base, engine as default_engine
+from .search import create_search_indexes
+
+def _add_missing_columns(engine: Engine):
+    """Add columns declared on the models but missing from tables created by an older release."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+                connection.execute(text(ddl))
+
+def _add_missing_indexes(engine: Engine):
+    """Create indexes declared on the models but missing from tables created by an older release."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(bind=connection)
+
+def run_migrations(engine: Engine = None):
+    """Create any tables that do not exist yet and add columns and indexes introduced since they were created."""
+    engine = engine or default_engine
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns(engine)
+    _add_missing_indexes(engine)
+    create_search_indexes(engine)
+
+if __name__ == "__main__":
+    run_migrations()
+    print("Database schema is up to date.")
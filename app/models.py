@@ -2,11 +2,16 @@
 # Author: Thanh Trieu
 # Description: Contains SQLAlchemy ORM models for the application, including Product, Order, and OrderItem.
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
-from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+from sqlalchemy import Column, Date, DateTime, Index, Integer, String, Float, ForeignKey, JSON, case, func, select
+from sqlalchemy.orm import column_property, relationship
 
 from .database import Base
 
+def utcnow() -> datetime:
+    """Current UTC time as a naive datetime, the way DateTime columns store it."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class Product(Base):
     """Model representing a product in the inventory."""
     __tablename__ = 'products'
@@ -16,19 +21,101 @@ class Product(Base):
     price = Column(Float)
     stock = Column(Integer)
     image_url = Column(String)
+    # {variant name: S3 URL} of the resized copies of image_url, filled in after upload
+    image_variants = Column(JSON)
+    # 0 keeps stock in the stock column; N > 0 splits it across N rows of product_stock_shards
+    stock_shards = Column(Integer, nullable=False, default=0, server_default="0")
+    # Bumped by every write; ORM flushes do it (and check it) themselves, Core UPDATEs must set version + 1
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Products whose available stock falls to this level or below go on the low-stock watchlist; NULL opts out
+    reorder_threshold = Column(Integer)
+
+    __mapper_args__ = {"version_id_col": version}
+    # Partial index over the few products with a threshold, scanned when the watchlist is rebuilt
+    __table_args__ = (
+        Index("ix_products_reorder_threshold", "id", "reorder_threshold",
+              postgresql_where=reorder_threshold.is_not(None), sqlite_where=reorder_threshold.is_not(None)),
+    )
+
+class ProductStockShard(Base):
+    """Model representing one counter row of a product whose stock is sharded."""
+    __tablename__ = 'product_stock_shards'
+    product_id = Column(Integer, ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    stock = Column(Integer, nullable=False, default=0)
+
+# Stock available for sale: the stock column, or the sum of the shards for sharded products
+Product.available_stock = column_property(
+    case(
+        (Product.stock_shards > 0, func.coalesce(
+            select(func.sum(ProductStockShard.stock))
+            .where(ProductStockShard.product_id == Product.id)
+            .correlate_except(ProductStockShard)
+            .scalar_subquery(),
+            0
+        )),
+        else_=Product.stock
+    )
+)
 
 class Order(Base):
     """Model representing an order placed by a customer."""
     __tablename__ = 'orders'
     id = Column(Integer, primary_key=True, index=True)
     total_amount = Column(Float)
-    items = relationship("OrderItem", back_populates="order")
+    # UTC; NULL for orders placed before the column existed
+    created_at = Column(DateTime, default=utcnow)
+    items = relationship("OrderItem", back_populates="order", order_by="OrderItem.id")
 
 class OrderItem(Base):
     """Model representing an item in an order."""
     __tablename__ = 'order_items'
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey('orders.id'))
-    product_id = Column(Integer, ForeignKey('products.id'))
+    # Indexed for loading an order's items and for filtering orders by product
+    order_id = Column(Integer, ForeignKey('orders.id'), index=True)
+    product_id = Column(Integer, ForeignKey('products.id'), index=True)
     quantity = Column(Integer)
     order = relationship("Order", back_populates="items")
+
+class ProductSales(Base):
+    """Running sales totals of one product, updated with every order."""
+    __tablename__ = 'product_sales'
+    product_id = Column(Integer, primary_key=True)
+    units_sold = Column(Integer, nullable=False, default=0, index=True)  # Indexed for the top-products report
+    order_count = Column(Integer, nullable=False, default=0)
+
+class DailySales(Base):
+    """Running sales totals of one UTC day, updated with every order."""
+    __tablename__ = 'daily_sales'
+    day = Column(Date, primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    units_sold = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+class IdempotencyKey(Base):
+    """Model recording the result of an order request made with an Idempotency-Key header."""
+    __tablename__ = 'idempotency_keys'
+    # The primary key makes a concurrent duplicate wait for, then fail against, the first request
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    order_id = Column(Integer, ForeignKey('orders.id'))
+    response = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=utcnow, index=True)  # Indexed for the expiry sweep
+
+class LowStockItem(Base):
+    """Watchlist entry of a product at or below its reorder threshold, kept current by every stock write."""
+    __tablename__ = 'low_stock_items'
+    product_id = Column(Integer, ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    stock = Column(Integer, nullable=False)
+    reorder_threshold = Column(Integer, nullable=False)
+    since = Column(DateTime, nullable=False, default=utcnow)  # When the product went low
+
+class LowStockEvent(Base):
+    """A product crossing its reorder threshold, in either direction; consumers page through them by id."""
+    __tablename__ = 'low_stock_events'
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, nullable=False, index=True)
+    event = Column(String(16), nullable=False)  # "low" or "cleared"
+    stock = Column(Integer)  # NULL when the product was deleted
+    reorder_threshold = Column(Integer)
+    created_at = Column(DateTime, nullable=False, default=utcnow)
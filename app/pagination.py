@@ -0,0 +1,62 @@
+# app/pagination.py
+# Author: Thanh Trieu
+# Description: Helpers for keyset (cursor) pagination, encoding the last seen id as an opaque token.
+
+import base64
+import json
+from typing import Optional, Tuple
+from fastapi import HTTPException
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def _encode(fields: dict) -> str:
+    raw = json.dumps(fields, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode(cursor: str, names: Tuple[str, ...]) -> Tuple[int, ...]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        fields = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = tuple(fields[name] for name in names)
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if not all(isinstance(value, int) for value in values):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return values
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the id of the last row on a page as an opaque cursor token."""
+    return _encode({"id": last_id})
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor token back into the last seen id."""
+    return _decode(cursor, ("id",))[0]
+
+def encode_rank_cursor(rank: int, last_id: int) -> str:
+    """Encode the position of the last row on a page of results ordered by (rank, id)."""
+    return _encode({"rank": rank, "id": last_id})
+
+def rank_cursor_to_position(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Decode an optional (rank, id) cursor query parameter, answering 400 for malformed tokens."""
+    if cursor is None:
+        return None
+    try:
+        return _decode(cursor, ("rank", "id"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def cursor_to_id(cursor: Optional[str]) -> Optional[int]:
+    """Decode an optional cursor query parameter, answering 400 for malformed tokens."""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def next_cursor(last_ids: list, limit: int) -> Optional[str]:
+    """Return the cursor for the following page, or None when this page was the last one."""
+    if limit <= 0 or len(last_ids) < limit:
+        return None
+    return encode_cursor(last_ids[-1])
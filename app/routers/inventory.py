@@ -1,28 +1,139 @@
 # app/routers/inventory.py
 # Author: Thanh Trieu
-# Description: Provides endpoints for retrieving inventory information.
+# Description: Provides endpoints for retrieving and adjusting inventory information.
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from .. import crud, schemas, database
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import async_crud, crud, schemas
+from ..conditional import matches, not_modified, row_etag, rows_etag
+from ..async_database import get_async_db
+from ..pagination import NEXT_CURSOR_HEADER, cursor_to_id, encode_cursor, next_cursor
+from ..timing import TimedORJSONResponse, TimedRoute
+from ..utils.batch_utils import check_adjustment_count, parse_id_list, unique_ids
+from ..utils.export_utils import stream_export
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.get("/inventory", response_model=List[schemas.Inventory])
-def read_inventory(skip: int = 0, limit: int = 10, db: Session = Depends(database.get_db)):
+async def read_inventory(
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        if_none_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db)
+):
     """
     Get a list of all inventory items with pagination.
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next page by keyset.
+    Send the page's ETag as `If-None-Match` to get an empty 304 if no stock level on it changed.
     """
-    inventory = crud.get_inventory(db, skip=skip, limit=limit)
-    return inventory
+    inventory = await async_crud.get_inventory(db, skip=skip, limit=limit, after_id=cursor_to_id(cursor))
+    token = next_cursor([item["product_id"] for item in inventory], limit)
+    headers = {NEXT_CURSOR_HEADER: token} if token else {}
+    etag = rows_etag(inventory, token)
+    if matches(if_none_match, etag):
+        return not_modified(etag, headers)
+    # Rows are already in the response_model's shape; skip per-row validation and encode with orjson
+    return TimedORJSONResponse(inventory, headers={**headers, "ETag": etag})
+
+@router.patch("/inventory", response_model=schemas.StockAdjustmentReport)
+async def adjust_inventory(batch: schemas.StockAdjustmentBatch, db: AsyncSession = Depends(get_async_db)):
+    """
+    Adjust the stock of many products in one transaction, e.g. for a warehouse receipt or a cycle count.
+    Each line sets either a `delta` or an `absolute` level; lines for the same product apply in order.
+    Lines that would take stock below zero are rejected unless `allow_negative` is set, and the
+    response reports the outcome and resulting stock of every line.
+    """
+    check_adjustment_count(len(batch.adjustments))
+    report = await async_crud.adjust_stock(db, batch.adjustments, allow_negative=batch.allow_negative)
+    return TimedORJSONResponse(report)
+
+@router.get("/inventory/low-stock", response_model=List[schemas.LowStockItem])
+async def read_low_stock(
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the products whose available stock is at or below their reorder threshold, by product ID.
+    Served from the watchlist kept current by orders and product updates, not a scan of every product.
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next page.
+    """
+    items = await async_crud.get_low_stock(db, limit=limit, after_id=cursor_to_id(cursor))
+    token = next_cursor([item["product_id"] for item in items], limit)
+    return TimedORJSONResponse(items, headers={NEXT_CURSOR_HEADER: token} if token else None)
+
+@router.get("/inventory/low-stock/events", response_model=List[schemas.LowStockEvent])
+async def read_low_stock_events(
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the threshold crossings recorded since `cursor`, oldest first: "low" when a product falls to its
+    reorder threshold, "cleared" when it is restocked above it or deleted. Unlike the other lists, every
+    non-empty page sets X-Next-Cursor; keep the last one and poll with it to read only new events.
+    """
+    events = await async_crud.get_low_stock_events(db, after_id=cursor_to_id(cursor), limit=limit)
+    headers = {NEXT_CURSOR_HEADER: encode_cursor(events[-1]["id"])} if events else None
+    return TimedORJSONResponse(events, headers=headers)
+
+@router.get("/inventory/export")
+def export_inventory(export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$")):
+    """
+    Stream the stock level of every product as NDJSON or CSV.
+    """
+    return stream_export(crud.iter_inventory, crud.INVENTORY_EXPORT_COLUMNS, export_format, "inventory")
+
+async def _inventory_batch(db: AsyncSession, ids: List[int]):
+    items, missing = await async_crud.get_inventory_by_ids(db, unique_ids(ids))
+    return TimedORJSONResponse({"items": items, "missing": missing})
+
+@router.get("/inventory/batch", response_model=schemas.InventoryBatch)
+async def read_inventory_batch(ids: str = Query(..., description="Comma-separated product IDs, e.g. 1,2,3"),
+                               db: AsyncSession = Depends(get_async_db)):
+    """
+    Get the stock level of several products in one query, in the requested order.
+    IDs with no product are listed under `missing`.
+    """
+    return await _inventory_batch(db, parse_id_list(ids))
+
+@router.post("/inventory/batch", response_model=schemas.InventoryBatch)
+async def read_inventory_batch_post(lookup: schemas.BatchLookup, db: AsyncSession = Depends(get_async_db)):
+    """
+    Same as GET /inventory/batch, with the IDs in the request body for lists too long for a URL.
+    """
+    return await _inventory_batch(db, lookup.ids)
 
 @router.get("/inventory/{product_id}", response_model=schemas.Inventory)
-def read_inventory_product(product_id: int, db: Session = Depends(database.get_db)):
+async def read_inventory_product(
+        product_id: int,
+        response: Response,
+        if_none_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db)
+):
     """
     Get inventory information for a specific product by ID.
+    Send the ETag of a previous response as `If-None-Match` to get an empty 304 if the stock is unchanged.
     """
-    inventory = crud.get_inventory_product(db, product_id=product_id)
+    inventory = await async_crud.get_inventory_product(db, product_id=product_id)
     if inventory is None:
         raise HTTPException(status_code=404, detail="Product not found")
+    etag = row_etag(inventory)
+    if matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return inventory
+
+@router.put("/inventory/{product_id}/shards", response_model=schemas.StockShards)
+async def update_stock_shards(product_id: int, config: schemas.StockShardsUpdate,
+                              db: AsyncSession = Depends(get_async_db)):
+    """
+    Split a hot product's stock across several counter rows so concurrent orders stop
+    queueing on one row lock. Set shards to 0 to move the stock back into a single row.
+    """
+    result = await async_crud.set_stock_shards(db, product_id=product_id, shards=config.shards)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return result
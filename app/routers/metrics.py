@@ -0,0 +1,31 @@
+# app/routers/metrics.py
+# Author: Thanh Trieu
+# Description: Provides an endpoint exposing in-process runtime counters.
+
+from fastapi import APIRouter
+
+from ..async_database import async_pool_metrics
+from ..cache import product_cache
+from ..database import pool_metrics
+from ..dynamodb import api_call_log_buffer
+from ..timing import TimedRoute
+from ..utils import image_utils
+from ..utils.s3_utils import presigned_url_cache
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/metrics")
+def read_metrics():
+    """
+    Get in-process counters for the API call log pipeline, the caches, the image variant pipeline and the database pools.
+    """
+    return {
+        "api_log": api_call_log_buffer.stats(),
+        "presigned_urls": presigned_url_cache.stats(),
+        "product_cache": product_cache.stats(),
+        "image_variants": image_utils.stats(),
+        "db_pool": {
+            "sync": pool_metrics.snapshot(),
+            "async": async_pool_metrics.snapshot(),
+        },
+    }
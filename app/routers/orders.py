@@ -1,20 +1,79 @@
 # app/routers/orders.py
 # Author: Thanh Trieu
-# Description: Provides endpoints for creating orders.
+# Description: Provides endpoints for creating and reading orders.
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from .. import crud, schemas, database
+from .. import async_crud, crud, idempotency, schemas
+from ..async_database import get_async_db
+from ..pagination import NEXT_CURSOR_HEADER, cursor_to_id, next_cursor
+from ..timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+# Response header set when the body is the stored result of an earlier request with the same key
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
 
 @router.post("/orders/", response_model=schemas.Order)
-def create_order(order: schemas.OrderCreate, db: Session = Depends(database.get_db)):
+async def create_order(
+        order: schemas.OrderCreate,
+        response: Response,
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+        db: AsyncSession = Depends(get_async_db)
+):
     """
     Create a new order with the provided details.
+    Send an `Idempotency-Key` header to make retries safe: a repeated request with the same key and
+    body returns the original order (with `Idempotent-Replayed: true`) instead of placing another one.
     """
-    db_order = crud.create_order(db=db, order=order)
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= idempotency.IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key must be 1 to "
+                                                    f"{idempotency.IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+    try:
+        if idempotency_key is None:
+            db_order = await async_crud.create_order(db=db, order=order)
+        else:
+            db_order, replayed = await async_crud.create_order_once(
+                db, order, idempotency_key, idempotency.request_hash(order)
+            )
+            if replayed:
+                response.headers[IDEMPOTENT_REPLAYED_HEADER] = "true"
+    except crud.InsufficientStockError as e:
+        raise HTTPException(status_code=400, detail={"message": str(e), "shortages": e.shortages})
+    except idempotency.IdempotencyKeyMismatch as e:
+        raise HTTPException(status_code=422, detail=str(e))
     if not db_order:
         raise HTTPException(status_code=400, detail="Order could not be created")
     return db_order
+
+@router.get("/orders/", response_model=List[schemas.Order])
+async def read_orders(
+        response: Response,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        product_id: Optional[int] = None,
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a list of orders with their items, optionally only orders containing `product_id`.
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next page by keyset.
+    """
+    orders = await async_crud.get_orders(db, skip=skip, limit=limit, after_id=cursor_to_id(cursor),
+                                         product_id=product_id)
+    token = next_cursor([order.id for order in orders], limit)
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
+    return orders
+
+@router.get("/orders/{order_id}", response_model=schemas.Order)
+async def read_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get an order and its items by ID.
+    """
+    db_order = await async_crud.get_order(db, order_id=order_id)
+    if db_order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return db_order
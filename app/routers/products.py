@@ -2,14 +2,23 @@
 # Author: Thanh Trieu
 # Description: Provides CRUD operations for products, including image upload and URL generation.
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Response, UploadFile, File, Form, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from .. import crud, schemas, database
-from ..utils.s3_utils import upload_file_to_s3, generate_presigned_url
+from .. import async_crud, crud, schemas, database
+from ..conditional import expected_version, matches, not_modified, row_etag, rows_etag
+from ..async_database import get_async_db
+from ..pagination import NEXT_CURSOR_HEADER, cursor_to_id, encode_rank_cursor, next_cursor, rank_cursor_to_position
+from ..timing import TimedORJSONResponse, TimedRoute
+from ..utils.batch_utils import parse_id_list, unique_ids
+from ..utils.export_utils import stream_export
+from ..utils.image_utils import schedule_image_variants
+from ..utils.import_utils import DEFAULT_IMPORT_CHUNK_SIZE, detect_import_format, import_products, iter_records
+from ..utils.s3_utils import upload_file_to_s3_async, generate_presigned_urls, object_key_from_url
 import uuid
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 def get_db():
     """Dependency to get the database session."""
@@ -19,93 +28,218 @@ def get_db():
     finally:
         db.close()
 
+def presign_images(products: List[dict]):
+    """Swap the stored S3 URLs of product rows and their image variants for presigned URLs, signing each key once."""
+    keys = [object_key_from_url(url) for product in products
+            for url in [product["image_url"], *(product["image_variants"] or {}).values()] if url]
+    urls = generate_presigned_urls(keys)
+    for product in products:
+        if product["image_url"]:
+            product["image_url"] = urls[object_key_from_url(product["image_url"])]
+        if product["image_variants"]:
+            product["image_variants"] = {name: urls[object_key_from_url(url)]
+                                         for name, url in product["image_variants"].items()}
+
 @router.post("/products/", response_model=schemas.Product)
 async def create_product(
+        background_tasks: BackgroundTasks,
         name: str = Form(...),
         description: str = Form(...),
         price: float = Form(...),
         stock: int = Form(...),
+        reorder_threshold: Optional[int] = Form(None, ge=0),
         file: Optional[UploadFile] = File(None),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Create a new product. Optionally upload an image to S3.
+    Create a new product. Optionally upload an image to S3; resized variants are generated after the response.
     """
     product_data = {
         "name": name,
         "description": description,
         "price": price,
-        "stock": stock
+        "stock": stock,
+        "reorder_threshold": reorder_threshold
     }
     product_schema = schemas.ProductCreate(**product_data)
 
     file_url = None
     if file:
         filename = f"products/{str(uuid.uuid4())}_{file.filename}"
-        file_url = upload_file_to_s3(file, filename)
+        file_url = await upload_file_to_s3_async(file, filename)
 
-    return crud.create_product(db=db, product=product_schema, image_url=file_url)
+    db_product = await async_crud.create_product(db=db, product=product_schema, image_url=file_url)
+    if file_url:
+        schedule_image_variants(background_tasks, db_product.id, file_url)
+    return db_product
+
+@router.post("/products/bulk", response_model=schemas.BulkImportReport)
+def bulk_import_products(
+        file: UploadFile = File(...),
+        import_format: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+        upsert_on: Optional[str] = Query(None, pattern="^name$"),
+        chunk_size: int = Query(DEFAULT_IMPORT_CHUNK_SIZE, ge=1, le=50000),
+        db: Session = Depends(get_db)
+):
+    """
+    Import products from a CSV or NDJSON upload, validating and writing them in chunks.
+    With upsert_on=name, rows matching an existing product name update that product. A name repeated
+    within one chunk keeps its last row; the rows dropped that way are counted under `merged`.
+    """
+    import_format = import_format or detect_import_format(file.filename, file.content_type)
+    try:
+        records = iter_records(file.file, import_format)
+        return import_products(db, records, upsert_key=upsert_on, chunk_size=chunk_size)
+    finally:
+        file.file.close()
 
 @router.post("/products/{product_id}/upload-image/")
 async def upload_product_image(
         product_id: int,
+        background_tasks: BackgroundTasks,
         file: UploadFile = File(...),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Upload an image for a specific product.
+    Upload an image for a specific product. Resized variants are generated after the response.
     """
-    db_product = crud.get_product(db, product_id=product_id)
+    db_product = await async_crud.get_product(db, product_id=product_id)
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
 
     filename = f"products/{product_id}/{file.filename}"
     try:
-        file_url = upload_file_to_s3(file, filename)
-        db_product.image_url = file_url
-        db.commit()
-        db.refresh(db_product)
+        file_url = await upload_file_to_s3_async(file, filename)
+        await async_crud.set_product_image(db, product_id=product_id, image_url=file_url)
+        schedule_image_variants(background_tasks, product_id, file_url)
         return {"file_url": file_url}
     except HTTPException as e:
         raise e
 
+@router.get("/products/export")
+def export_products(export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$")):
+    """
+    Stream the full catalog as NDJSON or CSV. Image URLs are the stored S3 URLs, not presigned links.
+    """
+    return stream_export(crud.iter_products, crud.PRODUCT_EXPORT_COLUMNS, export_format, "products")
+
+async def _product_batch(db: AsyncSession, ids: List[int]):
+    products, missing = await async_crud.get_product_rows_by_ids(db, unique_ids(ids))
+    presign_images(products)
+    return TimedORJSONResponse({"items": products, "missing": missing})
+
+@router.get("/products/batch", response_model=schemas.ProductBatch)
+async def read_products_batch(ids: str = Query(..., description="Comma-separated product IDs, e.g. 1,2,3"),
+                              db: AsyncSession = Depends(get_async_db)):
+    """
+    Get several products by ID in one query, in the requested order. IDs with no product are
+    listed under `missing`. Image URLs are presigned for the whole batch at once.
+    """
+    return await _product_batch(db, parse_id_list(ids))
+
+@router.post("/products/batch", response_model=schemas.ProductBatch)
+async def read_products_batch_post(lookup: schemas.BatchLookup, db: AsyncSession = Depends(get_async_db)):
+    """
+    Same as GET /products/batch, with the IDs in the request body for lists too long for a URL.
+    """
+    return await _product_batch(db, lookup.ids)
+
+@router.get("/products/search", response_model=List[schemas.Product])
+async def search_products(
+        q: str = Query(..., min_length=1, max_length=100),
+        limit: int = Query(10, ge=1, le=100),
+        cursor: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Search products by name and description. Exact name matches come first, then names starting
+    with `q`, names with words starting with every word of `q`, names containing `q` (3+ characters),
+    and finally descriptions. Pass the X-Next-Cursor header of a page as `cursor` to fetch the next page.
+    """
+    products, position = await async_crud.search_product_rows(db, q, limit=limit,
+                                                              after=rank_cursor_to_position(cursor))
+    presign_images(products)
+    headers = {NEXT_CURSOR_HEADER: encode_rank_cursor(*position)} if position else None
+    return TimedORJSONResponse(products, headers=headers)
+
 @router.get("/products/{product_id}", response_model=schemas.Product)
-def read_product(product_id: int, db: Session = Depends(get_db)):
+async def read_product(
+        product_id: int,
+        response: Response,
+        if_none_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db)
+):
     """
-    Get details of a specific product by ID, including a pre-signed URL for the image.
+    Get details of a specific product by ID, including pre-signed URLs for the image and its variants.
+    Send the ETag of a previous response as `If-None-Match` to get an empty 304 if nothing changed.
     """
-    db_product = crud.get_product(db, product_id=product_id)
-    if db_product is None:
+    product = await async_crud.get_product_row(db, product_id=product_id)
+    if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    if db_product.image_url:
-        filename = db_product.image_url.split('/')[-1]
-        db_product.image_url = generate_presigned_url(filename)
-
-    return db_product
+    presign_images([product])
+    etag = row_etag(product)
+    if matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return product
 
 @router.get("/products/", response_model=List[schemas.Product])
-def read_products(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+async def read_products(
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        if_none_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db)
+):
     """
     Get a list of all products with pagination.
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next page by keyset.
+    Grids should render `image_variants.thumbnail` rather than the full-size `image_url`.
+    Send the page's ETag as `If-None-Match` to get an empty 304 if none of its products changed.
     """
-    products = crud.get_products(db, skip=skip, limit=limit)
-    for product in products:
-        if product.image_url:
-            filename = product.image_url.split('/')[-1]
-            product.image_url = generate_presigned_url(filename)
-    return products
+    products = await async_crud.get_product_rows(db, skip=skip, limit=limit, after_id=cursor_to_id(cursor))
+    token = next_cursor([product["id"] for product in products], limit)
+    presign_images(products)
+    headers = {NEXT_CURSOR_HEADER: token} if token else {}
+    etag = rows_etag(products, token)
+    if matches(if_none_match, etag):
+        return not_modified(etag, headers)
+    # Rows come straight from the database in the response_model's shape, so skip
+    # per-row validation and encode with orjson; the declared response_model still documents the schema
+    return TimedORJSONResponse(products, headers={**headers, "ETag": etag})
 
 @router.put("/products/{product_id}", response_model=schemas.Product)
-def update_product(product_id: int, product: schemas.ProductUpdate, db: Session = Depends(get_db)):
+async def update_product(
+        product_id: int,
+        product: schemas.ProductUpdate,
+        if_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db)
+):
     """
     Update an existing product by ID.
+    Send the ETag from GET /products/{product_id} as `If-Match` to refuse the update with 412 if
+    the product has changed since; the update is also refused if another write lands while it runs.
+    A missing product answers 404, or 412 when any `If-Match` was sent.
     """
-    return crud.update_product(db, product_id=product_id, product=product)
+    try:
+        db_product = await async_crud.update_product(db, product_id=product_id, product=product,
+                                                     expected=expected_version(if_match, product_id))
+    except crud.StaleProductError as e:
+        raise HTTPException(status_code=412, detail=f"Precondition failed: {e}")
+    if db_product is None:
+        # Even If-Match: * fails when there is no current representation to match
+        if if_match is not None:
+            raise HTTPException(status_code=412, detail="Precondition failed: the product does not exist")
+        raise HTTPException(status_code=404, detail="Product not found")
+    return db_product
 
 @router.delete("/products/{product_id}", response_model=schemas.Product)
-def delete_product(product_id: int, db: Session = Depends(get_db)):
+async def delete_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Delete a product by ID.
     """
-    return crud.delete_product(db, product_id=product_id)
+    db_product = await async_crud.delete_product(db, product_id=product_id)
+    if db_product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return db_product
@@ -0,0 +1,37 @@
+# app/routers/reports.py
+# Author: Thanh Trieu
+# Description: Provides sales report endpoints, served from the incrementally maintained sales summaries.
+
+from datetime import date, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import async_crud, models, schemas
+from ..async_database import get_async_db
+from ..timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+# Days covered by the revenue report when no start date is given
+DEFAULT_REVENUE_DAYS = 30
+
+@router.get("/reports/top-products", response_model=List[schemas.ProductSales])
+async def read_top_products(limit: int = Query(10, ge=1, le=100), db: AsyncSession = Depends(get_async_db)):
+    """
+    Get the best-selling products by units sold.
+    """
+    return await async_crud.get_top_products(db, limit=limit)
+
+@router.get("/reports/revenue", response_model=List[schemas.DailyRevenue])
+async def read_revenue(start: Optional[date] = None, end: Optional[date] = None,
+                       db: AsyncSession = Depends(get_async_db)):
+    """
+    Get orders, units sold and revenue per UTC day from `start` to `end` inclusive
+    (default: the last 30 days). Days without orders are omitted.
+    """
+    end = end or models.utcnow().date()
+    start = start or end - timedelta(days=DEFAULT_REVENUE_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return await async_crud.get_daily_revenue(db, start=start, end=end)
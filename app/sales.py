@@ -0,0 +1,170 @@
+# app/sales.py
+# Author: Thanh Trieu
+# Description: Sales summaries (units per product, orders and revenue per day) maintained incrementally with
+#              every order, plus a chunked rebuild from order history swapped in atomically (python -m app.sales).
+
+import argparse
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List
+from sqlalchemy import Column, MetaData, Table, delete, func, select, update, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Orders read per chunk when rebuilding the summaries
+SALES_BACKFILL_CHUNK_SIZE = 10000
+
+# Dialects whose INSERT supports ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def _add_to(db: Session, table: Table, key: str, rows: List[dict]):
+    """Add each row's counters onto the summary row with the same key, creating missing rows."""
+    if not rows:
+        return
+    counters = [column for column in rows[0] if column != key]
+    dialect_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        statement = dialect_insert(table).values(rows)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[key],
+            set_={column: table.c[column] + statement.excluded[column] for column in counters}
+        ))
+        return
+    for row in rows:
+        result = db.execute(
+            update(table).where(table.c[key] == row[key])
+            .values({column: table.c[column] + row[column] for column in counters})
+        )
+        if result.rowcount == 0:
+            db.execute(insert(table).values(row))
+
+def record_order(db: Session, order: models.Order, quantities: Dict[int, int]):
+    """
+    Add one order to the summaries inside the caller's transaction, so they commit or roll back with it.
+    Product rows are written in product id order, like the stock rows, so concurrent orders never deadlock.
+    """
+    _add_to(db, models.ProductSales.__table__, "product_id", [
+        {"product_id": product_id, "units_sold": quantities[product_id], "order_count": 1}
+        for product_id in sorted(quantities)
+    ])
+    _add_to(db, models.DailySales.__table__, "day", [{
+        "day": order.created_at.date(),
+        "order_count": 1,
+        "units_sold": sum(quantities.values()),
+        "revenue": order.total_amount or 0.0,
+    }])
+
+def top_products(db: Session, limit: int = 10) -> List[dict]:
+    """Return the best-selling products by units sold, read from the summaries only."""
+    rows = db.execute(
+        select(models.ProductSales.product_id, models.ProductSales.units_sold, models.ProductSales.order_count)
+        .order_by(models.ProductSales.units_sold.desc(), models.ProductSales.product_id)
+        .limit(limit)
+    )
+    return [row._asdict() for row in rows]
+
+def daily_revenue(db: Session, start: date, end: date) -> List[dict]:
+    """Return orders, units and revenue per day from start to end inclusive; days without orders are omitted."""
+    rows = db.execute(
+        select(models.DailySales.day, models.DailySales.order_count, models.DailySales.units_sold,
+               models.DailySales.revenue)
+        .where(models.DailySales.day >= start, models.DailySales.day <= end)
+        .order_by(models.DailySales.day)
+    )
+    return [row._asdict() for row in rows]
+
+def _staging_table(model) -> Table:
+    """A bare copy of a summary table (columns and primary key, no indexes) to rebuild into."""
+    return Table(f"{model.__tablename__}_rebuild", MetaData(),
+                 *[Column(column.name, column.type, primary_key=column.primary_key)
+                   for column in model.__table__.columns])
+
+def _summarize_orders(db: Session, first: int, last: int):
+    """Return the (product rows, day rows) totals of the orders with ids from first to last."""
+    products = {}
+    for product_id, units, count in db.execute(
+            select(models.OrderItem.product_id, func.sum(models.OrderItem.quantity),
+                   func.count(func.distinct(models.OrderItem.order_id)))
+            .where(models.OrderItem.order_id.between(first, last))
+            .group_by(models.OrderItem.product_id)
+    ):
+        products[product_id] = {"units_sold": units or 0, "order_count": count}
+
+    days = defaultdict(lambda: {"order_count": 0, "units_sold": 0, "revenue": 0.0})
+    units_per_order = (
+        select(models.OrderItem.order_id, func.sum(models.OrderItem.quantity).label("units"))
+        .where(models.OrderItem.order_id.between(first, last))
+        .group_by(models.OrderItem.order_id)
+        .subquery()
+    )
+    for created_at, total_amount, units in db.execute(
+            select(models.Order.created_at, models.Order.total_amount, units_per_order.c.units)
+            .outerjoin(units_per_order, units_per_order.c.order_id == models.Order.id)
+            .where(models.Order.id.between(first, last), models.Order.created_at.is_not(None))
+    ):
+        day = days[created_at.date()]
+        day["order_count"] += 1
+        day["units_sold"] += units or 0
+        day["revenue"] += total_amount or 0.0
+    return ([dict(totals, product_id=product_id) for product_id, totals in sorted(products.items())],
+            [dict(totals, day=day) for day, totals in sorted(days.items())])
+
+def rebuild_summaries(db: Session, chunk_size: int = SALES_BACKFILL_CHUNK_SIZE) -> dict:
+    """
+    Recompute the summaries from orders and order_items. The totals are built into staging tables one
+    chunk of orders per commit, then swapped into the live tables in a single short transaction that
+    also adds the orders placed since the rebuild started, so reports never see a half-built state.
+    Orders without created_at count towards product totals but no day.
+    """
+    staging = {models.ProductSales: _staging_table(models.ProductSales),
+               models.DailySales: _staging_table(models.DailySales)}
+    connection = db.connection()
+    for table in staging.values():
+        table.drop(connection, checkfirst=True)
+        table.create(connection)
+    last_id = db.scalar(select(func.max(models.Order.id))) or 0
+    db.commit()
+
+    chunks = 0
+    for start in range(0, last_id, chunk_size):
+        products, days = _summarize_orders(db, start + 1, min(start + chunk_size, last_id))
+        _add_to(db, staging[models.ProductSales], "product_id", products)
+        _add_to(db, staging[models.DailySales], "day", days)
+        db.commit()
+        chunks += 1
+
+    try:
+        for model, table in staging.items():
+            live = model.__table__
+            db.execute(delete(live))
+            columns = [column.name for column in live.columns]
+            db.execute(insert(live).from_select(columns, select(*[table.c[name] for name in columns])))
+        # Orders placed while the chunks were built went into the live tables just cleared; count them again
+        newest_id = db.scalar(select(func.max(models.Order.id))) or 0
+        if newest_id > last_id:
+            products, days = _summarize_orders(db, last_id + 1, newest_id)
+            _add_to(db, models.ProductSales.__table__, "product_id", products)
+            _add_to(db, models.DailySales.__table__, "day", days)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        connection = db.connection()
+        for table in staging.values():
+            table.drop(connection, checkfirst=True)
+        db.commit()
+    orders = db.scalar(select(func.count()).select_from(models.Order).where(models.Order.id <= newest_id))
+    return {"orders": orders, "chunks": chunks}
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild the sales summaries from order history")
+    parser.add_argument("--chunk-size", type=int, default=SALES_BACKFILL_CHUNK_SIZE)
+    args = parser.parse_args()
+    with SessionLocal() as session:
+        result = rebuild_summaries(session, chunk_size=args.chunk_size)
+    print(f"Rebuilt sales summaries from {result['orders']} orders in {result['chunks']} chunks.")
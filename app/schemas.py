@@ -2,14 +2,17 @@
 # Author: Thanh Trieu
 # Description: Defines Pydantic schemas for data validation and serialization, including Product, Order, and OrderItem.
 
-from typing import List, Optional
-from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from pydantic import AliasChoices, BaseModel, Field, model_validator
 
 class ProductBase(BaseModel):
     name: str
     description: str
     price: float
     stock: int
+    # Available stock at or below which the product is listed by GET /inventory/low-stock; None opts out
+    reorder_threshold: Optional[int] = Field(None, ge=0)
 
 class ProductCreate(ProductBase):
     pass
@@ -19,24 +22,109 @@ class ProductUpdate(ProductBase):
 
 class Product(ProductBase):
     id: int
+    # Products with sharded stock report the sum of their shards
+    stock: int = Field(validation_alias=AliasChoices("available_stock", "stock"))
     image_url: Optional[str] = None  # Make image_url optional
+    # Presigned URLs of the resized copies of the image (thumbnail, medium, webp) once generated
+    image_variants: Optional[Dict[str, str]] = None
+    version: int = 1  # Bumped by every change to the product
 
     class Config:
         orm_mode = True
 
+class BatchLookup(BaseModel):
+    ids: List[int]
+
+class ProductBatch(BaseModel):
+    items: List[Product]
+    missing: List[int]  # Requested ids with no product
+
+class BulkImportError(BaseModel):
+    line: Optional[int] = None  # None for errors that affect a whole chunk
+    error: str
+
+class BulkImportChunkReport(BaseModel):
+    chunk: int
+    first_line: int
+    last_line: int
+    inserted: int
+    updated: int
+    merged: int = 0  # Rows dropped because a later row in the chunk had the same upsert key
+    errors: List[BulkImportError]
+
+class BulkImportReport(BaseModel):
+    inserted: int
+    updated: int
+    merged: int = 0  # Rows dropped because a later row in the same chunk had the same upsert key
+    failed: int
+    chunks: List[BulkImportChunkReport]
+
 class Inventory(BaseModel):
     product_id: int
     stock: int
+    version: int = 1
 
     class Config:
         orm_mode = True
 
+class InventoryBatch(BaseModel):
+    items: List[Inventory]
+    missing: List[int]  # Requested ids with no product
+
+class StockShardsUpdate(BaseModel):
+    shards: int = Field(ge=0, le=64)  # 0 keeps stock in a single row
+
+class StockShards(Inventory):
+    shards: int
+
+class StockAdjustment(BaseModel):
+    product_id: int
+    delta: Optional[int] = None  # Added to the current stock, e.g. +120 for a receipt
+    absolute: Optional[int] = Field(None, ge=0)  # Replaces the current stock, e.g. after a cycle count
+
+    @model_validator(mode="after")
+    def one_of_delta_or_absolute(self):
+        if (self.delta is None) == (self.absolute is None):
+            raise ValueError("exactly one of delta or absolute is required")
+        return self
+
+class StockAdjustmentBatch(BaseModel):
+    adjustments: List[StockAdjustment]
+    # By default a line that would take stock below zero is rejected; set to allow it
+    allow_negative: bool = False
+
+class StockAdjustmentResult(BaseModel):
+    product_id: int
+    status: str  # "applied", "rejected" (would go below zero) or "not_found"
+    stock: Optional[int] = None  # Stock after the line, or unchanged stock when rejected
+
+class StockAdjustmentReport(BaseModel):
+    applied: int
+    rejected: int
+    not_found: int
+    results: List[StockAdjustmentResult]  # One per adjustment, in request order
+
+class LowStockItem(BaseModel):
+    product_id: int
+    stock: int
+    reorder_threshold: int
+    since: datetime  # UTC time the product went low
+
+class LowStockEvent(BaseModel):
+    id: int  # Pass the last id seen as the cursor to read only newer events
+    product_id: int
+    event: str  # "low" when the product fell to its threshold, "cleared" when it left the watchlist
+    stock: Optional[int] = None  # None when the product was deleted
+    reorder_threshold: Optional[int] = None
+    created_at: datetime
+
 class OrderItemBase(BaseModel):
     product_id: int
     quantity: int
 
 class OrderItemCreate(OrderItemBase):
-    pass
+    # A zero or negative line would pass the stock check and add stock instead of taking it
+    quantity: int = Field(gt=0)
 
 class OrderItem(OrderItemBase):
     id: int
@@ -49,11 +137,23 @@ class OrderBase(BaseModel):
     total_amount: float
 
 class OrderCreate(OrderBase):
-    items: List[OrderItemCreate]
+    items: List[OrderItemCreate] = Field(min_length=1)
 
 class Order(OrderBase):
     id: int
+    created_at: Optional[datetime] = None
     items: List[OrderItem]
 
     class Config:
         orm_mode = True
+
+class ProductSales(BaseModel):
+    product_id: int
+    units_sold: int
+    order_count: int
+
+class DailyRevenue(BaseModel):
+    day: date
+    order_count: int
+    units_sold: int
+    revenue: float
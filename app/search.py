@@ -0,0 +1,314 @@
+# app/search.py
+# Author: Thanh Trieu
+# Description: Ranked product search over name and description, on PostgreSQL full-text and trigram indexes
+#              or, on other databases, an in-process inverted index kept up to date by the CRUD functions.
+
+import bisect
+import heapq
+import re
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import case, func, literal_column, or_, select, text, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Match ranks, best first. Results are ordered by (rank, id) on every backend.
+RANK_EXACT = 0        # name equals the query
+RANK_NAME_PREFIX = 1  # name starts with the query
+RANK_NAME_WORDS = 2   # every query word starts a word of the name
+RANK_NAME_SUBSTRING = 3  # name contains the query (queries of MIN_SUBSTRING_LENGTH characters or more)
+RANK_DESCRIPTION = 4  # every query word starts a word of the name or description
+
+# Substring matching is served by trigrams, so shorter queries only match whole-word prefixes
+MIN_SUBSTRING_LENGTH = 3
+
+_WORD = re.compile(r"\w+")
+
+def query_words(query: str) -> List[str]:
+    """Split a query or a text into lower-case words."""
+    return _WORD.findall(query.lower())
+
+def _trigrams(value: str) -> Set[str]:
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+class _Postings:
+    """Word -> product ids, with a sorted vocabulary for prefix lookups."""
+
+    def __init__(self):
+        self.ids: Dict[str, Set[int]] = {}
+        self.vocabulary: List[str] = []
+
+    def add(self, word: str, product_id: int):
+        ids = self.ids.get(word)
+        if ids is None:
+            ids = self.ids[word] = set()
+            bisect.insort(self.vocabulary, word)
+        ids.add(product_id)
+
+    def discard(self, word: str, product_id: int):
+        ids = self.ids[word]
+        ids.discard(product_id)
+        if not ids:
+            del self.ids[word]
+            del self.vocabulary[bisect.bisect_left(self.vocabulary, word)]
+
+    def prefix(self, word: str) -> Set[int]:
+        """Return the ids of every product with a word starting with word."""
+        matches = set()
+        position = bisect.bisect_left(self.vocabulary, word)
+        while position < len(self.vocabulary) and self.vocabulary[position].startswith(word):
+            matches |= self.ids[self.vocabulary[position]]
+            position += 1
+        return matches
+
+def _every_word(postings: List[_Postings], words: List[str]) -> Set[int]:
+    """Ids of products where every word starts a word in one of postings."""
+    matches = None
+    for word in words:
+        found = set().union(*(index.prefix(word) for index in postings))
+        matches = found if matches is None else matches & found
+        if not matches:
+            break
+    return matches or set()
+
+class ProductSearchIndex:
+    """
+    In-process inverted index over product names and descriptions, used when the database has no
+    full-text search. It loads every product on first use, then the CRUD functions keep it current
+    with add/remove; writes made by other processes are only seen after reset(). A sorted name list
+    answers name prefixes, word postings answer word prefixes, and name trigrams answer substrings.
+    Each rank is computed with set operations only when the page still has room.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Bumped by reset(), so a load that started before it never installs what it read
+        self._generation = 0
+        # Loads in progress, and the add/remove calls made meanwhile, replayed onto each load before it is swapped in
+        self._loading = 0
+        self._pending: List[Tuple[int, Optional[str], Optional[str]]] = []
+        self._clear()
+
+    def _clear(self):
+        self.loaded = False
+        # product id -> (lower-case name, description); words are re-derived on removal rather than stored
+        self._documents: Dict[int, Tuple[str, str]] = {}
+        self._sorted_names: List[Tuple[str, int]] = []
+        self._name_words = _Postings()
+        self._description_words = _Postings()
+        self._trigrams: Dict[str, Set[int]] = {}
+
+    def reset(self):
+        """Forget everything; the next search reloads from the database."""
+        with self._lock:
+            self._clear()
+            self._generation += 1
+            self._pending = []
+
+    def ensure_loaded(self, db: Session, batch_size: int = 10000):
+        """
+        Build the index from the products table unless it is already built. The rows are read into a
+        separate index with no lock held, since under AsyncSession.run_sync every fetch yields to the
+        event loop, and swapped in at the end; concurrent first searches may each read the table.
+        """
+        if self.loaded:
+            return
+        with self._lock:
+            if self.loaded:
+                return
+            generation = self._generation
+            self._loading += 1
+        try:
+            fresh = ProductSearchIndex()
+            result = db.execute(
+                select(models.Product.id, models.Product.name, models.Product.description)
+                .execution_options(yield_per=batch_size)
+            )
+            for product_id, name, description in result:
+                fresh._add(product_id, name, description, keep_sorted=False)
+            fresh._sorted_names.sort()
+        except Exception:
+            with self._lock:
+                self._finish_load()
+            raise
+        with self._lock:
+            pending = self._finish_load()
+            if self.loaded or generation != self._generation:
+                return
+            # Replaying in call order is idempotent, so changes the read already saw end up the same
+            for product_id, name, description in pending:
+                fresh._remove(product_id)
+                if name is not None:
+                    fresh._add(product_id, name, description)
+            self._documents, self._sorted_names = fresh._documents, fresh._sorted_names
+            self._name_words, self._description_words = fresh._name_words, fresh._description_words
+            self._trigrams = fresh._trigrams
+            self.loaded = True
+
+    def _finish_load(self) -> list:
+        """Leave a load, returning the changes made since it started; called with the lock held."""
+        self._loading -= 1
+        pending = self._pending
+        if not self._loading:
+            self._pending = []
+        return pending
+
+    def add(self, product_id: int, name: str, description: str):
+        """Index a new product, or re-index a changed one. A no-op until the index is loaded."""
+        with self._lock:
+            if self.loaded:
+                self._remove(product_id)
+                self._add(product_id, name, description)
+            elif self._loading:
+                self._pending.append((product_id, name or "", description))
+
+    def remove(self, product_id: int):
+        """Drop a deleted product from the index."""
+        with self._lock:
+            if self.loaded:
+                self._remove(product_id)
+            elif self._loading:
+                self._pending.append((product_id, None, None))
+
+    def _add(self, product_id: int, name: Optional[str], description: Optional[str], keep_sorted: bool = True):
+        name, description = (name or "").lower(), description or ""
+        self._documents[product_id] = (name, description)
+        if keep_sorted:
+            bisect.insort(self._sorted_names, (name, product_id))
+        else:
+            self._sorted_names.append((name, product_id))
+        for word in set(query_words(name)):
+            self._name_words.add(word, product_id)
+        for word in set(query_words(description)):
+            self._description_words.add(word, product_id)
+        for trigram in _trigrams(name):
+            self._trigrams.setdefault(trigram, set()).add(product_id)
+
+    def _remove(self, product_id: int):
+        document = self._documents.pop(product_id, None)
+        if document is None:
+            return
+        name, description = document
+        del self._sorted_names[bisect.bisect_left(self._sorted_names, (name, product_id))]
+        for word in set(query_words(name)):
+            self._name_words.discard(word, product_id)
+        for word in set(query_words(description)):
+            self._description_words.discard(word, product_id)
+        for trigram in _trigrams(name):
+            ids = self._trigrams[trigram]
+            ids.discard(product_id)
+            if not ids:
+                del self._trigrams[trigram]
+
+    def _ranks(self, query: str, words: List[str]):
+        """Yield (rank, candidate ids) best rank first; a product may appear under several ranks."""
+        exact, prefix = set(), set()
+        position = bisect.bisect_left(self._sorted_names, (query,))
+        while position < len(self._sorted_names) and self._sorted_names[position][0].startswith(query):
+            name, product_id = self._sorted_names[position]
+            (exact if name == query else prefix).add(product_id)
+            position += 1
+        yield RANK_EXACT, exact
+        yield RANK_NAME_PREFIX, prefix
+        if words:
+            yield RANK_NAME_WORDS, _every_word([self._name_words], words)
+        if len(query) >= MIN_SUBSTRING_LENGTH:
+            trigrams = sorted((self._trigrams.get(trigram, set()) for trigram in _trigrams(query)), key=len)
+            candidates = trigrams[0].intersection(*trigrams[1:])
+            yield RANK_NAME_SUBSTRING, {product_id for product_id in candidates
+                                        if query in self._documents[product_id][0]}
+        if words:
+            yield RANK_DESCRIPTION, _every_word([self._name_words, self._description_words], words)
+
+    def search(self, query: str, limit: int, after: Tuple[int, int] = None) -> List[Tuple[int, int]]:
+        """Return up to limit (rank, product id) pairs ordered by rank then id, after the given position."""
+        query = query.strip().lower()
+        if not query:
+            return []
+        words = query_words(query)
+        results = []
+        with self._lock:
+            ranked = set()
+            for rank, ids in self._ranks(query, words):
+                ids = ids - ranked
+                ranked |= ids
+                if after is not None and rank < after[0]:
+                    continue
+                if after is not None and rank == after[0]:
+                    ids = [product_id for product_id in ids if product_id > after[1]]
+                results.extend((rank, product_id) for product_id in heapq.nsmallest(limit - len(results), ids))
+                if len(results) >= limit:
+                    break
+        return results
+
+product_search_index = ProductSearchIndex()
+
+def _like_pattern(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _search_document():
+    # Literal constants, not bind parameters, so the expression matches the ix_products_search index
+    return func.to_tsvector(
+        literal_column("'simple'"),
+        func.coalesce(models.Product.name, literal_column("''")).op("||")(literal_column("' '"))
+        .op("||")(func.coalesce(models.Product.description, literal_column("''")))
+    )
+
+def _search_postgres(db: Session, query: str, limit: int, after: Tuple[int, int] = None) -> List[Tuple[int, int]]:
+    query = query.strip()
+    words = query_words(query)
+    name = func.lower(models.Product.name)
+    lowered = query.lower()
+    conditions = []
+    rank_cases = [(name == lowered, RANK_EXACT),
+                  (name.like(_like_pattern(lowered) + "%", escape="\\"), RANK_NAME_PREFIX)]
+    if words:
+        prefix_query = func.to_tsquery(literal_column("'simple'"), " & ".join(f"{word}:*" for word in words))
+        conditions.append(_search_document().op("@@")(prefix_query))
+        name_document = func.to_tsvector(literal_column("'simple'"), func.coalesce(models.Product.name, ""))
+        rank_cases.append((name_document.op("@@")(prefix_query), RANK_NAME_WORDS))
+    if len(lowered) >= MIN_SUBSTRING_LENGTH:
+        # ILIKE on the trigram-indexed name column
+        substring = models.Product.name.ilike("%" + _like_pattern(lowered) + "%", escape="\\")
+        conditions.append(substring)
+        rank_cases.append((substring, RANK_NAME_SUBSTRING))
+    if not conditions:
+        return []
+    rank = case(*rank_cases, else_=RANK_DESCRIPTION)
+    ranked = (
+        select(rank.label("rank"), models.Product.id.label("id"))
+        .where(or_(*conditions))
+        .subquery()
+    )
+    statement = select(ranked.c.rank, ranked.c.id)
+    if after is not None:
+        statement = statement.where(tuple_(ranked.c.rank, ranked.c.id) > tuple_(*after))
+    statement = statement.order_by(ranked.c.rank, ranked.c.id).limit(limit)
+    return [(row.rank, row.id) for row in db.execute(statement)]
+
+def search_products(db: Session, query: str, limit: int = 10, after: Tuple[int, int] = None) -> List[Tuple[int, int]]:
+    """
+    Return up to limit (rank, product id) pairs matching query, best rank first then by id, starting
+    after the given (rank, id) position. Uses the database's indexes on PostgreSQL and the in-process
+    index elsewhere.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return _search_postgres(db, query, limit, after)
+    product_search_index.ensure_loaded(db)
+    return product_search_index.search(query, limit, after)
+
+def create_search_indexes(engine: Engine):
+    """Create the full-text and trigram indexes behind search_products on PostgreSQL; a no-op elsewhere."""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as connection:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_products_search ON products USING gin "
+            "(to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, '')))"
+        ))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)"
+        ))
@@ -0,0 +1,137 @@
+# app/timing.py
+# Author: Thanh Trieu
+# Description: Request-scoped timing breakdown (SQL, AWS, validation, serialization) reported as a Server-Timing header.
+
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+from dotenv import load_dotenv
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Fraction of requests that get a breakdown; lower it in production to keep the overhead negligible
+REQUEST_TIMING_SAMPLE_RATE = float(os.getenv('REQUEST_TIMING_SAMPLE_RATE', '1.0'))
+
+_current: ContextVar[Optional["RequestTimings"]] = ContextVar("request_timings", default=None)
+
+class RequestTimings:
+    """Accumulated duration and call count per component for one request."""
+
+    def __init__(self):
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, count: int = 1):
+        with self._lock:
+            span = self.spans.setdefault(name, [0.0, 0])
+            span[0] += seconds
+            span[1] += count
+
+    def server_timing(self) -> str:
+        """Format the spans as a Server-Timing header value, durations in milliseconds."""
+        with self._lock:
+            metrics = []
+            for name, (seconds, count) in self.spans.items():
+                metric = f"{name};dur={seconds * 1000:.2f}"
+                if count > 1:
+                    metric += f';desc="{count} calls"'
+                metrics.append(metric)
+            return ", ".join(metrics)
+
+def start_request(sample_rate: float = None) -> Optional[RequestTimings]:
+    """Begin collecting timings for the current request if it is sampled; returns None otherwise."""
+    rate = REQUEST_TIMING_SAMPLE_RATE if sample_rate is None else sample_rate
+    timings = RequestTimings() if rate >= 1 or random.random() < rate else None
+    _current.set(timings)
+    return timings
+
+def current() -> Optional[RequestTimings]:
+    """Return the timings of the request being handled, or None outside a sampled request."""
+    return _current.get()
+
+@contextmanager
+def timed(name: str):
+    """Add the duration of the block to the current request's span `name`."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+def timed_call(name: str):
+    """Decorator adding each call of a synchronous function to the current request's span `name`."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._request_timing_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _current.get()
+    start = getattr(context, "_request_timing_start", None)
+    if timings is not None and start is not None:
+        timings.add("db", time.perf_counter() - start)
+
+def instrument_engine(engine):
+    """Count statements and database time of a (sync) engine against the current request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+class _TimedResponseField:
+    """Wraps a route's response field so response validation and serialization are timed."""
+
+    def __init__(self, field):
+        self._field = field
+
+    def __getattr__(self, name):
+        return getattr(self._field, name)
+
+    def validate(self, *args, **kwargs):
+        with timed("validate"):
+            return self._field.validate(*args, **kwargs)
+
+    def serialize(self, *args, **kwargs):
+        with timed("serialize"):
+            return self._field.serialize(*args, **kwargs)
+
+class TimedRoute(APIRoute):
+    """APIRoute that reports response validation and serialization time to the current request."""
+
+    def get_route_handler(self):
+        if self.secure_cloned_response_field is not None and not isinstance(self.secure_cloned_response_field,
+                                                                            _TimedResponseField):
+            self.secure_cloned_response_field = _TimedResponseField(self.secure_cloned_response_field)
+        return super().get_route_handler()
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that reports the time spent encoding the body."""
+
+    def render(self, content) -> bytes:
+        with timed("render"):
+            return super().render(content)
+
+class TimedORJSONResponse(ORJSONResponse):
+    """ORJSONResponse that reports the time spent encoding the body."""
+
+    def render(self, content) -> bytes:
+        with timed("render"):
+            return super().render(content)
@@ -1,5 +1,9 @@
 # aws_utils.py
-import boto3
+from ..bootstrap import lazy_resource
 
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-table = dynamodb.Table('APICallTracking')
+@lazy_resource("api_call_tracking_table")
+def get_table():
+    """Return the APICallTracking DynamoDB table, creating the resource on first use."""
+    import boto3  # Deferred: importing boto3 alone costs ~200 ms of cold start
+    dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+    return dynamodb.Table('APICallTracking')
@@ -0,0 +1,40 @@
+# app/utils/batch_utils.py
+# Author: Thanh Trieu
+# Description: Helpers for the batch endpoints, which look up or adjust a list of products in one request.
+
+import os
+from typing import Iterable, List
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Upper bound on distinct IDs per batch lookup, keeping the IN list and the response small
+BATCH_MAX_IDS = int(os.getenv('BATCH_MAX_IDS', '200'))
+# Upper bound on lines per PATCH /inventory call, which holds its row locks until every line is applied
+STOCK_ADJUSTMENT_MAX_LINES = int(os.getenv('STOCK_ADJUSTMENT_MAX_LINES', '10000'))
+
+def parse_id_list(ids: str) -> List[int]:
+    """Parse a comma-separated ids query parameter, answering 400 for anything that is not an integer."""
+    try:
+        return [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+
+def unique_ids(ids: Iterable[int]) -> List[int]:
+    """Drop repeated IDs, keeping the order they were requested in, and enforce BATCH_MAX_IDS."""
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="At least one id is required")
+    if len(ids) > BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_IDS} ids can be looked up at once")
+    return ids
+
+def check_adjustment_count(count: int):
+    """Answer 400 for an empty adjustment batch or one above STOCK_ADJUSTMENT_MAX_LINES."""
+    if not count:
+        raise HTTPException(status_code=400, detail="At least one adjustment is required")
+    if count > STOCK_ADJUSTMENT_MAX_LINES:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {STOCK_ADJUSTMENT_MAX_LINES} adjustments can be applied at once")
@@ -2,12 +2,18 @@
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
+import hashlib
 import requests
-from typing import List
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
 from dotenv import load_dotenv
 import os
 
+from ..bootstrap import lazy_resource
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -17,34 +23,146 @@ COGNITO_APP_CLIENT_ID = os.getenv('COGNITO_APP_CLIENT_ID')
 COGNITO_REGION = os.getenv('COGNITO_REGION')
 JWT_ALGORITHM = os.getenv('JWT_ALGORITHM')
 
+# JWKS location (defaults to the user pool's well-known URL) and refresh settings
+COGNITO_JWKS_URL = os.getenv('COGNITO_JWKS_URL')
+JWKS_TTL = float(os.getenv('JWKS_TTL', '3600'))
+JWKS_MIN_REFRESH_INTERVAL = float(os.getenv('JWKS_MIN_REFRESH_INTERVAL', '30'))
+VERIFIED_TOKEN_CACHE_SIZE = int(os.getenv('VERIFIED_TOKEN_CACHE_SIZE', '10000'))
+
+def get_jwks_url() -> str:
+    return COGNITO_JWKS_URL or f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}/.well-known/jwks.json"
+
 # Fetch public keys from AWS Cognito
-def get_cognito_public_keys():
-    url = f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}/.well-known/jwks.json"
-    response = requests.get(url)
+def get_cognito_public_keys(url: str = None):
+    response = requests.get(url or get_jwks_url(), timeout=5)
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail='Unable to fetch JWKS')
     return response.json()['keys']
 
-PUBLIC_KEYS = get_cognito_public_keys()
+class JwksKeyStore:
+    """
+    Public keys indexed by kid. Each key object is built once per (kid, algorithm)
+    and reused until the key set is refetched, which happens when the TTL runs out
+    or a token names an unknown kid (at most once per min_refresh_interval).
+    Concurrent refreshes collapse into a single fetch.
+    """
+
+    def __init__(self, fetch_keys=get_cognito_public_keys, ttl: float = JWKS_TTL,
+                 min_refresh_interval: float = JWKS_MIN_REFRESH_INTERVAL, clock=time.monotonic):
+        self.fetch_keys = fetch_keys
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._clock = clock
+        self._jwks = {}
+        self._built = {}
+        self._fetched_at = None
+        self._generation = 0
+        self._refresh_lock = threading.Lock()
+        self.fetches = 0
+
+    def ensure_fresh(self):
+        """Fetch the key set if it has never been fetched or its TTL has run out."""
+        generation = self._generation
+        if self._fetched_at is None or self._clock() - self._fetched_at >= self.ttl:
+            self.refresh(generation)
+
+    def get_key(self, kid: str, algorithm: str):
+        """Return the key object for kid, or None if the key set does not contain it."""
+        generation = self._generation
+        self.ensure_fresh()
+        if kid not in self._jwks and self._clock() - self._fetched_at >= self.min_refresh_interval:
+            # The signing key may have been rotated since the last fetch
+            self.refresh(generation)
+        built = self._built
+        key = built.get((kid, algorithm))
+        if key is None:
+            data = self._jwks.get(kid)
+            if data is None or data.get('alg', algorithm) != algorithm:
+                return None
+            try:
+                key = jwk.construct(data, algorithm)
+            except (JWTError, KeyError, TypeError, ValueError):
+                return None
+            built[(kid, algorithm)] = key
+        return key
+
+    def refresh(self, seen_generation: Optional[int] = None):
+        """Fetch the key set, unless another thread already refreshed it after seen_generation."""
+        with self._refresh_lock:
+            if seen_generation is not None and self._generation != seen_generation:
+                return
+            self._jwks = {key['kid']: key for key in self.fetch_keys() if 'kid' in key}
+            self._built = {}
+            self._fetched_at = self._clock()
+            self._generation += 1
+            self.fetches += 1
+
+class VerifiedTokenCache:
+    """LRU cache of verified token payloads keyed by token hash, each kept until the token's exp."""
+
+    def __init__(self, max_size: int = VERIFIED_TOKEN_CACHE_SIZE, clock=time.time):
+        self.max_size = max_size
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(token: str, algorithm: str) -> str:
+        return hashlib.sha256(f"{algorithm}:{token}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= self._clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, payload: dict):
+        # Tokens without a numeric exp are never cached
+        exp = payload.get('exp')
+        if self.max_size <= 0 or not isinstance(exp, (int, float)) or exp <= self._clock():
+            return
+        with self._lock:
+            self._entries[key] = (payload, exp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+jwks_key_store = JwksKeyStore()
+verified_token_cache = VerifiedTokenCache()
+
+@lazy_resource("cognito_jwks")
+def get_public_keys():
+    """Return the Cognito key store, fetching the key set on first use."""
+    jwks_key_store.ensure_fresh()
+    return jwks_key_store
 
 def verify_token(token: str, algorithm: str = None):
     algorithm = algorithm or JWT_ALGORITHM
+    cache_key = VerifiedTokenCache.key_for(token, algorithm)
+    payload = verified_token_cache.get(cache_key)
+    if payload is not None:
+        return payload
     try:
         header = jwt.get_unverified_header(token)
-        rsa_key = None
-        for key in PUBLIC_KEYS:
-            if key['kid'] == header['kid']:
-                rsa_key = {
-                    'kty': key['kty'],
-                    'kid': key['kid'],
-                    'use': key['use'],
-                    'n': key['n'],
-                    'e': key['e']
-                }
-        if rsa_key is None and algorithm != 'HS256':
+        key = jwks_key_store.get_key(header.get('kid'), algorithm)
+        if key is None:
             raise HTTPException(status_code=401, detail='Public key not found.')
 
-        payload = jwt.decode(token, rsa_key if rsa_key else 'mocked_secret', algorithms=[algorithm], audience=COGNITO_APP_CLIENT_ID)
+        payload = jwt.decode(token, key, algorithms=[algorithm], audience=COGNITO_APP_CLIENT_ID)
+        verified_token_cache.put(cache_key, payload)
         return payload
     except JWTError:
         raise HTTPException(status_code=401, detail='Invalid token.')
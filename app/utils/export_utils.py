@@ -0,0 +1,70 @@
+# app/utils/export_utils.py
+# Author: Thanh Trieu
+# Description: Provides helpers for streaming table exports as NDJSON or CSV.
+
+import csv
+import io
+import json
+from typing import Callable, Iterable, Iterator, Sequence
+from fastapi.responses import StreamingResponse
+
+from ..database import SessionLocal
+
+# Supported export formats and their media types
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Number of rows encoded into each chunk written to the response
+EXPORT_CHUNK_ROWS = 1000
+
+def encode_ndjson(rows: Iterable[dict], chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Encode rows as newline-delimited JSON, yielding one bytes chunk per batch of rows."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, separators=(",", ":")))
+        if len(lines) >= chunk_rows:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+def encode_csv(rows: Iterable[dict], columns: Sequence[str], chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Encode rows as CSV with a header line, yielding one bytes chunk per batch of rows."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count >= chunk_rows:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def stream_export(iter_rows: Callable, columns: Sequence[str], export_format: str, filename: str) -> StreamingResponse:
+    """
+    Build a StreamingResponse that reads rows with its own database session, so the
+    session stays open for as long as the body is being streamed.
+    """
+    def rows():
+        db = SessionLocal()
+        try:
+            yield from iter_rows(db)
+        finally:
+            db.close()
+
+    if export_format == "csv":
+        body = encode_csv(rows(), columns)
+    else:
+        body = encode_ndjson(rows())
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )
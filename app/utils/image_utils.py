@@ -0,0 +1,129 @@
+# app/utils/image_utils.py
+# Author: Thanh Trieu
+# Description: Generates resized, recompressed variants of product images and stores them next to the original in S3.
+
+import asyncio
+import io
+import multiprocessing
+import os
+import posixpath
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Tuple
+from dotenv import load_dotenv
+
+from ..bootstrap import lazy_resource
+from .s3_utils import get_bucket_name, get_s3_client, get_upload_executor, object_key_from_url
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Set IMAGE_VARIANTS_ENABLED=false to store only the original upload
+IMAGE_VARIANTS_ENABLED = os.getenv('IMAGE_VARIANTS_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+IMAGE_VARIANT_WORKERS = int(os.getenv('IMAGE_VARIANT_WORKERS', '2'))
+IMAGE_VARIANT_QUALITY = int(os.getenv('IMAGE_VARIANT_QUALITY', '80'))
+
+# name -> (longest side in pixels, Pillow format, file extension, content type)
+IMAGE_VARIANTS = {
+    "thumbnail": (256, "JPEG", "jpg", "image/jpeg"),
+    "medium": (1024, "JPEG", "jpg", "image/jpeg"),
+    "webp": (1024, "WEBP", "webp", "image/webp"),
+}
+
+def variant_key(key: str, name: str) -> str:
+    """Return the S3 key of a variant, stored next to the original: products/1/a.png -> products/1/a_thumbnail.jpg."""
+    stem = posixpath.splitext(key)[0]
+    return f"{stem}_{name}.{IMAGE_VARIANTS[name][2]}"
+
+def render_variants(data: bytes, quality: int = IMAGE_VARIANT_QUALITY) -> Dict[str, Tuple[bytes, str]]:
+    """Resize and recompress an image into every variant, returning {name: (bytes, content type)}."""
+    from PIL import Image, ImageOps  # Imported in the worker process only
+
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        variants = {}
+        for name, (size, image_format, _, content_type) in IMAGE_VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+            if image_format == "JPEG" and resized.mode != "RGB":
+                # JPEG has no alpha channel; flatten onto white
+                background = Image.new("RGB", resized.size, (255, 255, 255))
+                background.paste(resized, mask=resized.getchannel("A"))
+                resized = background
+            buffer = io.BytesIO()
+            options = {"quality": quality}
+            if image_format == "JPEG":
+                options.update(optimize=True, progressive=True)
+            else:
+                options["method"] = 4
+            resized.save(buffer, image_format, **options)
+            variants[name] = (buffer.getvalue(), content_type)
+        return variants
+
+@lazy_resource("image_executor")
+def get_image_executor() -> Executor:
+    """Return the pool that renders variants, a process pool so decoding never holds the GIL of the API process."""
+    try:
+        # Spawn rather than fork: the API process already runs upload and log flusher threads
+        return ProcessPoolExecutor(max_workers=IMAGE_VARIANT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    except (OSError, NotImplementedError):
+        # Some runtimes (e.g. AWS Lambda, without /dev/shm) cannot create process pools
+        return ThreadPoolExecutor(max_workers=IMAGE_VARIANT_WORKERS, thread_name_prefix="image-variants")
+
+_stats = {"queued": 0, "generated": 0, "failed": 0}
+_stats_lock = threading.Lock()
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+def stats() -> dict:
+    """Return counters for the variant pipeline."""
+    with _stats_lock:
+        return dict(_stats)
+
+def _download(key: str) -> bytes:
+    return get_s3_client().get_object(Bucket=get_bucket_name(), Key=key)["Body"].read()
+
+def _upload(key: str, data: bytes, content_type: str) -> str:
+    bucket_name = get_bucket_name()
+    get_s3_client().put_object(Bucket=bucket_name, Key=key, Body=data, ContentType=content_type)
+    return f"https://{bucket_name}.s3.amazonaws.com/{key}"
+
+async def create_variants(image_url: str) -> Dict[str, str]:
+    """Render and upload every variant of the image at image_url, returning {variant name: URL}."""
+    loop = asyncio.get_running_loop()
+    key = object_key_from_url(image_url)
+    # Read the original back from S3 so the request never has to hold on to the upload
+    original = await loop.run_in_executor(get_upload_executor(), _download, key)
+    rendered = await loop.run_in_executor(get_image_executor(), render_variants, original)
+    uploads = [
+        loop.run_in_executor(get_upload_executor(), _upload, variant_key(key, name), data, content_type)
+        for name, (data, content_type) in rendered.items()
+    ]
+    return dict(zip(rendered, await asyncio.gather(*uploads)))
+
+async def generate_image_variants(product_id: int, image_url: str):
+    """Background task: create the variants of a product image and record them on the product."""
+    # Deferred so the spawned render workers, which import this module, never build database engines
+    from .. import async_crud
+    from ..async_database import AsyncSessionLocal
+
+    try:
+        variants = await create_variants(image_url)
+        async with AsyncSessionLocal() as db:
+            await async_crud.set_product_image_variants(db, product_id, image_url, variants)
+    except Exception:
+        # The product keeps serving the original; the next upload tries again
+        _count("failed")
+        return
+    _count("generated")
+
+def schedule_image_variants(background_tasks, product_id: int, image_url: str):
+    """Queue variant generation for a freshly uploaded product image to run after the response is sent."""
+    if not IMAGE_VARIANTS_ENABLED:
+        return
+    _count("queued")
+    background_tasks.add_task(generate_image_variants, product_id, image_url)
@@ -0,0 +1,139 @@
+# app/utils/import_utils.py
+# Author: Thanh Trieu
+# Description: Provides helpers for parsing and ingesting bulk product uploads in chunks.
+
+import csv
+import json
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from .. import crud, schemas
+
+# Formats accepted by the bulk import endpoint
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Number of rows validated and written per transaction
+DEFAULT_IMPORT_CHUNK_SIZE = 5000
+
+# Optional CSV columns whose empty cells leave the field unset rather than failing validation
+CSV_OPTIONAL_COLUMNS = ("reorder_threshold",)
+
+def detect_import_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    """Guess the upload format from its filename or content type, defaulting to CSV."""
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or (content_type or "").endswith(("ndjson", "jsonl")):
+        return "ndjson"
+    return "csv"
+
+def iter_records(fileobj: BinaryIO, import_format: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Read an uploaded file line by line, yielding (line number, record, parse error) tuples
+    without loading the whole file into memory.
+    """
+    # Decode line by line; SpooledTemporaryFile only became a full io object in Python 3.11. Lines that are
+    # not UTF-8 are decoded with replacement characters so parsing can go on, and reported by number.
+    undecodable = set()
+
+    def decode(lines):
+        for line_no, line in enumerate(lines, start=1):
+            try:
+                yield line.decode("utf-8")
+            except UnicodeDecodeError:
+                undecodable.add(line_no)
+                yield line.decode("utf-8", errors="replace")
+
+    text = decode(fileobj)
+    if import_format == "csv":
+        reader = csv.DictReader(text)
+        # Read the header up front; no row can be matched to an undecodable one
+        if reader.fieldnames and any(line_no <= reader.line_num for line_no in undecodable):
+            yield reader.line_num, None, "Invalid text: not UTF-8 encoded"
+            return
+        last_line = reader.line_num
+        for record in reader:
+            # A record spans several lines when a quoted field holds line breaks
+            first_line, last_line = last_line + 1, reader.line_num
+            if any(line_no in undecodable for line_no in range(first_line, last_line + 1)):
+                yield reader.line_num, None, "Invalid text: not UTF-8 encoded"
+                continue
+            # DictReader files fields beyond the header under the key None
+            if None in record:
+                yield reader.line_num, None, \
+                    f"Expected {len(reader.fieldnames)} fields, got {len(reader.fieldnames) + len(record[None])}"
+                continue
+            for column in CSV_OPTIONAL_COLUMNS:
+                if record.get(column) == "":
+                    del record[column]
+            yield reader.line_num, record, None
+        return
+    for line_no, line in enumerate(text, start=1):
+        if line_no in undecodable:
+            yield line_no, None, "Invalid text: not UTF-8 encoded"
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "Expected a JSON object"
+            continue
+        yield line_no, record, None
+
+def _chunks(records: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors())
+
+def import_products(db: Session, records: Iterable, upsert_key: str = None,
+                    chunk_size: int = DEFAULT_IMPORT_CHUNK_SIZE) -> dict:
+    """
+    Validate and write parsed records chunk by chunk. A chunk that fails to write is
+    rolled back and reported without aborting the chunks before or after it.
+    """
+    report = {"inserted": 0, "updated": 0, "merged": 0, "failed": 0, "chunks": []}
+    for index, chunk in enumerate(_chunks(records, chunk_size)):
+        chunk_report = {
+            "chunk": index,
+            "first_line": chunk[0][0],
+            "last_line": chunk[-1][0],
+            "inserted": 0,
+            "updated": 0,
+            "merged": 0,
+            "errors": [],
+        }
+        products = []
+        for line_no, record, error in chunk:
+            if error is None:
+                try:
+                    products.append(schemas.ProductCreate(**record))
+                    continue
+                except ValidationError as e:
+                    error = _validation_message(e)
+            chunk_report["errors"].append({"line": line_no, "error": error})
+
+        if products:
+            try:
+                counts = crud.bulk_create_products(db, products, upsert_key=upsert_key)
+                chunk_report.update(counts)
+            except Exception as e:
+                chunk_report["errors"].append({"line": None, "error": f"Chunk failed to write: {e}"})
+                report["failed"] += len(products)
+
+        report["inserted"] += chunk_report["inserted"]
+        report["updated"] += chunk_report["updated"]
+        report["merged"] += chunk_report["merged"]
+        report["failed"] += sum(1 for error in chunk_report["errors"] if error["line"] is not None)
+        report["chunks"].append(chunk_report)
+    return report
@@ -2,17 +2,120 @@
 # Author: Thanh Trieu
 # Description: Provides utilities for interacting with AWS S3, including file upload and URL generation.
 
+import asyncio
 import os
-import boto3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
 from botocore.exceptions import NoCredentialsError, ClientError
 from fastapi import HTTPException, UploadFile
 from dotenv import load_dotenv
 
+from ..bootstrap import lazy_resource
+from ..timing import timed, timed_call
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize the S3 client
-s3 = boto3.client('s3')
+# Lifetime of generated presigned URLs and size of the in-process URL cache
+PRESIGNED_URL_EXPIRES_IN = int(os.getenv('PRESIGNED_URL_EXPIRES_IN', '3600'))
+PRESIGNED_URL_CACHE_SIZE = int(os.getenv('PRESIGNED_URL_CACHE_SIZE', '10000'))
+
+# Uploads larger than this are rejected before anything is sent to S3
+S3_UPLOAD_MAX_BYTES = int(os.getenv('S3_UPLOAD_MAX_BYTES', str(10 * 1024 * 1024)))
+# Files above the threshold go up as a multipart upload in chunks of S3_MULTIPART_CHUNKSIZE,
+# with up to S3_UPLOAD_CONCURRENCY parts in flight per file
+S3_MULTIPART_THRESHOLD = int(os.getenv('S3_MULTIPART_THRESHOLD', str(8 * 1024 * 1024)))
+S3_MULTIPART_CHUNKSIZE = int(os.getenv('S3_MULTIPART_CHUNKSIZE', str(8 * 1024 * 1024)))
+S3_UPLOAD_CONCURRENCY = int(os.getenv('S3_UPLOAD_CONCURRENCY', '4'))
+# Number of uploads that run at once; further uploads wait for a free worker
+S3_UPLOAD_WORKERS = int(os.getenv('S3_UPLOAD_WORKERS', '4'))
+
+@lazy_resource("s3_client")
+def get_s3_client():
+    """Return the S3 client, creating it on first use."""
+    import boto3  # Deferred: importing boto3 alone costs ~200 ms of cold start
+    return boto3.client('s3')
+
+@lazy_resource("s3_transfer_config")
+def get_transfer_config():
+    """Return the TransferConfig used for uploads."""
+    from boto3.s3.transfer import TransferConfig
+    return TransferConfig(
+        multipart_threshold=S3_MULTIPART_THRESHOLD,
+        multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+        max_concurrency=S3_UPLOAD_CONCURRENCY,
+    )
+
+@lazy_resource("s3_upload_executor")
+def get_upload_executor() -> ThreadPoolExecutor:
+    """Return the thread pool that runs uploads, keeping them off the event loop and out of the shared pool."""
+    return ThreadPoolExecutor(max_workers=S3_UPLOAD_WORKERS, thread_name_prefix="s3-upload")
+
+class PresignedUrlCache:
+    """
+    LRU cache of presigned URLs keyed by bucket and object key. Entries expire
+    after `ttl` seconds, which is kept well below the URL lifetime so a cached
+    URL always has plenty of validity left when it is handed out.
+    """
+
+    def __init__(self, max_size: int, ttl: float, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key) -> Optional[str]:
+        """Return the cached URL for key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= self._clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, url: str):
+        """Store a freshly generated URL, evicting the least recently used entries when full."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (url, self._clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached URL and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+# Cached URLs are reused for half of their lifetime
+presigned_url_cache = PresignedUrlCache(PRESIGNED_URL_CACHE_SIZE, PRESIGNED_URL_EXPIRES_IN / 2)
 
 def get_bucket_name() -> str:
     """Retrieve the S3 bucket name from environment variables."""
@@ -21,11 +124,34 @@ def get_bucket_name() -> str:
         raise ValueError("BUCKET_NAME is not set in the environment variables")
     return BUCKET_NAME
 
+def upload_size(file: UploadFile) -> int:
+    """Return the size of an uploaded file in bytes without reading it."""
+    if file.size is not None:
+        return file.size
+    position = file.file.tell()
+    size = file.file.seek(0, os.SEEK_END)
+    file.file.seek(position)
+    return size
+
+def check_upload_size(file: UploadFile):
+    """Reject files larger than S3_UPLOAD_MAX_BYTES."""
+    size = upload_size(file)
+    if size > S3_UPLOAD_MAX_BYTES:
+        file.file.close()
+        raise HTTPException(status_code=413,
+                            detail=f"File is {size} bytes; the maximum upload size is {S3_UPLOAD_MAX_BYTES} bytes")
+
+@timed_call("s3")
 def upload_file_to_s3(file: UploadFile, filename: str) -> str:
-    """Upload a file to S3 and return the file URL."""
+    """Upload a file to S3 and return the file URL. Blocks until the transfer completes."""
     BUCKET_NAME = get_bucket_name()
+    check_upload_size(file)
+    extra_args = {'ContentType': file.content_type} if file.content_type else None
     try:
-        s3.upload_fileobj(file.file, BUCKET_NAME, filename)
+        # Stream straight from the spooled upload; large files go up as a multipart upload
+        file.file.seek(0)
+        get_s3_client().upload_fileobj(file.file, BUCKET_NAME, filename,
+                                       ExtraArgs=extra_args, Config=get_transfer_config())
         file.file.close()  # Ensure the file is closed after upload
         return f"https://{BUCKET_NAME}.s3.amazonaws.com/{filename}"
     except NoCredentialsError:
@@ -35,17 +161,46 @@ def upload_file_to_s3(file: UploadFile, filename: str) -> str:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
 
-def generate_presigned_url(filename: str) -> str:
-    """Generate a presigned URL to access a file in S3."""
-    BUCKET_NAME = get_bucket_name()
+async def upload_file_to_s3_async(file: UploadFile, filename: str) -> str:
+    """Upload a file to S3 on the upload thread pool and return the file URL."""
+    check_upload_size(file)
+    loop = asyncio.get_running_loop()
+    with timed("s3"):
+        return await loop.run_in_executor(get_upload_executor(), upload_file_to_s3, file, filename)
+
+def object_key_from_url(file_url: str) -> str:
+    """Extract the S3 object key from a URL returned by upload_file_to_s3."""
+    return urlparse(file_url).path.lstrip('/')
+
+@timed_call("s3")
+def _sign_get_object(bucket_name: str, filename: str) -> str:
     try:
-        url = s3.generate_presigned_url('get_object',
-                                        Params={'Bucket': BUCKET_NAME, 'Key': filename},
-                                        ExpiresIn=3600)
-        return url
+        return get_s3_client().generate_presigned_url('get_object',
+                                                      Params={'Bucket': bucket_name, 'Key': filename},
+                                                      ExpiresIn=PRESIGNED_URL_EXPIRES_IN)
     except NoCredentialsError:
         raise HTTPException(status_code=500, detail="AWS credentials not available")
     except ClientError as e:
         raise HTTPException(status_code=500, detail=f"URL generation failed: {e.response['Error']['Message']}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"URL generation failed: {str(e)}")
+
+def _cached_presigned_url(bucket_name: str, filename: str) -> str:
+    url = presigned_url_cache.get((bucket_name, filename))
+    if url is None:
+        url = _sign_get_object(bucket_name, filename)
+        presigned_url_cache.put((bucket_name, filename), url)
+    return url
+
+def generate_presigned_url(filename: str) -> str:
+    """Generate a presigned URL to access a file in S3, reusing a cached URL while it is fresh."""
+    return _cached_presigned_url(get_bucket_name(), filename)
+
+def generate_presigned_urls(filenames: Iterable[str]) -> Dict[str, str]:
+    """Generate presigned URLs for a batch of object keys, signing each distinct key at most once."""
+    BUCKET_NAME = get_bucket_name()
+    urls = {}
+    for filename in filenames:
+        if filename not in urls:
+            urls[filename] = _cached_presigned_url(BUCKET_NAME, filename)
+    return urls
@@ -0,0 +1,9 @@
+# benchmarks/__main__.py
+# Author: Thanh Trieu
+# Description: Entry point for the end-to-end benchmark suite (python -m benchmarks run|compare).
+
+import sys
+
+from benchmarks.suite import main
+
+sys.exit(main())
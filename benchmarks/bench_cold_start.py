@@ -0,0 +1,93 @@
+# benchmarks/bench_cold_start.py
+# Author: Thanh Trieu
+# Description: Repeatable cold-start benchmark for app.main.lambda_handler in fresh interpreters.
+#
+# Usage: python -m benchmarks.bench_cold_start [--runs 5]
+#
+# "lazy" is the default startup. "eager" builds every AWS client and runs schema creation
+# during import, which is what startup used to do. A local moto server stands in for
+# DynamoDB so the end-of-invocation log flush is included without leaving the machine.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import bench_database_url
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import app.main as main
+from app.coldstart import api_gateway_event
+imported = time.perf_counter()
+if EAGER:
+    from app.migrate import run_migrations
+    from app.bootstrap import warm_up
+    run_migrations()
+    warm_up()
+initialized = time.perf_counter()
+main.mangum_handler(api_gateway_event("/metrics"), None)
+responded = time.perf_counter()
+main.flush_api_call_logs()
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "init_ms": (initialized - imported) * 1000,
+    "first_response_ms": (responded - initialized) * 1000,
+    "log_flush_ms": (done - responded) * 1000,
+    "cold_start_ms": (done - start) * 1000,
+}))
+"""
+
+AWS_ENV = {"AWS_ACCESS_KEY_ID": "bench", "AWS_SECRET_ACCESS_KEY": "bench", "AWS_DEFAULT_REGION": "us-east-1"}
+
+def start_moto_server(port: int):
+    import boto3
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(port=port, verbose=False)
+    server.start()
+    boto3.resource("dynamodb", endpoint_url=f"http://127.0.0.1:{port}", **{
+        "aws_access_key_id": "bench", "aws_secret_access_key": "bench", "region_name": "us-east-1"
+    }).create_table(
+        TableName="APICallTracking",
+        KeySchema=[{"AttributeName": "endpoint", "KeyType": "HASH"},
+                   {"AttributeName": "timestamp", "KeyType": "RANGE"}],
+        AttributeDefinitions=[{"AttributeName": "endpoint", "AttributeType": "S"},
+                              {"AttributeName": "timestamp", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST"
+    )
+    return server
+
+def run_once(eager: bool, port: int) -> dict:
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URL=bench_database_url(), DYNAMODB_TABLE_NAME="APICallTracking",
+               AWS_ENDPOINT_URL=f"http://127.0.0.1:{port}", **AWS_ENV)
+    env.setdefault("BUCKET_NAME", "inventory-management-bench")
+    result = subprocess.run([sys.executable, "-c", f"EAGER = {eager}\n{PROBE}"], capture_output=True, text=True,
+                            env=env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=5123)
+    args = parser.parse_args()
+
+    from app.migrate import run_migrations
+    run_migrations()
+    server = start_moto_server(args.port)
+    try:
+        for mode in ("eager", "lazy"):
+            runs = [run_once(mode == "eager", args.port) for _ in range(args.runs)]
+            medians = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            print(f"{mode:>5}: " + ", ".join(f"{key} {value:.1f}" for key, value in medians.items()))
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_concurrency.py
+# Author: Thanh Trieu
+# Description: Load test that starts one uvicorn worker and measures throughput at increasing concurrency.
+#
+# Usage: python -m benchmarks.bench_concurrency [--levels 1,8,32,64] [--requests 400] [--path /products/?limit=10]
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import bench_database_url, make_session_factory
+from app import models
+
+def seed(rows: int):
+    engine, SessionLocal = make_session_factory()
+    with SessionLocal() as db:
+        db.add_all([models.Product(name=f"Product {i}", description="Seeded", price=1.0, stock=100)
+                    for i in range(rows)])
+        db.commit()
+    engine.dispose()
+
+async def wait_until_ready(client: httpx.AsyncClient, url: str, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.get(url)
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn did not start in time")
+
+async def drive(base_url: str, path: str, concurrency: int, total: int) -> dict:
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests_per_second": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+async def run(args):
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URL=bench_database_url())
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--workers", "1",
+         "--log-level", "warning"],
+        env=env
+    )
+    try:
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            await wait_until_ready(client, args.path)
+        for level in args.levels:
+            print(await drive(base_url, args.path, level, args.requests))
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Single worker concurrency load test")
+    parser.add_argument("--levels", type=lambda value: [int(v) for v in value.split(",")], default=[1, 8, 32, 64])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--path", default="/products/?limit=10")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
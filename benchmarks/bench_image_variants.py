@@ -0,0 +1,54 @@
+# benchmarks/bench_image_variants.py
+# Author: Thanh Trieu
+# Description: Compares bytes per product page for original images and thumbnails, and measures variant render time.
+#
+# Usage: python -m benchmarks.bench_image_variants [--width 3000] [--height 2000] [--page-size 20]
+
+import argparse
+import io
+import os
+import time
+
+import benchmarks.common  # noqa: F401  (sets the app environment defaults)
+from PIL import Image
+
+from app.utils import image_utils
+
+def sample_photo(width: int, height: int) -> bytes:
+    """A photo-like test image: smooth gradients plus sensor-style noise, saved as a high-quality JPEG."""
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.frombytes("L", (width, height), os.urandom(width * height)).point(lambda v: v // 8)
+    image = Image.merge("RGB", (gradient, Image.blend(gradient, noise, 0.3), noise))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=95)
+    return buffer.getvalue()
+
+def main():
+    parser = argparse.ArgumentParser(description="Image variant size and render time benchmark")
+    parser.add_argument("--width", type=int, default=3000)
+    parser.add_argument("--height", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+
+    original = sample_photo(args.width, args.height)
+    executor = image_utils.get_image_executor()
+    executor.submit(image_utils.render_variants, original).result()  # Start the worker processes
+
+    start = time.perf_counter()
+    futures = [executor.submit(image_utils.render_variants, original) for _ in range(args.page_size)]
+    variants = [future.result() for future in futures][0]
+    elapsed = time.perf_counter() - start
+
+    print(f"original {args.width}x{args.height}: {len(original) / 1024:.0f} KB")
+    for name, (data, _) in variants.items():
+        print(f"{name:>10}: {len(data) / 1024:.1f} KB")
+    page_original = len(original) * args.page_size
+    page_thumbnail = len(variants["thumbnail"][0]) * args.page_size
+    print(f"page of {args.page_size}: originals {page_original / 1024 / 1024:.1f} MB, "
+          f"thumbnails {page_thumbnail / 1024:.0f} KB ({page_original / page_thumbnail:.0f}x fewer bytes)")
+    print(f"rendered {args.page_size} images in {elapsed:.2f} s on {image_utils.IMAGE_VARIANT_WORKERS} workers "
+          f"({type(executor).__name__})")
+    executor.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_orders.py
+# Author: Thanh Trieu
+# Description: Concurrency benchmark for order placement with many writers hitting one hot product.
+#
+# Usage: python -m benchmarks.bench_orders [--writers 16] [--stock 2000] [--shards 8] [--compare-legacy]
+#
+# Row-lock contention only shows up on a database with row locks; run it with
+# BENCH_DATABASE_URL pointing at Postgres to compare the single-row and sharded layouts.
+
+import argparse
+import threading
+import time
+
+from benchmarks.common import make_session_factory
+from app import crud, models, schemas
+
+def legacy_create_order(db, order: schemas.OrderCreate):
+    """The previous read-modify-write implementation, kept here to compare against."""
+    db_order = models.Order(total_amount=order.total_amount)
+    db.add(db_order)
+    db.commit()
+    db.refresh(db_order)
+    for item in order.items:
+        db.add(models.OrderItem(order_id=db_order.id, product_id=item.product_id, quantity=item.quantity))
+        product = db.query(models.Product).filter_by(id=item.product_id).first()
+        if product:
+            if product.stock < item.quantity:
+                raise ValueError(f"Not enough stock for product {product.name}")
+            product.stock -= item.quantity
+            db.add(product)
+    db.commit()
+    return db_order
+
+def run(place_order, writers: int, stock: int, quantity: int, shards: int = 0) -> dict:
+    engine, SessionLocal = make_session_factory()
+    with SessionLocal() as db:
+        product = models.Product(name="Hot SKU", description="Flash sale", price=9.99, stock=stock)
+        db.add(product)
+        db.commit()
+        product_id = product.id
+        if shards:
+            crud.set_stock_shards(db, product_id, shards)
+
+    order = schemas.OrderCreate(total_amount=9.99 * quantity,
+                                items=[schemas.OrderItemCreate(product_id=product_id, quantity=quantity)])
+    placed = []
+    errors = []
+    lock = threading.Lock()
+
+    def writer():
+        db = SessionLocal()
+        ok = rejected = failed = 0
+        try:
+            while True:
+                try:
+                    place_order(db, order)
+                    ok += 1
+                except ValueError:
+                    rejected += 1
+                    db.rollback()
+                    break
+                except Exception as e:
+                    failed += 1
+                    db.rollback()
+                    if failed > 100:
+                        with lock:
+                            errors.append(repr(e))
+                        break
+        finally:
+            db.close()
+        with lock:
+            placed.append(ok)
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    with SessionLocal() as db:
+        final_stock = db.get(models.Product, product_id).available_stock
+        order_count = db.query(models.Order).count()
+    engine.dispose()
+
+    successes = sum(placed)
+    expected_stock = stock - successes * quantity
+    return {
+        "orders_placed": successes,
+        "orders_in_table": order_count,
+        "orders_per_second": successes / elapsed if elapsed else 0.0,
+        "elapsed_seconds": elapsed,
+        "final_stock": final_stock,
+        "expected_stock": expected_stock,
+        "oversold": final_stock < 0 or final_stock != expected_stock,
+        "errors": errors[:5],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Order placement concurrency benchmark")
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--stock", type=int, default=2000)
+    parser.add_argument("--quantity", type=int, default=1)
+    parser.add_argument("--shards", type=int, default=8, help="shard count for the sharded layout (0 to skip it)")
+    parser.add_argument("--compare-legacy", action="store_true")
+    args = parser.parse_args()
+
+    implementations = [("single_row", crud.create_order, 0)]
+    if args.shards:
+        implementations.append((f"sharded_{args.shards}", crud.create_order, args.shards))
+    if args.compare_legacy:
+        implementations.append(("legacy_read_modify_write", legacy_create_order, 0))
+    for name, place_order, shards in implementations:
+        result = run(place_order, args.writers, args.stock, args.quantity, shards)
+        print(f"{name}: {result}")
+
+if __name__ == "__main__":
+    main()
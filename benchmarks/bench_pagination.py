@@ -0,0 +1,57 @@
+# benchmarks/bench_pagination.py
+# Author: Thanh Trieu
+# Description: Compares offset and keyset pagination latency from the first page to deep pages.
+#
+# Usage: python -m benchmarks.bench_pagination [--rows 100000] [--limit 10]
+
+import argparse
+import time
+
+from sqlalchemy import insert
+
+from benchmarks.common import make_session_factory
+from app import crud, models
+from app.cache import product_cache
+
+def seed(SessionLocal, rows: int, chunk: int = 10000):
+    with SessionLocal() as db:
+        for start in range(0, rows, chunk):
+            db.execute(insert(models.Product), [
+                {"name": f"Product {i}", "description": "Seeded", "price": 1.0, "stock": i % 100}
+                for i in range(start, min(start + chunk, rows))
+            ])
+        db.commit()
+
+def page_latency(SessionLocal, page: int, limit: int, repeat: int) -> dict:
+    with SessionLocal() as db:
+        # Keyset pages are addressed by the last id of the previous page
+        last_id = (page - 1) * limit
+        timings = {}
+        for name, kwargs in (("offset", {"skip": (page - 1) * limit}), ("keyset", {"after_id": last_id})):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                crud.get_products(db, limit=limit, **kwargs)
+            timings[name] = (time.perf_counter() - start) / repeat * 1000
+        return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Offset vs keyset pagination benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # Measure the queries themselves, not the product cache
+    product_cache.enabled = False
+    engine, SessionLocal = make_session_factory()
+    seed(SessionLocal, args.rows)
+    last_page = args.rows // args.limit
+    pages = [p for p in (1, 10, 100, 1000, 10000, 100000) if p <= last_page]
+    print(f"{'page':>8} {'offset ms':>10} {'keyset ms':>10}")
+    for page in pages:
+        timings = page_latency(SessionLocal, page, args.limit, args.repeat)
+        print(f"{page:>8} {timings['offset']:>10.3f} {timings['keyset']:>10.3f}")
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# benchmarks/bench_presign.py
+# Author: Thanh Trieu
+# Description: Measures presigning cost for a product page with a cold and a warm presigned URL cache.
+#
+# Usage: python -m benchmarks.bench_presign [--page-size 100] [--pages 50]
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+import benchmarks.common  # noqa: F401  (sets the app environment defaults)
+from app.utils import s3_utils
+
+def main():
+    parser = argparse.ArgumentParser(description="Presigned URL cache benchmark")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=50)
+    args = parser.parse_args()
+
+    keys = [f"products/{i}/image.png" for i in range(args.page_size)]
+
+    s3_utils.presigned_url_cache.clear()
+    start = time.perf_counter()
+    for _ in range(args.pages):
+        s3_utils.presigned_url_cache.clear()
+        s3_utils.generate_presigned_urls(keys)
+    uncached = (time.perf_counter() - start) / args.pages
+
+    s3_utils.presigned_url_cache.clear()
+    s3_utils.generate_presigned_urls(keys)
+    start = time.perf_counter()
+    for _ in range(args.pages):
+        s3_utils.generate_presigned_urls(keys)
+    warm = (time.perf_counter() - start) / args.pages
+
+    print(f"page of {args.page_size}: uncached {uncached * 1000:.3f} ms, warm cache {warm * 1000:.3f} ms "
+          f"({uncached / warm:.0f}x)")
+    print(f"cache stats: {s3_utils.presigned_url_cache.stats()}")
+
+if __name__ == "__main__":
+    main()
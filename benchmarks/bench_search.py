@@ -0,0 +1,91 @@
+# benchmarks/bench_search.py
+# Author: Thanh Trieu
+# Description: Measures product search latency on a large generated catalog, using the PostgreSQL indexes when
+#              BENCH_DATABASE_URL points at PostgreSQL and the in-process index otherwise.
+#
+# Usage: python -m benchmarks.bench_search [--products 1000000] [--queries 200]
+
+import argparse
+import random
+import resource
+import sys
+import time
+
+from sqlalchemy import insert
+
+from benchmarks.common import make_session_factory
+from app import models
+from app.search import create_search_indexes, product_search_index, search_products
+
+ADJECTIVES = ["red", "blue", "green", "steel", "wooden", "compact", "deluxe", "portable", "smart", "classic",
+              "ergonomic", "vintage", "wireless", "heavy", "mini", "ultra", "organic", "modular", "silent", "rapid"]
+NOUNS = ["widget", "lamp", "chair", "kettle", "speaker", "backpack", "monitor", "drill", "blender", "camera",
+         "keyboard", "bottle", "tent", "jacket", "router", "heater", "printer", "scooter", "guitar", "watch"]
+USES = ["office", "kitchen", "garden", "travel", "studio", "workshop", "outdoor", "gaming", "school", "home"]
+
+# Query shapes: a word prefix, a whole word, two words, a substring inside a word, and a near-unique name
+QUERIES = [
+    lambda rng, n: rng.choice(NOUNS)[:3],
+    lambda rng, n: rng.choice(NOUNS),
+    lambda rng, n: f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}",
+    lambda rng, n: rng.choice(NOUNS)[1:5],
+    lambda rng, n: f"{rng.choice(NOUNS)} {rng.randrange(n)}",
+]
+
+def seed(SessionLocal, products: int, chunk: int = 20000):
+    rng = random.Random(7)
+    with SessionLocal() as db:
+        for start in range(0, products, chunk):
+            db.execute(insert(models.Product), [
+                {
+                    "name": f"{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS).title()} {i}",
+                    "description": f"A {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} for {rng.choice(USES)} use",
+                    "price": 1.0,
+                    "stock": 10,
+                }
+                for i in range(start, min(start + chunk, products))
+            ])
+            db.commit()
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description="Product search benchmark")
+    parser.add_argument("--products", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    engine, SessionLocal = make_session_factory()
+    start = time.perf_counter()
+    seed(SessionLocal, args.products)
+    print(f"seeded {args.products} products in {time.perf_counter() - start:.1f}s")
+    backend = "postgresql indexes" if engine.dialect.name == "postgresql" else "in-process index"
+
+    with SessionLocal() as db:
+        start = time.perf_counter()
+        if engine.dialect.name == "postgresql":
+            create_search_indexes(engine)
+        else:
+            rss_before = peak_rss_mb()
+            product_search_index.ensure_loaded(db)
+            print(f"index memory: ~{peak_rss_mb() - rss_before:.0f} MB")
+        print(f"built {backend} in {time.perf_counter() - start:.1f}s")
+
+        rng = random.Random(42)
+        for shape, make_query in enumerate(QUERIES):
+            queries = [make_query(rng, args.products) for _ in range(args.queries)]
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                search_products(db, query, limit=args.limit)
+                latencies.append(time.perf_counter() - start)
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] * 1000
+            p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+            print(f"{'shape ' + str(shape):>8} e.g. {queries[0]!r:<22} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms")
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_serialization.py
+# Author: Thanh Trieu
+# Description: Compares building a product list response from ORM objects validated against the response model
+#              with the fast path that encodes Core result rows directly with orjson.
+#
+# Usage: python -m benchmarks.bench_serialization [--products 5000] [--page 1000] [--repeat 20]
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+from sqlalchemy import insert
+
+from benchmarks.common import make_session_factory
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app import crud, models, schemas
+from app.cache import product_cache
+
+def seed(SessionLocal, products: int):
+    with SessionLocal() as db:
+        db.execute(insert(models.Product), [
+            {"name": f"Product {i}", "description": "Seeded product with a typical description length",
+             "price": 9.99, "stock": i, "image_variants": {"thumbnail": f"https://bucket/products/{i}_thumbnail.jpg"}}
+            for i in range(products)
+        ])
+        db.commit()
+
+async def orm_page(db, field, page: int) -> bytes:
+    """The previous path: ORM objects, validated and serialized through the route's response field."""
+    products = db.query(models.Product).order_by(models.Product.id).limit(page).all()
+    content = await serialize_response(field=field, response_content=products)
+    return JSONResponse(content).body
+
+async def row_page(db, page: int) -> bytes:
+    """The fast path: Core rows as dicts, encoded as they are."""
+    return ORJSONResponse(crud.get_product_rows(db, limit=page)).body
+
+async def measure(SessionLocal, page: int, repeat: int):
+    field = create_response_field(name="Response_read_products", type_=List[schemas.Product], mode="serialization")
+    results = {}
+    for name, build in (("orm + validation", lambda db: orm_page(db, field, page)),
+                        ("core rows + orjson", lambda db: row_page(db, page))):
+        with SessionLocal() as db:
+            body = await build(db)  # warm-up
+            start = time.perf_counter()
+            for _ in range(repeat):
+                await build(db)
+                db.expire_all()  # make every pass load the rows again
+            results[name] = ((time.perf_counter() - start) / repeat, len(body))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="List response serialization benchmark")
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--page", type=int, default=1000, help="rows per response")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine, SessionLocal = make_session_factory()
+    seed(SessionLocal, args.products)
+    # Measure loading and encoding, not cache hits
+    product_cache.enabled = False
+    page = min(args.page, args.products)
+    results = asyncio.run(measure(SessionLocal, page, args.repeat))
+
+    baseline = results["orm + validation"][0]
+    print(f"{page} rows per response, {args.repeat} responses each")
+    for name, (seconds, size) in results.items():
+        per_thousand = seconds / page * 1000 * 1000
+        print(f"{name:>20}: {per_thousand:8.2f} ms per 1,000 rows  ({size} bytes, {baseline / seconds:.1f}x)")
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
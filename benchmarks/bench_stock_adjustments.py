@@ -0,0 +1,79 @@
+# benchmarks/bench_stock_adjustments.py
+# Author: Thanh Trieu
+# Description: Measures batch stock adjustment throughput (PATCH /inventory's crud.adjust_stock) against
+#              updating the same products one PUT-style update_product call at a time.
+#
+# Usage: python -m benchmarks.bench_stock_adjustments [--products 50000] [--adjustments 10000] [--calls 5]
+# Point BENCH_DATABASE_URL at Postgres to exercise the UPDATE ... FROM (VALUES ...) path.
+
+import argparse
+import random
+import time
+
+from sqlalchemy import insert
+
+from benchmarks.common import make_session_factory
+from app import crud, models, schemas
+
+def seed(SessionLocal, products: int, chunk: int = 10000):
+    with SessionLocal() as db:
+        for start in range(0, products, chunk):
+            db.execute(insert(models.Product), [
+                {"name": f"SKU {i}", "description": "Warehouse item", "price": 1.0, "stock": 1000}
+                for i in range(start, min(start + chunk, products))
+            ])
+        db.commit()
+
+def make_adjustments(rng: random.Random, products: int, count: int):
+    # Receipts add stock, cycle counts set it, and a few lines would go negative and be rejected
+    adjustments = []
+    for product_id in rng.sample(range(1, products + 1), count):
+        kind = rng.random()
+        if kind < 0.6:
+            adjustments.append(schemas.StockAdjustment(product_id=product_id, delta=rng.randint(1, 200)))
+        elif kind < 0.95:
+            adjustments.append(schemas.StockAdjustment(product_id=product_id, absolute=rng.randint(0, 2000)))
+        else:
+            adjustments.append(schemas.StockAdjustment(product_id=product_id, delta=-5000))
+    return adjustments
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch stock adjustment benchmark")
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--adjustments", type=int, default=10000, help="adjustments per call")
+    parser.add_argument("--calls", type=int, default=5)
+    parser.add_argument("--single-updates", type=int, default=500,
+                        help="products updated one call at a time for the baseline")
+    args = parser.parse_args()
+
+    engine, SessionLocal = make_session_factory()
+    seed(SessionLocal, args.products)
+    rng = random.Random(7)
+    crud.product_cache.enabled = False
+
+    timings = []
+    for _ in range(args.calls):
+        adjustments = make_adjustments(rng, args.products, args.adjustments)
+        with SessionLocal() as db:
+            start = time.perf_counter()
+            report = crud.adjust_stock(db, adjustments)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    median = timings[len(timings) // 2]
+    print(f"{engine.dialect.name} batch: {args.adjustments} adjustments per call, median {median * 1000:.0f} ms "
+          f"({args.adjustments / median:,.0f} adjustments/s); last call applied {report['applied']}, "
+          f"rejected {report['rejected']}")
+
+    with SessionLocal() as db:
+        start = time.perf_counter()
+        for product_id in rng.sample(range(1, args.products + 1), args.single_updates):
+            crud.update_product(db, product_id, schemas.ProductUpdate(
+                name=f"SKU {product_id - 1}", description="Warehouse item", price=1.0, stock=rng.randint(0, 2000)
+            ))
+        elapsed = time.perf_counter() - start
+    print(f"{engine.dialect.name} one at a time: {args.single_updates / elapsed:,.0f} updates/s "
+          f"(~{args.adjustments * elapsed / args.single_updates:.1f} s for {args.adjustments})")
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
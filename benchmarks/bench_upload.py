@@ -0,0 +1,94 @@
+# benchmarks/bench_upload.py
+# Author: Thanh Trieu
+# Description: Measures S3 upload throughput and event-loop lag during concurrent uploads against a local moto server.
+#
+# Usage: python -m benchmarks.bench_upload [--uploads 16] [--size-mb 8]
+#
+# "inline" calls the blocking upload from the coroutine, which is what the handlers used to do.
+# "upload_pool" is upload_file_to_s3_async. Loop lag is how late a 10 ms ticker wakes up while
+# the uploads run; anything beyond a few milliseconds is time every other request had to wait.
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+PORT = 5124
+os.environ.update({
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ENDPOINT_URL": f"http://127.0.0.1:{PORT}",
+})
+
+import benchmarks.common  # noqa: F401  (sets the app environment defaults)
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from app.utils import s3_utils
+
+TICK = 0.01
+
+def make_upload(payload: bytes) -> UploadFile:
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    spooled.write(payload)
+    spooled.seek(0)
+    return UploadFile(file=spooled, size=len(payload), filename="image.png",
+                      headers=Headers({"content-type": "image/png"}))
+
+async def measure_lag(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+async def inline_upload(file: UploadFile, key: str):
+    return s3_utils.upload_file_to_s3(file, key)
+
+async def run(upload, payload: bytes, uploads: int) -> dict:
+    stop = asyncio.Event()
+    lags = []
+    ticker = asyncio.create_task(measure_lag(stop, lags))
+    await asyncio.sleep(TICK * 2)
+    start = time.perf_counter()
+    await asyncio.gather(*(upload(make_upload(payload), f"bench/{i}.png") for i in range(uploads)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    lags.sort()
+    return {
+        "elapsed_s": elapsed,
+        "throughput_mb_s": uploads * len(payload) / elapsed / 1024 / 1024,
+        "loop_lag_p50_ms": lags[len(lags) // 2] * 1000 if lags else 0.0,
+        "loop_lag_max_ms": lags[-1] * 1000 if lags else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="S3 upload throughput and event-loop lag benchmark")
+    parser.add_argument("--uploads", type=int, default=16)
+    parser.add_argument("--size-mb", type=float, default=8)
+    args = parser.parse_args()
+
+    import boto3
+    from moto.server import ThreadedMotoServer
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=PORT, verbose=False)
+    server.start()
+    try:
+        boto3.client("s3").create_bucket(Bucket=s3_utils.get_bucket_name())
+        payload = os.urandom(int(args.size_mb * 1024 * 1024))
+        s3_utils.S3_UPLOAD_MAX_BYTES = max(s3_utils.S3_UPLOAD_MAX_BYTES, len(payload))
+        print(f"{args.uploads} concurrent uploads of {args.size_mb} MB "
+              f"(multipart above {s3_utils.S3_MULTIPART_THRESHOLD // 1024 // 1024} MB, "
+              f"{s3_utils.S3_UPLOAD_WORKERS} upload workers)")
+        for name, upload in (("inline", inline_upload), ("upload_pool", s3_utils.upload_file_to_s3_async)):
+            result = asyncio.run(run(upload, payload, args.uploads))
+            print(f"{name:>12}: " + ", ".join(f"{key} {value:.1f}" for key, value in result.items()))
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# benchmarks/common.py
+# Author: Thanh Trieu
+# Description: Shared helpers for the benchmark scripts, including database setup and timing utilities.
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+# The app reads its database URL at import time, so point it somewhere harmless before importing it
+DEFAULT_BENCH_DATABASE_URL = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'inventory_bench.db')}"
+os.environ.setdefault("SQLALCHEMY_DATABASE_URL", os.getenv("BENCH_DATABASE_URL", DEFAULT_BENCH_DATABASE_URL))
+os.environ.setdefault("DYNAMODB_TABLE_NAME", "APICallTracking")
+os.environ.setdefault("BUCKET_NAME", "inventory-management-bench")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+
+def bench_database_url() -> str:
+    """Return the database URL benchmarks run against (BENCH_DATABASE_URL or a local SQLite file)."""
+    return os.getenv("BENCH_DATABASE_URL", DEFAULT_BENCH_DATABASE_URL)
+
+def make_session_factory(url: str = None, **engine_options):
+    """Create a fresh schema on the benchmark database and return (engine, sessionmaker)."""
+    url = url or bench_database_url()
+    if url.startswith("sqlite"):
+        engine_options.setdefault("connect_args", {"timeout": 60})
+    engine = create_engine(url, **engine_options)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@contextmanager
+def timed(results: dict, name: str):
+    """Store the elapsed wall-clock seconds of the block in results[name]."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        results[name] = time.perf_counter() - start
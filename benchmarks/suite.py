@@ -0,0 +1,312 @@
+# benchmarks/suite.py
+# Author: Thanh Trieu
+# Description: End-to-end benchmark suite driving app.main.app in-process against a seeded database and moto.
+#
+# Usage: python -m benchmarks run [--products 10000] [--concurrency 1,16] [--requests 500] [--skip-conditional]
+#                                [--output results.json]
+#        python -m benchmarks compare baseline.json results.json [--threshold 0.1]
+#
+# Requests go through httpx's ASGI transport, so the numbers cover routing, validation, the
+# database and serialization but not a network hop. The database is SQLite by default; point
+# BENCH_DATABASE_URL at Postgres for production-like numbers. S3 and DynamoDB are moto.
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from benchmarks.common import bench_database_url, make_session_factory
+
+import httpx
+from sqlalchemy import event, insert
+
+from app import models
+from app.pagination import encode_cursor
+
+# name -> function(rng, products) returning (method, path, json body or None)
+SCENARIOS = {
+    "products_list": lambda rng, n: ("GET", f"/products/?limit=20&cursor={encode_cursor(rng.randint(0, n - 20))}", None),
+    "product_detail": lambda rng, n: ("GET", f"/products/{rng.randint(1, n)}", None),
+    "inventory_list": lambda rng, n: ("GET", f"/inventory?limit=20&cursor={encode_cursor(rng.randint(0, n - 20))}", None),
+    "inventory_item": lambda rng, n: ("GET", f"/inventory/{rng.randint(1, n)}", None),
+    "create_order": lambda rng, n: ("POST", "/orders/", {
+        "total_amount": 1.0,
+        "items": [{"product_id": rng.randint(1, n), "quantity": 1} for _ in range(rng.randint(1, 3))],
+    }),
+}
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))]
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+class QueryCounter:
+    """Counts statements sent to the database by the app's sync and async engines."""
+
+    def __init__(self, engines):
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+def seed(products: int, chunk: int = 10000):
+    engine, SessionLocal = make_session_factory()
+    with SessionLocal() as db:
+        for start in range(0, products, chunk):
+            db.execute(insert(models.Product), [
+                {"name": f"Product {i}", "description": "Seeded", "price": 1.0, "stock": 10 ** 9}
+                for i in range(start, min(start + chunk, products))
+            ])
+        db.commit()
+    engine.dispose()
+
+def create_aws_stand_ins():
+    import boto3
+
+    boto3.client("s3").create_bucket(Bucket=os.environ["BUCKET_NAME"])
+    boto3.client("dynamodb").create_table(
+        TableName=os.environ["DYNAMODB_TABLE_NAME"],
+        KeySchema=[{"AttributeName": "endpoint", "KeyType": "HASH"},
+                   {"AttributeName": "timestamp", "KeyType": "RANGE"}],
+        AttributeDefinitions=[{"AttributeName": "endpoint", "AttributeType": "S"},
+                              {"AttributeName": "timestamp", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+async def drive(client: httpx.AsyncClient, scenario, products: int, concurrency: int, total: int,
+                queries: QueryCounter, seed_value: int) -> dict:
+    rng = random.Random(seed_value)
+    requests = [scenario(rng, products) for _ in range(total)]
+    latencies = []
+    errors = 0
+    remaining = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        for method, path, body in remaining:
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    rss_before = peak_rss_mb()
+    queries_before = queries.count
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "requests_per_second": total / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "queries_per_request": (queries.count - queries_before) / total,
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_growth_mb": peak_rss_mb() - rss_before,
+    }
+
+async def run_scenarios(app, args, queries: QueryCounter) -> list:
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for name in args.scenarios:
+            scenario = SCENARIOS[name]
+            # Warm-up requests build lazy resources and caches before anything is timed
+            await drive(client, scenario, args.products, 1, args.warmup, queries, seed_value=0)
+            for concurrency in args.concurrency:
+                result = await drive(client, scenario, args.products, concurrency, args.requests, queries,
+                                     seed_value=concurrency)
+                result["scenario"] = name
+                results.append(result)
+                print(f"{name:>15} c={concurrency:<4} {result['requests_per_second']:8.1f} req/s  "
+                      f"p50 {result['p50_ms']:7.2f}  p95 {result['p95_ms']:7.2f}  p99 {result['p99_ms']:7.2f} ms  "
+                      f"{result['queries_per_request']:.2f} q/req  {result['errors']} errors")
+        conditional = [] if args.skip_conditional else await measure_conditional(client, args.products,
+                                                                                  args.requests)
+    return results, conditional
+
+# Endpoints replayed with If-None-Match to measure conditional GETs: name -> function(rng, products) -> path
+CONDITIONAL_PATHS = {
+    "product_detail": lambda rng, n: f"/products/{rng.randint(1, n)}",
+    "products_list": lambda rng, n: f"/products/?limit=20&cursor={encode_cursor(rng.randint(0, n - 20))}",
+    "inventory_item": lambda rng, n: f"/inventory/{rng.randint(1, n)}",
+    "inventory_list": lambda rng, n: f"/inventory?limit=20&cursor={encode_cursor(rng.randint(0, n - 20))}",
+}
+
+async def measure_conditional(client: httpx.AsyncClient, products: int, total: int) -> list:
+    """
+    Fetch each path once, then again with its ETag as If-None-Match, comparing full 200 responses
+    against 304s on latency and body bytes. Nothing is written in between, so every revalidation is a 304.
+    """
+    results = []
+    for name, make_path in CONDITIONAL_PATHS.items():
+        rng = random.Random(1)
+        paths = [make_path(rng, products) for _ in range(total)]
+        full, revalidated = [], []
+        full_bytes = revalidated_bytes = not_modified = 0
+        for path in paths:
+            start = time.perf_counter()
+            response = await client.get(path)
+            full.append(time.perf_counter() - start)
+            full_bytes += len(response.content)
+            start = time.perf_counter()
+            response = await client.get(path, headers={"If-None-Match": response.headers.get("ETag", "")})
+            revalidated.append(time.perf_counter() - start)
+            revalidated_bytes += len(response.content)
+            not_modified += response.status_code == 304
+        full.sort()
+        revalidated.sort()
+        result = {
+            "endpoint": name,
+            "requests": total,
+            "not_modified_ratio": not_modified / total,
+            "full_p50_ms": percentile(full, 0.50) * 1000,
+            "not_modified_p50_ms": percentile(revalidated, 0.50) * 1000,
+            "not_modified_p95_ms": percentile(revalidated, 0.95) * 1000,
+            "bytes_per_full_response": full_bytes / total,
+            "bytes_saved_per_request": (full_bytes - revalidated_bytes) / total,
+        }
+        results.append(result)
+        print(f"{name + ' 304':>19} {result['not_modified_ratio']:6.1%} hits  p50 {result['full_p50_ms']:7.2f} -> "
+              f"{result['not_modified_p50_ms']:7.2f} ms  p95 {result['not_modified_p95_ms']:7.2f} ms  "
+              f"{result['bytes_saved_per_request']:8.0f} of {result['bytes_per_full_response']:.0f} bytes saved")
+    return results
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    from moto import mock_aws
+
+    seed(args.products)
+    with mock_aws():
+        create_aws_stand_ins()
+        from app.async_database import async_engine
+        from app.cache import product_cache
+        from app.database import engine
+        from app.main import app
+
+        if engine.url.render_as_string(hide_password=False) != bench_database_url():
+            raise SystemExit(f"app is configured for {engine.url!r}, not the benchmark database; "
+                             "unset SQLALCHEMY_DATABASE_URL or set BENCH_DATABASE_URL to match")
+        product_cache.enabled = not args.disable_cache
+        queries = QueryCounter([engine, async_engine.sync_engine])
+        results, conditional = asyncio.run(run_scenarios(app, args, queries))
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "settings": {
+            "products": args.products,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "product_cache": not args.disable_cache,
+        },
+        "results": results,
+        "conditional_gets": conditional,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}")
+    return report
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Return one row per scenario/concurrency pair in both reports, flagging regressions beyond threshold."""
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        before = previous.get((result["scenario"], result["concurrency"]))
+        if before is None:
+            continue
+        reasons = []
+        if result["requests_per_second"] < before["requests_per_second"] * (1 - threshold):
+            reasons.append("throughput")
+        if result["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            reasons.append("p95")
+        if result["queries_per_request"] > before["queries_per_request"] + 0.5:
+            reasons.append("queries")
+        if result["errors"] > before["errors"]:
+            reasons.append("errors")
+        rows.append({
+            "scenario": result["scenario"],
+            "concurrency": result["concurrency"],
+            "throughput_change": result["requests_per_second"] / before["requests_per_second"] - 1,
+            "p95_change": result["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0,
+            "queries_change": result["queries_per_request"] - before["queries_per_request"],
+            "regressions": reasons,
+        })
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="End-to-end benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="benchmark the endpoints and print or save the results")
+    run_parser.add_argument("--products", type=int, default=10000)
+    run_parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS))
+    run_parser.add_argument("--concurrency", type=lambda value: [int(v) for v in value.split(",")], default=[1, 16])
+    run_parser.add_argument("--requests", type=int, default=500)
+    run_parser.add_argument("--warmup", type=int, default=20)
+    run_parser.add_argument("--disable-cache", action="store_true", help="send every read to the database")
+    run_parser.add_argument("--skip-conditional", action="store_true",
+                            help="skip measuring If-None-Match revalidation (304 latency and bytes saved)")
+    run_parser.add_argument("--output", help="write the results as JSON to this file")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions against a saved baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="relative change in throughput or p95 treated as a regression")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        unknown = set(args.scenarios) - set(SCENARIOS)
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        run(args)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    for row in rows:
+        flag = "REGRESSION (" + ", ".join(row["regressions"]) + ")" if row["regressions"] else "ok"
+        print(f"{row['scenario']:>15} c={row['concurrency']:<4} throughput {row['throughput_change']:+7.1%}  "
+              f"p95 {row['p95_change']:+7.1%}  queries {row['queries_change']:+.2f}  {flag}")
+    return 1 if any(row["regressions"] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+# tests/conftest.py
+# Author: Thanh Trieu
+# Description: Shared test configuration with local defaults for settings that are otherwise read from .env.
+
+import os
+import shutil
+import tempfile
+import pytest
+from dotenv import load_dotenv
+
+# Values from .env win; the defaults only let the app import without a configured environment
+load_dotenv()
+# A fresh SQLite file per session, so rows left by an earlier run never leak into this one. It has to exist
+# before the test modules import the app, which reads the URL at import time, hence no tmp_path_factory.
+_TEST_DATABASE_DIR = None
+if "SQLALCHEMY_DATABASE_URL" not in os.environ:
+    _TEST_DATABASE_DIR = tempfile.mkdtemp(prefix="inventory-test-")
+    os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{os.path.join(_TEST_DATABASE_DIR, 'inventory_test.db')}"
+os.environ.setdefault("DYNAMODB_TABLE_NAME", "APICallTracking")
+os.environ.setdefault("BUCKET_NAME", "inventory-management-test")
+
+@pytest.fixture(scope="session", autouse=True)
+def database_schema():
+    """Create the schema once per test session, as the deployment migration step would."""
+    from app.migrate import run_migrations
+    run_migrations()
+    yield
+    if _TEST_DATABASE_DIR:
+        shutil.rmtree(_TEST_DATABASE_DIR, ignore_errors=True)
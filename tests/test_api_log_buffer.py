@@ -0,0 +1,126 @@
+# tests/test_api_log_buffer.py
+# Author: Thanh Trieu
+# Description: Contains tests for the buffered, batched API call log pipeline against a moto DynamoDB table.
+
+import asyncio
+import time
+import boto3
+import pytest
+from moto import mock_aws
+from unittest.mock import patch
+
+from app.dynamodb import ApiCallLogBuffer
+
+@pytest.fixture
+def log_table(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    with mock_aws():
+        resource = boto3.resource('dynamodb', region_name='us-east-1')
+        table = resource.create_table(
+            TableName='APICallTrackingTest',
+            KeySchema=[
+                {'AttributeName': 'endpoint', 'KeyType': 'HASH'},
+                {'AttributeName': 'execution_time', 'KeyType': 'RANGE'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'endpoint', 'AttributeType': 'S'},
+                {'AttributeName': 'execution_time', 'AttributeType': 'S'}
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        yield table
+
+def make_record(i):
+    return {'endpoint': '/products/', 'status_code': '200', 'execution_time': str(i), 'timestamp': '0'}
+
+def test_flush_writes_in_batches_of_25(log_table):
+    buffer = ApiCallLogBuffer(log_table, flush_interval=60)
+    calls = []
+    original = log_table.meta.client.batch_write_item
+    def counting_batch_write_item(**kwargs):
+        calls.append(len(kwargs['RequestItems'][log_table.name]))
+        return original(**kwargs)
+
+    # Keep the background flusher from waking at 25 records and draining the queue before this flush
+    with patch.object(buffer, '_ensure_started'):
+        for i in range(60):
+            buffer.enqueue(make_record(i))
+    with patch.object(log_table.meta.client, 'batch_write_item', side_effect=counting_batch_write_item):
+        assert buffer.flush() == 60
+
+    assert calls == [25, 25, 10]
+    assert log_table.scan()['Count'] == 60
+    stats = buffer.stats()
+    assert stats['queued'] == 60
+    assert stats['flushed'] == 60
+    assert stats['pending'] == 0
+    buffer.shutdown()
+
+def test_drop_newest_when_queue_is_full(log_table):
+    buffer = ApiCallLogBuffer(log_table, max_queue_size=5, flush_interval=60)
+    results = [buffer.enqueue(make_record(i)) for i in range(8)]
+    assert results.count(False) == 3
+    assert buffer.stats()['dropped'] == 3
+    buffer.shutdown()
+    assert log_table.scan()['Count'] == 5
+
+def test_drop_oldest_keeps_latest_records(log_table):
+    buffer = ApiCallLogBuffer(log_table, max_queue_size=5, flush_interval=60, drop_policy='drop_oldest')
+    for i in range(8):
+        buffer.enqueue(make_record(i))
+    buffer.shutdown()
+    times = sorted(int(item['execution_time']) for item in log_table.scan()['Items'])
+    assert times == [3, 4, 5, 6, 7]
+    assert buffer.stats()['dropped'] == 3
+
+def test_failed_batches_are_counted(log_table):
+    buffer = ApiCallLogBuffer(log_table, flush_interval=60)
+    for i in range(30):
+        buffer.enqueue(make_record(i))
+    with patch.object(log_table.meta.client, 'batch_write_item', side_effect=RuntimeError('throttled')):
+        assert buffer.flush() == 0
+    stats = buffer.stats()
+    assert stats['failed'] == 30
+    assert stats['flushed'] == 0
+    assert stats['pending'] == 0
+    buffer.shutdown()
+
+def test_background_flusher_drains_on_size_threshold(log_table):
+    buffer = ApiCallLogBuffer(log_table, batch_size=10, flush_interval=60)
+    for i in range(10):
+        buffer.enqueue(make_record(i))
+    # The size threshold wakes the flusher well before the interval elapses
+    for _ in range(100):
+        if buffer.stats()['flushed'] == 10:
+            break
+        time.sleep(0.05)
+    assert buffer.stats()['flushed'] == 10
+    buffer.shutdown()
+
+def test_block_policy_waits_off_the_event_loop(log_table):
+    buffer = ApiCallLogBuffer(log_table, max_queue_size=1, flush_interval=60, drop_policy='block',
+                              block_timeout=0.3)
+
+    async def enqueue_while_ticking():
+        ticks = 0
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        ticker = asyncio.create_task(tick())
+        results = [await buffer.enqueue_async(make_record(i)) for i in range(2)]
+        ticker.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(enqueue_while_ticking())
+    # The second record waits out block_timeout on a full queue while the loop keeps running
+    assert results == [True, False]
+    assert ticks >= 10
+    assert buffer.stats()['dropped'] == 1
+    buffer.shutdown()
+
+def test_unknown_drop_policy_is_rejected(log_table):
+    with pytest.raises(ValueError):
+        ApiCallLogBuffer(log_table, drop_policy='spill')
@@ -0,0 +1,46 @@
+# tests/test_bootstrap.py
+# Author: Thanh Trieu
+# Description: Contains tests for lazy resource initialization and the warm-up hook.
+
+import importlib
+import sys
+import pytest
+
+from app import bootstrap
+from app.bootstrap import init_timings, lazy_resource, warm_up
+
+@pytest.fixture(autouse=True)
+def forget_test_resources():
+    yield
+    for name in ("test_counter", "test_broken"):
+        bootstrap._resources.pop(name, None)
+
+def test_resource_is_built_once_on_first_use():
+    calls = []
+
+    @lazy_resource("test_counter")
+    def get_counter():
+        calls.append(1)
+        return object()
+
+    assert calls == []
+    assert get_counter() is get_counter()
+    assert calls == [1]
+    assert init_timings()["test_counter"] is not None
+
+def test_warm_up_reports_failures_without_raising():
+    @lazy_resource("test_broken")
+    def get_broken():
+        raise RuntimeError("unreachable")
+
+    timings = warm_up(["test_broken"])
+    assert timings == {"test_broken": None}
+
+def test_importing_cognito_utils_does_not_fetch_jwks(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("JWKS fetched at import time")
+
+    monkeypatch.setattr("requests.get", fail)
+    sys.modules.pop("app.utils.cognito_utils", None)
+    module = importlib.import_module("app.utils.cognito_utils")
+    assert not module.get_public_keys.resource.initialized
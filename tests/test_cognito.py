@@ -1,74 +1,168 @@
 # tests/test_cognito.py
 
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 from fastapi import HTTPException
-from app.utils.cognito_utils import verify_token, get_current_user
-from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
-from unittest.mock import patch, MagicMock
-
-# Mocking environment variables
-@pytest.fixture(autouse=True)
-def mock_env_vars(monkeypatch):
-    monkeypatch.setenv('COGNITO_USER_POOL_ID', 'us-east-1_Cfl7YFwsG')
-    monkeypatch.setenv('COGNITO_APP_CLIENT_ID', 'erthhvp4uv179lo1qa2isr3vd')
-    monkeypatch.setenv('COGNITO_REGION', 'us-east-1')
-    monkeypatch.setenv('JWT_ALGORITHM', 'HS256')  # Using HS256 for testing
-
-# Mocking the public keys
+from app.utils import cognito_utils
+from app.utils.cognito_utils import JwksKeyStore, VerifiedTokenCache, verify_token, get_current_user
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from unittest.mock import patch
+
+APP_CLIENT_ID = 'erthhvp4uv179lo1qa2isr3vd'
+SECRET = 'mocked_secret'
+
+def oct_jwk(kid, secret):
+    encoded = base64.urlsafe_b64encode(secret.encode()).decode().rstrip('=')
+    return {'kid': kid, 'kty': 'oct', 'use': 'sig', 'k': encoded}
+
+def rsa_key_pair(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public_jwk = jwk.construct(private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode(), 'RS256').to_dict()
+    public_jwk.update(kid=kid, use='sig')
+    return private_pem, public_jwk
+
+# Serves a JWKS document from a local HTTP server and counts how often it is fetched
+class JwksServer:
+    def __init__(self, keys):
+        self.keys = keys
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                time.sleep(0.05)  # Keep fetches slow enough for concurrent requests to overlap
+                body = json.dumps({'keys': server.keys}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/.well-known/jwks.json"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
 @pytest.fixture
-def mock_public_keys():
-    return [
-        {
-            'kid': 'mocked_key_id',
-            'kty': 'oct',
-            'use': 'sig',
-            'k': 'mocked_secret'
-        }
-    ]
+def jwks_server(monkeypatch):
+    """Point token verification at a locally served JWKS with fresh key and token caches."""
+    server = JwksServer([oct_jwk('mocked_key_id', SECRET)])
+    store = JwksKeyStore(fetch_keys=lambda: cognito_utils.get_cognito_public_keys(server.url),
+                         min_refresh_interval=0)
+    monkeypatch.setattr(cognito_utils, 'jwks_key_store', store)
+    monkeypatch.setattr(cognito_utils, 'verified_token_cache', VerifiedTokenCache())
+    monkeypatch.setattr(cognito_utils, 'COGNITO_APP_CLIENT_ID', APP_CLIENT_ID)
+    yield server
+    server.close()
 
 # Mocking the JWT payload
 @pytest.fixture
 def mock_jwt_payload():
+    now = int(time.time())
     return {
         'sub': '1234567890',
         'name': 'John Doe',
-        'iat': 1516239022,
-        'exp': 1516242622,
-        'aud': 'erthhvp4uv179lo1qa2isr3vd'
+        'iat': now,
+        'exp': now + 3600,
+        'aud': APP_CLIENT_ID
     }
 
-# Mocking the requests.get method to return mocked public keys
-@pytest.fixture
-def mock_requests_get(mock_public_keys):
-    with patch('requests.get') as mock_get:
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {'keys': mock_public_keys}
-        mock_get.return_value = mock_response
-        yield mock_get
-
 # Test verifying a valid token
-def test_verify_token_valid(mock_requests_get, mock_jwt_payload):
-    secret = 'mocked_secret'
-    token = jwt.encode(mock_jwt_payload, secret, algorithm='HS256', headers={'kid': 'mocked_key_id'})
-    with patch('app.utils.cognito_utils.PUBLIC_KEYS', [{'kid': 'mocked_key_id', 'kty': 'oct', 'use': 'sig', 'k': secret}]):
-        payload = verify_token(token, algorithm='HS256')
-        assert payload == mock_jwt_payload
+def test_verify_token_valid(jwks_server, mock_jwt_payload):
+    token = jwt.encode(mock_jwt_payload, SECRET, algorithm='HS256', headers={'kid': 'mocked_key_id'})
+    payload = verify_token(token, algorithm='HS256')
+    assert payload == mock_jwt_payload
 
 # Test verifying an invalid token
-def test_verify_token_invalid(mock_requests_get):
+def test_verify_token_invalid(jwks_server):
     token = 'invalid_token'
-    with patch('app.utils.cognito_utils.PUBLIC_KEYS', [{'kid': 'mocked_key_id', 'kty': 'oct', 'use': 'sig', 'k': 'mocked_secret'}]):
-        with pytest.raises(HTTPException) as excinfo:
-            verify_token(token, algorithm='HS256')
-        assert excinfo.value.status_code == 401
-        assert excinfo.value.detail == 'Invalid token.'
+    with pytest.raises(HTTPException) as excinfo:
+        verify_token(token, algorithm='HS256')
+    assert excinfo.value.status_code == 401
+    assert excinfo.value.detail == 'Invalid token.'
 
 # Test getting current user
-def test_get_current_user(mock_requests_get, mock_jwt_payload):
-    secret = 'mocked_secret'
-    token = jwt.encode(mock_jwt_payload, secret, algorithm='HS256', headers={'kid': 'mocked_key_id'})
-    with patch('app.utils.cognito_utils.PUBLIC_KEYS', [{'kid': 'mocked_key_id', 'kty': 'oct', 'use': 'sig', 'k': secret}]):
+def test_get_current_user(jwks_server, mock_jwt_payload):
+    token = jwt.encode(mock_jwt_payload, SECRET, algorithm='HS256', headers={'kid': 'mocked_key_id'})
+    with patch.object(cognito_utils, 'JWT_ALGORITHM', 'HS256'):
         user = get_current_user(token)
-        assert user == mock_jwt_payload
+    assert user == mock_jwt_payload
+
+# Test verifying an RS256 token against the served public key
+def test_verify_token_rs256(jwks_server, mock_jwt_payload):
+    private_pem, public_jwk = rsa_key_pair('rsa_key_id')
+    jwks_server.keys = [public_jwk]
+    token = jwt.encode(mock_jwt_payload, private_pem, algorithm='RS256', headers={'kid': 'rsa_key_id'})
+    assert verify_token(token, algorithm='RS256') == mock_jwt_payload
+
+# Test that a repeated token is served from the verified-token cache
+def test_repeated_token_skips_signature_verification(jwks_server, mock_jwt_payload):
+    token = jwt.encode(mock_jwt_payload, SECRET, algorithm='HS256', headers={'kid': 'mocked_key_id'})
+    with patch.object(cognito_utils.jwt, 'decode', wraps=jwt.decode) as decode:
+        for _ in range(5):
+            assert verify_token(token, algorithm='HS256') == mock_jwt_payload
+    assert decode.call_count == 1
+    assert jwks_server.requests == 1
+
+# Test that cached payloads are dropped once the token expires
+def test_cached_payload_expires_with_token():
+    now = [1000.0]
+    cache = VerifiedTokenCache(clock=lambda: now[0])
+    cache.put('token', {'sub': '1', 'exp': 1060})
+    assert cache.get('token') == {'sub': '1', 'exp': 1060}
+    now[0] = 1060.0
+    assert cache.get('token') is None
+
+# Test that a rotated signing key is picked up on an unknown kid
+def test_unknown_kid_refreshes_keys(jwks_server, mock_jwt_payload):
+    verify_token(jwt.encode(mock_jwt_payload, SECRET, algorithm='HS256', headers={'kid': 'mocked_key_id'}),
+                 algorithm='HS256')
+    jwks_server.keys = [oct_jwk('rotated_key_id', 'rotated_secret')]
+    token = jwt.encode(mock_jwt_payload, 'rotated_secret', algorithm='HS256', headers={'kid': 'rotated_key_id'})
+    assert verify_token(token, algorithm='HS256') == mock_jwt_payload
+    assert jwks_server.requests == 2
+
+# Test that a burst of tokens with an unknown kid triggers a single fetch
+def test_unknown_kid_burst_fetches_once(jwks_server, mock_jwt_payload):
+    cognito_utils.jwks_key_store.refresh()
+    jwks_server.keys = [oct_jwk('rotated_key_id', 'rotated_secret')]
+    results = []
+
+    def verify(i):
+        payload = dict(mock_jwt_payload, sub=str(i))
+        token = jwt.encode(payload, 'rotated_secret', algorithm='HS256', headers={'kid': 'rotated_key_id'})
+        results.append(verify_token(token, algorithm='HS256')['sub'])
+
+    threads = [threading.Thread(target=verify, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results, key=int) == [str(i) for i in range(10)]
+    assert jwks_server.requests == 2
+
+# Test that an unknown kid is rejected after refreshing
+def test_unknown_kid_is_rejected(jwks_server, mock_jwt_payload):
+    token = jwt.encode(mock_jwt_payload, SECRET, algorithm='HS256', headers={'kid': 'missing_key_id'})
+    with pytest.raises(HTTPException) as excinfo:
+        verify_token(token, algorithm='HS256')
+    assert excinfo.value.status_code == 401
+    assert excinfo.value.detail == 'Public key not found.'
@@ -0,0 +1,109 @@
+# tests/test_conditional.py
+# Author: Thanh Trieu
+# Description: Contains tests for product versions, ETags, If-None-Match revalidation and If-Match updates.
+
+from fastapi.testclient import TestClient
+
+from app.conditional import expected_version, matches, row_etag
+from app.main import app
+from app.pagination import encode_cursor
+
+client = TestClient(app)
+
+def _create(name: str = "Tagged Product", stock: int = 5) -> int:
+    return client.post(
+        "/products/",
+        data={"name": name, "description": "Conditional", "price": 1.0, "stock": stock}
+    ).json()["id"]
+
+def _update(product_id: int, headers: dict = None, stock: int = 5):
+    return client.put(
+        f"/products/{product_id}",
+        json={"name": "Tagged Product", "description": "Changed", "price": 2.0, "stock": stock},
+        headers=headers or {}
+    )
+
+def test_product_etag_revalidates_with_304():
+    product_id = _create()
+    response = client.get(f"/products/{product_id}")
+    assert response.json()["version"] == 1
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    cached = client.get(f"/products/{product_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+
+    _update(product_id)
+    changed = client.get(f"/products/{product_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["version"] == 2
+    assert changed.headers["ETag"] != etag
+
+def test_inventory_etag_changes_with_stock():
+    product_id = _create(stock=3)
+    etag = client.get(f"/inventory/{product_id}").headers["ETag"]
+    assert client.get(f"/inventory/{product_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/orders/", json={"total_amount": 1.0, "items": [{"product_id": product_id, "quantity": 1}]})
+    response = client.get(f"/inventory/{product_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["stock"] == 2
+
+def test_list_pages_revalidate_with_304():
+    # Page from just before this test's own products so the pages only hold rows it created
+    first, second = _create(), _create()
+    cursor = encode_cursor(first - 1)
+    for path in ("/products/", "/inventory"):
+        params = {"limit": 2, "cursor": cursor}
+        response = client.get(path, params=params)
+        assert [row.get("id", row.get("product_id")) for row in response.json()] == [first, second]
+        cached = client.get(path, params=params, headers={"If-None-Match": response.headers["ETag"]})
+        assert cached.status_code == 304
+        assert cached.headers.get("X-Next-Cursor") == response.headers.get("X-Next-Cursor")
+
+    params = {"limit": 1, "cursor": cursor}
+    response = client.get("/products/", params=params)
+    assert _update(first, stock=9).status_code == 200
+    changed = client.get("/products/", params=params, headers={"If-None-Match": response.headers["ETag"]})
+    assert changed.status_code == 200
+
+def test_update_with_if_match():
+    product_id = _create()
+    etag = client.get(f"/products/{product_id}").headers["ETag"]
+
+    response = _update(product_id, headers={"If-Match": etag}, stock=7)
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+
+    stale = _update(product_id, headers={"If-Match": etag}, stock=1)
+    assert stale.status_code == 412
+    assert client.get(f"/products/{product_id}").json()["stock"] == 7
+
+    assert _update(product_id, headers={"If-Match": "*"}).status_code == 200
+    assert _update(product_id, headers={"If-Match": 'W/"not-a-tag"'}).status_code == 412
+
+def test_update_and_delete_of_a_missing_product():
+    missing_id = _create() + 100000
+    assert _update(missing_id).status_code == 404
+    assert _update(missing_id, headers={"If-Match": "*"}).status_code == 412
+    assert client.delete(f"/products/{missing_id}").status_code == 404
+
+def test_if_match_sees_orders_on_sharded_stock():
+    product_id = _create(stock=10)
+    client.put(f"/inventory/{product_id}/shards", json={"shards": 2})
+    etag = client.get(f"/products/{product_id}").headers["ETag"]
+    client.post("/orders/", json={"total_amount": 1.0, "items": [{"product_id": product_id, "quantity": 1}]})
+    assert _update(product_id, headers={"If-Match": etag}, stock=10).status_code == 412
+
+def test_etag_helpers():
+    row = {"id": 4, "version": 3, "stock": 9, "image_url": None, "image_variants": None}
+    assert row_etag(row) == 'W/"4.3.9"'
+    assert row_etag(dict(row, image_url="https://example.com/a.png")).startswith('W/"4.3.9.')
+    assert matches('"4.3.9", W/"1.1.1"', 'W/"4.3.9"')
+    assert matches("*", 'W/"4.3.9"')
+    assert not matches(None, 'W/"4.3.9"')
+    assert not matches('W/"4.2.9"', 'W/"4.3.9"')
+    assert expected_version('W/"4.3.9"', 4) == (3, 9)
+    assert expected_version(None, 4) is None
@@ -0,0 +1,76 @@
+# tests/test_db_pool.py
+# Author: Thanh Trieu
+# Description: Contains tests for the connection pool strategies and pool instrumentation.
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import NullPool, QueuePool
+
+from app.db_pool import PoolMetrics, pool_options, resolve_pool_strategy
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'pool.db'}"
+
+def make_engine(url, strategy, metrics, **overrides):
+    options = pool_options(strategy, metrics)
+    options.update(overrides)
+    engine = create_engine(url, **options)
+    metrics.attach(engine)
+    return engine
+
+def test_auto_strategy_follows_runtime(monkeypatch):
+    monkeypatch.delenv('AWS_LAMBDA_FUNCTION_NAME', raising=False)
+    assert resolve_pool_strategy('auto') == 'queue'
+    monkeypatch.setenv('AWS_LAMBDA_FUNCTION_NAME', 'inventory-management-backend-dev-app')
+    assert resolve_pool_strategy('auto') == 'single'
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        resolve_pool_strategy('bottomless')
+
+def test_single_strategy_keeps_one_pre_pinged_connection(database_url):
+    metrics = PoolMetrics()
+    engine = make_engine(database_url, 'single', metrics)
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == 1
+    assert engine.pool._pre_ping
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text('select 1'))
+    stats = metrics.snapshot()
+    assert stats['connects'] == 1
+    assert stats['checkouts'] == 3
+    assert stats['checked_out'] == 0
+    engine.dispose()
+
+def test_null_strategy_opens_a_connection_per_checkout(database_url):
+    metrics = PoolMetrics()
+    engine = make_engine(database_url, 'null', metrics)
+    assert isinstance(engine.pool, NullPool)
+    for _ in range(2):
+        with engine.connect() as connection:
+            connection.execute(text('select 1'))
+    assert metrics.snapshot()['connects'] == 2
+    engine.dispose()
+
+def test_overflow_wait_and_invalidations_are_recorded(database_url):
+    metrics = PoolMetrics()
+    engine = make_engine(database_url, 'queue', metrics, pool_size=1, max_overflow=1, pool_timeout=0.1)
+    first = engine.connect()
+    second = engine.connect()
+    assert metrics.snapshot()['overflow_peak'] == 1
+    assert metrics.snapshot()['checked_out'] == 2
+
+    # Pool and overflow are both in use, so the next checkout waits for the timeout
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    assert metrics.snapshot()['wait_time_max'] >= 0.1
+
+    second.invalidate()
+    second.close()
+    first.close()
+    stats = metrics.snapshot()
+    assert stats['invalidations'] == 1
+    assert stats['checked_out'] == 0
+    engine.dispose()
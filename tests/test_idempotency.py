@@ -0,0 +1,99 @@
+# tests/test_idempotency.py
+# Author: Thanh Trieu
+# Description: Contains tests for Idempotency-Key handling on order creation and the expiry sweep.
+
+import uuid
+from datetime import timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app import crud, idempotency, models, schemas
+from app.database import SessionLocal
+from app.main import app
+
+client = TestClient(app)
+
+def _product(stock: int = 10) -> int:
+    return client.post(
+        "/products/",
+        data={"name": "Idempotent Product", "description": "For retries", "price": 2.0, "stock": stock}
+    ).json()["id"]
+
+def _stock(product_id: int) -> int:
+    return client.get(f"/inventory/{product_id}").json()["stock"]
+
+def _order_count() -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).select_from(models.Order))
+
+def test_retry_with_same_key_replays_the_order():
+    product_id = _product()
+    body = {"total_amount": 4.0, "items": [{"product_id": product_id, "quantity": 2}]}
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    first = client.post("/orders/", json=body, headers=headers)
+    orders = _order_count()
+    retry = client.post("/orders/", json=body, headers=headers)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert _stock(product_id) == 8
+    assert _order_count() == orders
+
+def test_key_reused_with_different_body_is_rejected():
+    product_id = _product()
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    client.post("/orders/", json={"total_amount": 2.0, "items": [{"product_id": product_id, "quantity": 1}]},
+                headers=headers)
+    response = client.post("/orders/", json={"total_amount": 4.0, "items": [{"product_id": product_id, "quantity": 2}]},
+                           headers=headers)
+    assert response.status_code == 422
+    assert _stock(product_id) == 9
+
+def test_failed_orders_are_not_remembered():
+    product_id = _product(stock=1)
+    body = {"total_amount": 2.0, "items": [{"product_id": product_id, "quantity": 2}]}
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    assert client.post("/orders/", json=body, headers=headers).status_code == 400
+    client.put(f"/products/{product_id}", json={"name": "Idempotent Product", "description": "For retries",
+                                                "price": 2.0, "stock": 5})
+    assert client.post("/orders/", json=body, headers=headers).status_code == 200
+
+def test_concurrent_duplicate_returns_the_winner(monkeypatch):
+    product_id = _product()
+    order = schemas.OrderCreate(total_amount=2.0, items=[schemas.OrderItemCreate(product_id=product_id, quantity=1)])
+    key, fingerprint = str(uuid.uuid4()), idempotency.request_hash(order)
+    with SessionLocal() as db:
+        winner, replayed = crud.create_order_once(db, order, key, fingerprint)
+    assert not replayed
+
+    # The loser checked for the key before the winner committed, so it only finds out on insert
+    real_find = idempotency.find_response
+    lookups = []
+    def find_after_race(*args):
+        lookups.append(args)
+        return None if len(lookups) == 1 else real_find(*args)
+    monkeypatch.setattr(idempotency, "find_response", find_after_race)
+
+    with SessionLocal() as db:
+        loser, replayed = crud.create_order_once(db, order, key, fingerprint)
+    assert replayed
+    assert loser == winner
+    assert _stock(product_id) == 9
+
+def test_sweep_removes_only_expired_keys():
+    expired_at = models.utcnow() - timedelta(hours=idempotency.IDEMPOTENCY_KEY_TTL_HOURS + 1)
+    prefix = str(uuid.uuid4())
+    with SessionLocal() as db:
+        for i in range(5):
+            db.add(models.IdempotencyKey(key=f"{prefix}-old-{i}", request_hash="x", response={},
+                                         created_at=expired_at))
+        db.add(models.IdempotencyKey(key=f"{prefix}-new", request_hash="x", response={}))
+        db.commit()
+        assert idempotency.sweep_expired_keys(db, batch_size=2) >= 5
+        remaining = db.scalars(
+            select(models.IdempotencyKey.key).where(models.IdempotencyKey.key.startswith(prefix))
+        ).all()
+    assert remaining == [f"{prefix}-new"]
@@ -0,0 +1,73 @@
+# tests/test_image_utils.py
+# Author: Thanh Trieu
+# Description: Contains tests for product image variant generation.
+
+import io
+import os
+import boto3
+import pytest
+from fastapi.testclient import TestClient
+from moto import mock_aws
+from PIL import Image
+
+from app.main import app
+from app.utils import image_utils, s3_utils
+from app.utils.image_utils import render_variants, variant_key
+
+client = TestClient(app)
+
+IMAGE_PATH = os.path.join(os.path.dirname(__file__), 'psyduck.png')
+
+def test_variant_keys_sit_next_to_the_original():
+    assert variant_key('products/1/psyduck.png', 'thumbnail') == 'products/1/psyduck_thumbnail.jpg'
+    assert variant_key('products/1/psyduck.png', 'webp') == 'products/1/psyduck_webp.webp'
+
+def test_render_variants_resizes_and_recompresses():
+    with open(IMAGE_PATH, 'rb') as f:
+        original = f.read()
+    variants = render_variants(original)
+    assert set(variants) == {'thumbnail', 'medium', 'webp'}
+    thumbnail, content_type = variants['thumbnail']
+    assert content_type == 'image/jpeg'
+    with Image.open(io.BytesIO(thumbnail)) as image:
+        assert image.format == 'JPEG'
+        assert max(image.size) == 256
+    with Image.open(io.BytesIO(variants['webp'][0])) as image:
+        assert image.format == 'WEBP'
+    assert len(thumbnail) * 4 < len(original)
+
+@pytest.fixture
+def s3_bucket(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    with mock_aws():
+        s3_utils.get_s3_client.resource.reset()
+        s3_utils.presigned_url_cache.clear()
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=s3_utils.get_bucket_name())
+        yield client
+    s3_utils.get_s3_client.resource.reset()
+    s3_utils.presigned_url_cache.clear()
+
+def test_upload_generates_variants_after_the_response(s3_bucket):
+    product_id = client.post(
+        "/products/",
+        data={"name": "Variant Product", "description": "Has a thumbnail", "price": 1.0, "stock": 1}
+    ).json()["id"]
+    generated = image_utils.stats()["generated"]
+    with open(IMAGE_PATH, 'rb') as f:
+        response = client.post(f"/products/{product_id}/upload-image/", files={"file": ("psyduck.png", f, "image/png")})
+    assert response.status_code == 200
+    assert image_utils.stats()["generated"] == generated + 1
+
+    keys = {item['Key'] for item in s3_bucket.list_objects_v2(Bucket=s3_utils.get_bucket_name())['Contents']}
+    assert f"products/{product_id}/psyduck_thumbnail.jpg" in keys
+
+    product = client.get(f"/products/{product_id}").json()
+    assert set(product["image_variants"]) == {'thumbnail', 'medium', 'webp'}
+    assert f"products/{product_id}/psyduck_thumbnail.jpg" in product["image_variants"]["thumbnail"]
+    assert "Signature" in product["image_variants"]["thumbnail"]
+
+    # Later tests list products without AWS credentials, so don't leave an S3 image behind
+    client.delete(f"/products/{product_id}")
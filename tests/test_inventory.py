@@ -38,3 +38,133 @@ def test_read_inventory_product():
     inventory_data = inventory_response.json()
     assert inventory_data["product_id"] == product_id
     assert inventory_data["stock"] == 15
+
+def test_read_inventory_with_cursor():
+    """
+    Test walking the inventory with keyset cursors returned in the X-Next-Cursor header.
+    """
+    for i in range(3):
+        client.post(
+            "/products/",
+            data={"name": f"Cursor Product {i}", "description": "For cursor paging", "price": 1.0, "stock": i}
+        )
+
+    first_page = client.get("/inventory?limit=2")
+    assert first_page.status_code == 200
+    cursor = first_page.headers["X-Next-Cursor"]
+
+    second_page = client.get(f"/inventory?limit=2&cursor={cursor}")
+    assert second_page.status_code == 200
+    first_ids = [item["product_id"] for item in first_page.json()]
+    second_ids = [item["product_id"] for item in second_page.json()]
+    assert second_ids and min(second_ids) > max(first_ids)
+
+def test_read_inventory_with_invalid_cursor():
+    """
+    Test that a malformed cursor is rejected.
+    """
+    response = client.get("/inventory?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+def test_export_inventory_csv():
+    """
+    Test streaming the inventory as CSV.
+    """
+    create_response = client.post(
+        "/products/",
+        data={"name": "Exported Product", "description": "For export", "price": 4.5, "stock": 7}
+    )
+    product_id = create_response.json()["id"]
+
+    response = client.get("/inventory/export?format=csv")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.strip().splitlines()
+    assert lines[0] == "product_id,stock"
+    assert f"{product_id},7" in lines
+
+def test_read_inventory_batch():
+    """
+    Test looking up several products at once, with unknown IDs reported as missing.
+    """
+    ids = [
+        client.post(
+            "/products/",
+            data={"name": f"Batch Product {i}", "description": "For batch lookup", "price": 1.0, "stock": i + 3}
+        ).json()["id"]
+        for i in range(2)
+    ]
+    missing_id = ids[-1] + 100000
+
+    response = client.get(f"/inventory/batch?ids={ids[1]},{missing_id},{ids[0]},{ids[1]}")
+    assert response.status_code == 200
+    assert response.json() == {
+        "items": [{"product_id": ids[1], "stock": 4, "version": 1}, {"product_id": ids[0], "stock": 3, "version": 1}],
+        "missing": [missing_id],
+    }
+
+    posted = client.post("/inventory/batch", json={"ids": [ids[1], missing_id, ids[0]]})
+    assert posted.status_code == 200
+    assert posted.json() == response.json()
+
+def test_read_inventory_batch_rejects_bad_ids():
+    """
+    Test that malformed, empty and oversized ID lists are rejected.
+    """
+    assert client.get("/inventory/batch?ids=1,two").status_code == 400
+    assert client.post("/inventory/batch", json={"ids": []}).status_code == 400
+    too_many = ",".join(str(i) for i in range(1, 1000))
+    assert client.get(f"/inventory/batch?ids={too_many}").status_code == 400
+
+def test_adjust_inventory():
+    """
+    Test applying deltas and absolute levels to several products in one call, with per-line results.
+    """
+    ids = [
+        client.post(
+            "/products/",
+            data={"name": f"Adjusted Product {i}", "description": "For stock adjustments", "price": 1.0, "stock": 10}
+        ).json()["id"]
+        for i in range(3)
+    ]
+    client.put(f"/inventory/{ids[2]}/shards", json={"shards": 3})
+    missing_id = ids[-1] + 100000
+
+    response = client.patch("/inventory", json={"adjustments": [
+        {"product_id": ids[0], "delta": 5},
+        {"product_id": ids[1], "absolute": 2},
+        {"product_id": ids[1], "delta": -3},
+        {"product_id": missing_id, "delta": 1},
+        {"product_id": ids[2], "delta": -4},
+        {"product_id": ids[0], "delta": -1},
+    ]})
+    assert response.status_code == 200
+    assert response.json() == {
+        "applied": 4,
+        "rejected": 1,
+        "not_found": 1,
+        "results": [
+            {"product_id": ids[0], "status": "applied", "stock": 15},
+            {"product_id": ids[1], "status": "applied", "stock": 2},
+            {"product_id": ids[1], "status": "rejected", "stock": 2},
+            {"product_id": missing_id, "status": "not_found", "stock": None},
+            {"product_id": ids[2], "status": "applied", "stock": 6},
+            {"product_id": ids[0], "status": "applied", "stock": 14},
+        ],
+    }
+    assert [client.get(f"/inventory/{product_id}").json()["stock"] for product_id in ids] == [14, 2, 6]
+    assert client.get(f"/inventory/{ids[0]}").json()["version"] == 2
+
+    allowed = client.patch("/inventory", json={"adjustments": [{"product_id": ids[1], "delta": -3}],
+                                               "allow_negative": True})
+    assert allowed.json()["results"] == [{"product_id": ids[1], "status": "applied", "stock": -1}]
+
+def test_adjust_inventory_rejects_bad_lines():
+    """
+    Test that lines need exactly one of delta or absolute, and that empty batches are rejected.
+    """
+    assert client.patch("/inventory", json={"adjustments": [{"product_id": 1}]}).status_code == 422
+    assert client.patch("/inventory", json={"adjustments": [{"product_id": 1, "delta": 1, "absolute": 1}]}
+                        ).status_code == 422
+    assert client.patch("/inventory", json={"adjustments": [{"product_id": 1, "absolute": -1}]}).status_code == 422
+    assert client.patch("/inventory", json={"adjustments": []}).status_code == 400
@@ -0,0 +1,168 @@
+# tests/test_low_stock.py
+# Author: Thanh Trieu
+# Description: Contains tests for reorder thresholds, the low-stock watchlist and its event feed.
+
+import json
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app import low_stock, models
+from app.database import SessionLocal
+from app.low_stock import rebuild_watchlist
+from app.main import app
+
+client = TestClient(app)
+
+def _create(name: str, stock: int, reorder_threshold: int = None) -> int:
+    data = {"name": name, "description": "Reorderable", "price": 1.0, "stock": stock}
+    if reorder_threshold is not None:
+        data["reorder_threshold"] = reorder_threshold
+    response = client.post("/products/", data=data)
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def _order(product_id: int, quantity: int):
+    response = client.post("/orders/", json={"total_amount": 1.0,
+                                             "items": [{"product_id": product_id, "quantity": quantity}]})
+    assert response.status_code == 200
+
+def _restock(product_id: int, stock: int):
+    response = client.put(f"/products/{product_id}",
+                          json={"name": "Restocked", "description": "Reorderable", "price": 1.0, "stock": stock})
+    assert response.status_code == 200
+    return response
+
+def _page_params(cursor) -> dict:
+    return {"limit": 1000, **({"cursor": cursor} if cursor else {})}
+
+def _listed(product_id: int):
+    items, cursor = [], None
+    while True:
+        response = client.get("/inventory/low-stock", params=_page_params(cursor))
+        assert response.status_code == 200
+        items.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    return next((item for item in items if item["product_id"] == product_id), None)
+
+def _events_after(cursor, product_id: int):
+    response = client.get("/inventory/low-stock/events", params=_page_params(cursor))
+    assert response.status_code == 200
+    return [event for event in response.json() if event["product_id"] == product_id], \
+        response.headers.get("X-Next-Cursor", cursor)
+
+def _latest_cursor():
+    cursor = None
+    while True:
+        response = client.get("/inventory/low-stock/events", params=_page_params(cursor))
+        if not response.json():
+            return cursor
+        cursor = response.headers["X-Next-Cursor"]
+
+def test_orders_and_restocks_cross_the_threshold():
+    cursor = _latest_cursor()
+    product_id = _create("Watched Product", 10, reorder_threshold=3)
+    assert _listed(product_id) is None
+
+    _order(product_id, 6)
+    assert _listed(product_id) is None
+    _order(product_id, 1)
+    item = _listed(product_id)
+    assert item["stock"] == 3 and item["reorder_threshold"] == 3
+    _order(product_id, 1)
+    assert _listed(product_id)["stock"] == 2
+
+    _restock(product_id, 20)
+    assert _listed(product_id) is None
+    assert client.get(f"/products/{product_id}").json()["reorder_threshold"] == 3
+
+    events, cursor = _events_after(cursor, product_id)
+    assert [(event["event"], event["stock"]) for event in events] == [("low", 3), ("cleared", 20)]
+    # Polling from the returned cursor only sees what happened since
+    assert _events_after(cursor, product_id)[0] == []
+    _order(product_id, 17)
+    assert [event["event"] for event in _events_after(cursor, product_id)[0]] == ["low"]
+
+def test_products_without_a_threshold_are_never_listed():
+    product_id = _create("Unwatched Product", 1)
+    _order(product_id, 1)
+    assert _listed(product_id) is None
+
+def test_threshold_changes_and_deletes_update_the_watchlist():
+    cursor = _latest_cursor()
+    product_id = _create("Rethresholded Product", 5)
+    response = client.put(f"/products/{product_id}", json={"name": "Rethresholded Product", "description": "x",
+                                                          "price": 1.0, "stock": 5, "reorder_threshold": 5})
+    assert response.json()["reorder_threshold"] == 5
+    assert _listed(product_id)["stock"] == 5
+
+    client.delete(f"/products/{product_id}")
+    assert _listed(product_id) is None
+    events, _ = _events_after(cursor, product_id)
+    assert [(event["event"], event["stock"]) for event in events] == [("low", 5), ("cleared", None)]
+
+def test_sharded_stock_is_tracked():
+    product_id = _create("Sharded Watched Product", 8, reorder_threshold=4)
+    client.put(f"/inventory/{product_id}/shards", json={"shards": 2})
+    _order(product_id, 4)
+    assert _listed(product_id)["stock"] == 4
+
+def _import(body: str, filename: str, params: dict = None) -> dict:
+    response = client.post("/products/bulk", params=params or {}, files={"file": (filename, body.encode())})
+    assert response.status_code == 200
+    return response.json()
+
+def _exported_id(name: str) -> int:
+    exported = [json.loads(line) for line in client.get("/products/export").text.splitlines()]
+    return next(row["id"] for row in exported if row["name"] == name)
+
+def test_bulk_imported_products_are_tracked():
+    low, unwatched = f"Imported Low {uuid.uuid4()}", f"Imported Unwatched {uuid.uuid4()}"
+    report = _import("name,description,price,stock,reorder_threshold\n"
+                     f"{low},Imported,1.0,2,5\n{unwatched},Imported,1.0,0,\n", "products.csv")
+    assert report["inserted"] == 2 and report["failed"] == 0
+    low_id, unwatched_id = _exported_id(low), _exported_id(unwatched)
+    assert _listed(low_id)["reorder_threshold"] == 5
+    assert _listed(unwatched_id) is None
+
+    # An upsert row without the column keeps the threshold; one that sets it is tracked too
+    body = "\n".join([json.dumps({"name": low, "description": "Recounted", "price": 1.0, "stock": 4}),
+                      json.dumps({"name": unwatched, "description": "Watched", "price": 1.0, "stock": 0,
+                                  "reorder_threshold": 1})])
+    assert _import(body, "products.ndjson", {"upsert_on": "name"})["updated"] == 2
+    assert _listed(low_id)["stock"] == 4
+    assert _listed(unwatched_id)["reorder_threshold"] == 1
+
+def test_rebuild_catches_changes_made_outside_the_api():
+    product_id = _create("Rebuilt Product", 10, reorder_threshold=2)
+    with SessionLocal() as db:
+        db.execute(update(models.Product).where(models.Product.id == product_id)
+                   .values(stock=1, version=models.Product.version + 1))
+        db.commit()
+        assert _listed(product_id) is None
+        result = rebuild_watchlist(db)
+    assert result["listed"] >= 1
+    assert _listed(product_id)["stock"] == 1
+
+def test_events_are_only_written_when_the_transaction_commits():
+    cursor = _latest_cursor()
+    product_id = _create("Rolled Back Product", 10, reorder_threshold=2)
+    with SessionLocal() as db:
+        db.execute(update(models.Product).where(models.Product.id == product_id)
+                   .values(stock=1, version=models.Product.version + 1))
+        low_stock.track(db, [product_id])
+        assert db.info[low_stock._PENDING_EVENTS]
+        db.rollback()
+        assert low_stock._PENDING_EVENTS not in db.info
+    assert _listed(product_id) is None
+    assert _events_after(cursor, product_id)[0] == []
+
+    _order(product_id, 8)
+    assert [event["event"] for event in _events_after(cursor, product_id)[0]] == ["low"]
+
+def test_low_stock_rejects_bad_cursor():
+    assert client.get("/inventory/low-stock", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/inventory/low-stock/events", params={"cursor": "not-a-cursor"}).status_code == 400
@@ -0,0 +1,37 @@
+# tests/test_migrate.py
+# Author: Thanh Trieu
+# Description: Contains tests for the schema migration step.
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.migrate import run_migrations
+
+def test_adds_columns_missing_from_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE products (id INTEGER PRIMARY KEY, name VARCHAR, description VARCHAR, "
+            "price FLOAT, stock INTEGER, image_url VARCHAR)"
+        ))
+        connection.execute(text("INSERT INTO products (name, stock) VALUES ('Old Product', 3)"))
+    run_migrations(engine)
+    assert "stock_shards" in {column["name"] for column in inspect(engine).get_columns("products")}
+    assert "product_stock_shards" in inspect(engine).get_table_names()
+    assert "ix_products_reorder_threshold" in {index["name"] for index in inspect(engine).get_indexes("products")}
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT stock_shards FROM products")).scalar() == 0
+    # Running again is a no-op
+    run_migrations(engine)
+    engine.dispose()
+
+def test_adds_indexes_missing_from_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE order_items (id INTEGER PRIMARY KEY, order_id INTEGER, product_id INTEGER, quantity INTEGER)"
+        ))
+    run_migrations(engine)
+    indexes = {index["name"] for index in inspect(engine).get_indexes("order_items")}
+    assert {"ix_order_items_order_id", "ix_order_items_product_id"} <= indexes
+    run_migrations(engine)
+    engine.dispose()
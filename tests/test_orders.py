@@ -1,4 +1,8 @@
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app import models
+from app.async_database import async_engine
+from app.database import SessionLocal
 from app.main import app
 
 client = TestClient(app)
@@ -31,3 +35,179 @@ def test_create_order():
     assert order_data["total_amount"] == 30.99
     assert len(order_data["items"]) == 1
     assert order_data["items"][0]["product_id"] == product_id
+
+def test_create_order_rejects_non_positive_quantities():
+    product_id = client.post(
+        "/products/",
+        data={"name": "Negative Order Product", "description": "Stock must not grow", "price": 1.0, "stock": 5}
+    ).json()["id"]
+    for quantity in (0, -3):
+        order_response = client.post(
+            "/orders/",
+            json={"total_amount": 1.0, "items": [{"product_id": product_id, "quantity": quantity}]}
+        )
+        assert order_response.status_code == 422
+    assert client.get(f"/inventory/{product_id}").json()["stock"] == 5
+
+def test_create_order_rejects_empty_items():
+    order_response = client.post("/orders/", json={"total_amount": 0.0, "items": []})
+    assert order_response.status_code == 422
+
+def test_create_order_reports_every_short_line():
+    # Create two products with limited stock
+    first_id = client.post(
+        "/products/",
+        data={"name": "Short Product A", "description": "Low stock", "price": 5.0, "stock": 1}
+    ).json()["id"]
+    second_id = client.post(
+        "/products/",
+        data={"name": "Short Product B", "description": "Low stock", "price": 5.0, "stock": 2}
+    ).json()["id"]
+
+    order_response = client.post(
+        "/orders/",
+        json={
+            "total_amount": 25.0,
+            "items": [
+                {"product_id": first_id, "quantity": 2},
+                {"product_id": second_id, "quantity": 3}
+            ]
+        }
+    )
+    assert order_response.status_code == 400
+    shortages = order_response.json()["detail"]["shortages"]
+    assert {line["product_id"] for line in shortages} == {first_id, second_id}
+
+    # Nothing was decremented
+    assert client.get(f"/inventory/{first_id}").json()["stock"] == 1
+    assert client.get(f"/inventory/{second_id}").json()["stock"] == 2
+
+def test_create_order_decrements_stock_for_repeated_lines():
+    product_id = client.post(
+        "/products/",
+        data={"name": "Repeated Line Product", "description": "Two lines", "price": 3.0, "stock": 10}
+    ).json()["id"]
+
+    order_response = client.post(
+        "/orders/",
+        json={
+            "total_amount": 15.0,
+            "items": [
+                {"product_id": product_id, "quantity": 2},
+                {"product_id": product_id, "quantity": 3}
+            ]
+        }
+    )
+    assert order_response.status_code == 200
+    assert len(order_response.json()["items"]) == 2
+    assert client.get(f"/inventory/{product_id}").json()["stock"] == 5
+
+def create_sharded_product(name, stock, shards):
+    product_id = client.post(
+        "/products/",
+        data={"name": name, "description": "Sharded stock", "price": 1.0, "stock": stock}
+    ).json()["id"]
+    response = client.put(f"/inventory/{product_id}/shards", json={"shards": shards})
+    assert response.status_code == 200
+    assert response.json() == {"product_id": product_id, "stock": stock, "shards": shards, "version": 2}
+    return product_id
+
+def shard_levels(product_id):
+    with SessionLocal() as db:
+        return sorted(shard.stock for shard in db.query(models.ProductStockShard).filter_by(product_id=product_id))
+
+def test_create_order_takes_from_stock_shards():
+    product_id = create_sharded_product("Sharded Product", 10, 4)
+    assert shard_levels(product_id) == [2, 2, 3, 3]
+
+    order_response = client.post(
+        "/orders/", json={"total_amount": 2.0, "items": [{"product_id": product_id, "quantity": 2}]}
+    )
+    assert order_response.status_code == 200
+    assert client.get(f"/inventory/{product_id}").json()["stock"] == 8
+    assert client.get(f"/products/{product_id}").json()["stock"] == 8
+
+def test_sharded_order_larger_than_any_shard_rebalances():
+    product_id = create_sharded_product("Rebalanced Product", 10, 4)
+    order_response = client.post(
+        "/orders/", json={"total_amount": 7.0, "items": [{"product_id": product_id, "quantity": 7}]}
+    )
+    assert order_response.status_code == 200
+    assert shard_levels(product_id) == [0, 1, 1, 1]
+
+    order_response = client.post(
+        "/orders/", json={"total_amount": 4.0, "items": [{"product_id": product_id, "quantity": 4}]}
+    )
+    assert order_response.status_code == 400
+    assert order_response.json()["detail"]["shortages"] == [
+        {"product_id": product_id, "requested": 4, "available": 3}
+    ]
+    assert client.get(f"/inventory/{product_id}").json()["stock"] == 3
+
+def test_update_and_unshard_keep_the_total():
+    product_id = create_sharded_product("Resharded Product", 10, 3)
+    client.put(
+        f"/products/{product_id}",
+        json={"name": "Resharded Product", "description": "Sharded stock", "price": 1.0, "stock": 6}
+    )
+    assert shard_levels(product_id) == [2, 2, 2]
+    response = client.put(f"/inventory/{product_id}/shards", json={"shards": 0})
+    assert response.json() == {"product_id": product_id, "stock": 6, "shards": 0, "version": 4}
+    assert shard_levels(product_id) == []
+    assert client.get(f"/inventory/{product_id}").json()["stock"] == 6
+
+def _order_product(name: str) -> int:
+    return client.post(
+        "/products/",
+        data={"name": name, "description": "For order reads", "price": 1.0, "stock": 100}
+    ).json()["id"]
+
+def test_read_order():
+    product_id = _order_product("Read Order Product")
+    created = client.post("/orders/", json={
+        "total_amount": 2.0, "items": [{"product_id": product_id, "quantity": 2}]
+    }).json()
+
+    response = client.get(f"/orders/{created['id']}")
+    assert response.status_code == 200
+    assert response.json() == created
+    assert client.get("/orders/0").status_code == 404
+
+def test_read_orders_filtered_by_product_with_cursor():
+    product_id = _order_product("Filtered Order Product")
+    other_id = _order_product("Other Order Product")
+    ids = []
+    for items in ([product_id], [other_id], [other_id, product_id], [product_id]):
+        ids.append(client.post("/orders/", json={
+            "total_amount": 1.0, "items": [{"product_id": item, "quantity": 1} for item in items]
+        }).json()["id"])
+
+    first_page = client.get(f"/orders/?product_id={product_id}&limit=2")
+    assert first_page.status_code == 200
+    second_page = client.get(f"/orders/?product_id={product_id}&limit=2&cursor={first_page.headers['X-Next-Cursor']}")
+    seen = [order["id"] for order in first_page.json() + second_page.json()]
+    assert seen == [ids[0], ids[2], ids[3]]
+    assert [item["product_id"] for item in first_page.json()[1]["items"]] == [other_id, product_id]
+
+def test_order_pages_use_a_constant_number_of_queries():
+    product_id = _order_product("Counted Order Product")
+    for _ in range(6):
+        client.post("/orders/", json={
+            "total_amount": 1.0, "items": [{"product_id": product_id, "quantity": 1}] * 2
+        })
+
+    statements = []
+    def count(*args):
+        statements.append(args[2])
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        counts = []
+        for limit in (1, 6):
+            statements.clear()
+            response = client.get(f"/orders/?product_id={product_id}&limit={limit}")
+            assert len(response.json()) == limit
+            counts.append(len(statements))
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+    assert counts[0] == counts[1] == 2
@@ -0,0 +1,185 @@
+# tests/test_product_cache.py
+# Author: Thanh Trieu
+# Description: Contains tests for the read-through product cache and its invalidation on writes.
+
+import asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy.util import greenlet_spawn
+
+from app.cache import LocalCacheBackend, ProductCache, RedisCacheBackend, product_cache
+from app.main import app
+from app.pagination import encode_cursor
+
+client = TestClient(app)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class CountingLoader:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+def test_repeated_reads_are_served_from_cache():
+    cache = ProductCache(max_size=10, local_ttl=60)
+    loader = CountingLoader({"id": 1})
+    assert cache.get_or_load("product:1", loader) == {"id": 1}
+    assert cache.get_or_load("product:1", loader) == {"id": 1}
+    assert loader.calls == 1
+    stats = cache.stats()
+    assert stats["local_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+def test_get_many_loads_only_misses_in_one_call():
+    cache = ProductCache(max_size=10, local_ttl=60)
+    cache.get_or_load("product:1", CountingLoader({"id": 1}))
+    calls = []
+
+    def loader(missing):
+        calls.append(missing)
+        return {product_id: {"id": product_id} for product_id in missing if product_id != 3}
+
+    keys = {product_id: f"product:{product_id}" for product_id in (1, 2, 3)}
+    assert cache.get_many_or_load(keys, loader) == {1: {"id": 1}, 2: {"id": 2}}
+    assert calls == [[2, 3]]
+    # Found rows are cached; the missing one is looked up again
+    assert cache.get_many_or_load(keys, loader) == {1: {"id": 1}, 2: {"id": 2}}
+    assert calls == [[2, 3], [3]]
+
+def test_local_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = ProductCache(max_size=10, local_ttl=5, clock=clock)
+    loader = CountingLoader({"id": 1})
+    cache.get_or_load("product:1", loader)
+    clock.now = 5
+    cache.get_or_load("product:1", loader)
+    assert loader.calls == 2
+
+def test_missing_rows_are_not_cached():
+    cache = ProductCache(max_size=10, local_ttl=60)
+    loader = CountingLoader(None)
+    cache.get_or_load("product:1", loader)
+    cache.get_or_load("product:1", loader)
+    assert loader.calls == 2
+
+def test_invalidation_bumps_list_page_generation():
+    cache = ProductCache(max_size=10, local_ttl=60)
+    page = cache.page_key("products", 0, 10, None)
+    cache.get_or_load(page, CountingLoader([{"id": 1}]))
+    cache.invalidate_products([1])
+    assert cache.page_key("products", 0, 10, None) != page
+
+def test_shared_backend_propagates_invalidation_across_processes():
+    shared = LocalCacheBackend()
+    writer = ProductCache(max_size=10, local_ttl=60, backend=shared)
+    reader = ProductCache(max_size=10, local_ttl=60, backend=shared)
+    loader = CountingLoader([{"id": 1}])
+    # The reader's page is filled from the writer's load through the shared tier
+    writer.get_or_load(writer.page_key("products", 0, 10), loader)
+    assert reader.get_or_load(reader.page_key("products", 0, 10), loader) == [{"id": 1}]
+    assert loader.calls == 1
+    assert reader.stats()["shared_hits"] == 1
+    writer.invalidate_products([1])
+    reader.get_or_load(reader.page_key("products", 0, 10), loader)
+    assert loader.calls == 2
+
+def test_value_loaded_during_a_write_is_not_cached():
+    cache = ProductCache(max_size=10, local_ttl=60)
+    def stale_loader():
+        # A concurrent write commits while the row is being read
+        cache.invalidate_products([1])
+        return {"id": 1, "stock": 5}
+    cache.get_or_load("product:1", stale_loader)
+    loader = CountingLoader({"id": 1, "stock": 4})
+    assert cache.get_or_load("product:1", loader) == {"id": 1, "stock": 4}
+    assert loader.calls == 1
+
+def test_shared_backend_failures_fall_back_to_the_loader():
+    class BrokenBackend:
+        def get(self, key):
+            raise ConnectionError("down")
+        set = delete = incr = get
+    cache = ProductCache(max_size=10, local_ttl=60, backend=BrokenBackend())
+    assert cache.get_or_load("product:1", CountingLoader({"id": 1})) == {"id": 1}
+    cache.invalidate_products([1])
+    assert cache.stats()["backend_errors"] > 0
+
+class RecordingRedis:
+    """Stands in for the sync or asyncio Redis client, recording which one served each command."""
+
+    def __init__(self, calls: list, name: str, asynchronous: bool = False):
+        self.calls, self.name, self.asynchronous = calls, name, asynchronous
+        self.values = {}
+
+    def _reply(self, value):
+        if not self.asynchronous:
+            return value
+        async def reply():
+            return value
+        return reply()
+
+    def get(self, key):
+        self.calls.append((self.name, "get"))
+        return self._reply(self.values.get(key))
+
+    def set(self, key, value, ex=None):
+        self.calls.append((self.name, "set"))
+        self.values[key] = value
+        return self._reply(True)
+
+def test_redis_backend_awaits_the_asyncio_client_under_run_sync():
+    calls = []
+    backend = RedisCacheBackend("redis://unused", client=RecordingRedis(calls, "sync"),
+                                async_client_factory=lambda: RecordingRedis(calls, "async", asynchronous=True))
+    backend.set("product:1", "cached")
+    assert calls == [("sync", "set")]
+
+    # AsyncSession.run_sync runs the CRUD code through greenlet_spawn on the event loop
+    calls.clear()
+    assert asyncio.run(greenlet_spawn(backend.get, "product:1")) is None
+    assert calls == [("async", "get")]
+
+def test_update_invalidates_cached_product_and_inventory():
+    create_response = client.post(
+        "/products/",
+        data={"name": "Cached Product", "description": "Cached", "price": 5.0, "stock": 10}
+    )
+    product_id = create_response.json()["id"]
+    assert client.get(f"/products/{product_id}").json()["stock"] == 10
+    assert client.get(f"/inventory/{product_id}").json()["stock"] == 10
+    hits = product_cache.stats()["local_hits"]
+    assert client.get(f"/products/{product_id}").json()["stock"] == 10
+    assert product_cache.stats()["local_hits"] == hits + 1
+
+    client.put(
+        f"/products/{product_id}",
+        json={"name": "Cached Product", "description": "Cached", "price": 5.0, "stock": 7}
+    )
+    assert client.get(f"/products/{product_id}").json()["stock"] == 7
+    assert client.get(f"/inventory/{product_id}").json()["stock"] == 7
+
+    client.post("/orders/", json={"total_amount": 5.0, "items": [{"product_id": product_id, "quantity": 2}]})
+    assert client.get(f"/inventory/{product_id}").json()["stock"] == 5
+
+    client.delete(f"/products/{product_id}")
+    assert client.get(f"/products/{product_id}").status_code == 404
+
+def test_new_products_appear_on_cached_list_pages():
+    def create(name):
+        response = client.post("/products/", data={"name": name, "description": "Listed", "price": 5.0, "stock": 1})
+        return response.json()["id"]
+    first_id = create("Listed Product A")
+    cursor = encode_cursor(first_id - 1)
+    assert [p["id"] for p in client.get("/products/", params={"cursor": cursor}).json()] == [first_id]
+    second_id = create("Listed Product B")
+    listed = client.get("/products/", params={"cursor": cursor}).json()
+    assert [p["id"] for p in listed] == [first_id, second_id]
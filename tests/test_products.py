@@ -2,8 +2,11 @@
 # Author: Thanh Trieu
 # Description: Contains tests for product-related endpoints.
 
+import json
+import uuid
 from fastapi.testclient import TestClient
 from app.main import app
+from app.pagination import encode_cursor
 
 client = TestClient(app)
 
@@ -83,6 +86,138 @@ def test_read_products():
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
+def test_read_products_with_cursor():
+    """
+    Test that following X-Next-Cursor pages through products in id order without repeats.
+    """
+    for i in range(3):
+        client.post(
+            "/products/",
+            data={"name": f"Paged Product {i}", "description": "For cursor paging", "price": 2.0, "stock": 1}
+        )
+
+    seen = []
+    response = client.get("/products/?limit=2")
+    while True:
+        assert response.status_code == 200
+        seen.extend(product["id"] for product in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        response = client.get(f"/products/?limit=2&cursor={cursor}")
+
+    assert seen == sorted(set(seen))
+    assert len(seen) >= 3
+
+def test_export_products_ndjson():
+    """
+    Test streaming the catalog as NDJSON.
+    """
+    create_response = client.post(
+        "/products/",
+        data={
+            "name": "Product for Export",
+            "description": "A product to export",
+            "price": 12.5,
+            "stock": 3
+        }
+    )
+    product_id = create_response.json()["id"]
+
+    response = client.get("/products/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    exported = next(row for row in rows if row["id"] == product_id)
+    assert exported["name"] == "Product for Export"
+    assert exported["stock"] == 3
+
+def test_bulk_import_products_csv():
+    """
+    Test importing products from CSV, with invalid rows reported per line.
+    """
+    body = (
+        "name,description,price,stock\n"
+        "Bulk CSV Product 1,Imported,1.50,10\n"
+        "Bulk CSV Product 2,Imported,not-a-price,5\n"
+        "Bulk CSV Product 3,Imported,3.00,30\n"
+    )
+    response = client.post(
+        "/products/bulk?chunk_size=2",
+        files={"file": ("products.csv", body.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["inserted"] == 2
+    assert report["failed"] == 1
+    assert len(report["chunks"]) == 2
+    assert report["chunks"][0]["errors"][0]["line"] == 3
+
+def test_bulk_import_reports_malformed_lines():
+    """
+    Test that CSV rows with extra fields and lines that are not UTF-8 are reported per line.
+    """
+    body = (
+        "name,description,price,stock\n".encode()
+        + "Bulk Extra Field,Imported,1.00,1,unexpected\n".encode()
+        + "Bulk Caf\u00e9 Latin-1,Imported,1.00,1\n".encode("latin-1")
+        + "Bulk Clean Row,Imported,1.00,1\n".encode()
+    )
+    response = client.post("/products/bulk", files={"file": ("products.csv", body, "text/csv")})
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["inserted"], report["failed"]) == (1, 2)
+    errors = report["chunks"][0]["errors"]
+    assert [error["line"] for error in errors] == [2, 3]
+    assert "fields" in errors[0]["error"] and "UTF-8" in errors[1]["error"]
+
+    ndjson = json.dumps({"name": "Bulk NDJSON Latin-1", "description": "Caf\u00e9", "price": 1.0,
+                         "stock": 1}, ensure_ascii=False).encode("latin-1")
+    response = client.post("/products/bulk", files={"file": ("products.ndjson", ndjson, "application/x-ndjson")})
+    assert response.status_code == 200
+    assert response.json()["chunks"][0]["errors"] == [{"line": 1, "error": "Invalid text: not UTF-8 encoded"}]
+
+def test_bulk_import_products_ndjson_upsert():
+    """
+    Test that an NDJSON import with upsert_on=name updates existing products.
+    """
+    name = f"Bulk Upsert Product {uuid.uuid4()}"
+    first = json.dumps({"name": name, "description": "Original", "price": 1.0, "stock": 1})
+    client.post("/products/bulk", files={"file": ("products.ndjson", first.encode(), "application/x-ndjson")})
+
+    second = json.dumps({"name": name, "description": "Updated", "price": 2.0, "stock": 2})
+    response = client.post(
+        "/products/bulk?upsert_on=name",
+        files={"file": ("products.ndjson", second.encode(), "application/x-ndjson")}
+    )
+    assert response.status_code == 200
+    assert response.json()["updated"] == 1
+    assert response.json()["inserted"] == 0
+
+    exported = [json.loads(line) for line in client.get("/products/export").text.splitlines()]
+    matching = [row for row in exported if row["name"] == name]
+    assert len(matching) == 1
+    assert matching[0]["description"] == "Updated"
+
+def test_bulk_import_upsert_reports_merged_duplicates():
+    """
+    Test that rows sharing an upsert key within one chunk are reported as merged, with the last one kept.
+    """
+    name = f"Bulk Duplicate Product {uuid.uuid4()}"
+    body = "\n".join(json.dumps({"name": name, "description": f"Version {i}", "price": 1.0, "stock": i})
+                     for i in range(3))
+    response = client.post(
+        "/products/bulk?upsert_on=name",
+        files={"file": ("products.ndjson", body.encode(), "application/x-ndjson")}
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["inserted"], report["updated"], report["merged"]) == (1, 0, 2)
+    assert report["chunks"][0]["merged"] == 2
+
+    exported = [json.loads(line) for line in client.get("/products/export").text.splitlines()]
+    assert [row["description"] for row in exported if row["name"] == name] == ["Version 2"]
+
 def test_update_product():
     """
     Test updating an existing product's details.
@@ -138,3 +273,54 @@ def test_delete_product():
     # Verify the product has been deleted
     get_response = client.get(f"/products/{product_id}")
     assert get_response.status_code == 404
+
+def test_read_products_matches_product_schema():
+    """
+    Test that list rows, which skip response validation, have the same fields as a single product.
+    """
+    create_response = client.post(
+        "/products/",
+        data={"name": "Listed Product", "description": "Shape check", "price": 4.5, "stock": 6}
+    )
+    product_id = create_response.json()["id"]
+
+    listed = client.get(f"/products/?limit=1&cursor={encode_cursor(product_id - 1)}")
+    assert listed.status_code == 200
+    assert listed.json() == [client.get(f"/products/{product_id}").json()]
+
+    client.delete(f"/products/{product_id}")
+
+def test_read_products_openapi_response_model():
+    """
+    Test that the list endpoints still document their response models.
+    """
+    paths = client.get("/openapi.json").json()["paths"]
+    products = paths["/products/"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    inventory = paths["/inventory"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert products["items"]["$ref"] == "#/components/schemas/Product"
+    assert inventory["items"]["$ref"] == "#/components/schemas/Inventory"
+
+def test_read_products_batch():
+    """
+    Test fetching several products in one request, in the requested order.
+    """
+    ids = [
+        client.post(
+            "/products/",
+            data={"name": f"Batch Product {i}", "description": "For batch lookup", "price": 1.5, "stock": 2}
+        ).json()["id"]
+        for i in range(2)
+    ]
+
+    response = client.get(f"/products/batch?ids={ids[1]},{ids[0]},0")
+    assert response.status_code == 200
+    body = response.json()
+    assert [product["id"] for product in body["items"]] == [ids[1], ids[0]]
+    assert body["items"][0] == client.get(f"/products/{ids[1]}").json()
+    assert body["missing"] == [0]
+
+    posted = client.post("/products/batch", json={"ids": ids})
+    assert [product["id"] for product in posted.json()["items"]] == ids
+
+    for product_id in ids:
+        client.delete(f"/products/{product_id}")
@@ -0,0 +1,129 @@
+# tests/test_s3_utils.py
+# Author: Thanh Trieu
+# Description: Contains tests for the presigned URL cache and the upload path in the S3 utilities.
+
+import asyncio
+import os
+import tempfile
+import threading
+import boto3
+import pytest
+from fastapi import HTTPException, UploadFile
+from moto import mock_aws
+from starlette.datastructures import Headers
+from unittest.mock import patch
+
+from app.utils import s3_utils
+from app.utils.s3_utils import (PresignedUrlCache, generate_presigned_url, generate_presigned_urls, object_key_from_url,
+                                upload_file_to_s3, upload_file_to_s3_async)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def signer():
+    """Replace SigV4 signing with a counter and start each test with an empty cache."""
+    calls = []
+    def fake_sign(operation, Params, ExpiresIn):
+        calls.append(Params['Key'])
+        return f"https://signed/{Params['Key']}?n={len(calls)}"
+    s3_utils.presigned_url_cache.clear()
+    with patch.object(s3_utils.get_s3_client(), 'generate_presigned_url', side_effect=fake_sign):
+        yield calls
+    s3_utils.presigned_url_cache.clear()
+
+def test_warm_keys_are_not_signed_again(signer):
+    first = generate_presigned_url('products/1/a.png')
+    second = generate_presigned_url('products/1/a.png')
+    assert first == second
+    assert signer == ['products/1/a.png']
+    stats = s3_utils.presigned_url_cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+
+def test_batch_signs_each_distinct_key_once(signer):
+    generate_presigned_url('products/1/a.png')
+    urls = generate_presigned_urls(['products/1/a.png', 'products/2/b.png', 'products/2/b.png'])
+    assert set(urls) == {'products/1/a.png', 'products/2/b.png'}
+    assert signer == ['products/1/a.png', 'products/2/b.png']
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = PresignedUrlCache(max_size=10, ttl=1800, clock=clock)
+    cache.put('key', 'url')
+    clock.now = 1799
+    assert cache.get('key') == 'url'
+    clock.now = 1800
+    assert cache.get('key') is None
+
+def test_least_recently_used_entries_are_evicted():
+    cache = PresignedUrlCache(max_size=2, ttl=60)
+    cache.put('a', 'url-a')
+    cache.put('b', 'url-b')
+    cache.get('a')
+    cache.put('c', 'url-c')
+    assert cache.get('b') is None
+    assert cache.get('a') == 'url-a'
+    assert cache.stats()['evictions'] == 1
+
+def test_object_key_from_url_keeps_the_full_key():
+    url = 'https://bucket.s3.amazonaws.com/products/42/psyduck.png'
+    assert object_key_from_url(url) == 'products/42/psyduck.png'
+
+def make_upload(size, filename='image.png'):
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    spooled.write(os.urandom(size))
+    spooled.seek(0)
+    return UploadFile(file=spooled, size=size, filename=filename, headers=Headers({'content-type': 'image/png'}))
+
+@pytest.fixture
+def s3_bucket(monkeypatch):
+    """Run uploads against a moto S3 bucket with a fresh client and transfer config."""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    with mock_aws():
+        s3_utils.get_s3_client.resource.reset()
+        s3_utils.get_transfer_config.resource.reset()
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=s3_utils.get_bucket_name())
+        yield client
+    s3_utils.get_s3_client.resource.reset()
+    s3_utils.get_transfer_config.resource.reset()
+
+def test_small_upload_is_stored_with_its_content_type(s3_bucket):
+    url = upload_file_to_s3(make_upload(1024), 'products/1/image.png')
+    assert object_key_from_url(url) == 'products/1/image.png'
+    head = s3_bucket.head_object(Bucket=s3_utils.get_bucket_name(), Key='products/1/image.png')
+    assert head['ContentLength'] == 1024
+    assert head['ContentType'] == 'image/png'
+
+def test_large_upload_goes_up_in_parts(s3_bucket, monkeypatch):
+    monkeypatch.setattr(s3_utils, 'S3_MULTIPART_THRESHOLD', 5 * 1024 * 1024)
+    monkeypatch.setattr(s3_utils, 'S3_MULTIPART_CHUNKSIZE', 5 * 1024 * 1024)
+    monkeypatch.setattr(s3_utils, 'S3_UPLOAD_MAX_BYTES', 16 * 1024 * 1024)
+    upload_file_to_s3(make_upload(11 * 1024 * 1024), 'products/2/large.png')
+    head = s3_bucket.head_object(Bucket=s3_utils.get_bucket_name(), Key='products/2/large.png')
+    assert head['ContentLength'] == 11 * 1024 * 1024
+    # Multipart ETags end with the number of parts
+    assert head['ETag'].strip('"').endswith('-3')
+
+def test_oversized_upload_is_rejected_before_sending(monkeypatch):
+    monkeypatch.setattr(s3_utils, 'S3_UPLOAD_MAX_BYTES', 1024)
+    with patch.object(s3_utils.get_s3_client(), 'upload_fileobj') as upload_fileobj:
+        with pytest.raises(HTTPException) as excinfo:
+            asyncio.run(upload_file_to_s3_async(make_upload(2048), 'products/3/big.png'))
+    assert excinfo.value.status_code == 413
+    upload_fileobj.assert_not_called()
+
+def test_async_upload_runs_on_the_upload_pool():
+    threads = []
+    def fake_upload(fileobj, bucket, key, **kwargs):
+        threads.append(threading.current_thread().name)
+    with patch.object(s3_utils.get_s3_client(), 'upload_fileobj', side_effect=fake_upload):
+        asyncio.run(upload_file_to_s3_async(make_upload(16), 'products/4/image.png'))
+    assert threads[0].startswith('s3-upload')
@@ -0,0 +1,108 @@
+# tests/test_sales.py
+# Author: Thanh Trieu
+# Description: Contains tests for the sales summaries and the report endpoints served from them.
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app import models
+from app.database import SessionLocal
+from app.main import app
+from app import sales
+from app.sales import rebuild_summaries
+
+client = TestClient(app)
+
+def _product(name: str) -> int:
+    return client.post(
+        "/products/",
+        data={"name": name, "description": "For sales reports", "price": 5.0, "stock": 1000}
+    ).json()["id"]
+
+def _order(total: float, *lines):
+    response = client.post("/orders/", json={
+        "total_amount": total,
+        "items": [{"product_id": product_id, "quantity": quantity} for product_id, quantity in lines],
+    })
+    assert response.status_code == 200
+    return response.json()
+
+def _today_revenue():
+    rows = client.get("/reports/revenue").json()
+    return rows[-1] if rows else {"order_count": 0, "units_sold": 0, "revenue": 0.0}
+
+def test_orders_update_top_products_and_revenue():
+    best, other = _product("Best Seller"), _product("Slow Seller")
+    before = _today_revenue()
+
+    _order(100.0, (best, 400), (other, 1))
+    _order(50.0, (best, 300), (best, 2))
+
+    # Other tests' orders share the summaries, so look for this test's products rather than the whole list
+    top = client.get("/reports/top-products?limit=100").json()
+    ranked = [row["product_id"] for row in top]
+    assert {"product_id": best, "units_sold": 702, "order_count": 2} in top
+    assert other not in ranked or ranked.index(best) < ranked.index(other)
+
+    after = _today_revenue()
+    assert after["order_count"] == before["order_count"] + 2
+    assert after["units_sold"] == before["units_sold"] + 703
+    assert after["revenue"] == pytest.approx(before["revenue"] + 150.0)
+
+def test_rejected_orders_are_not_counted():
+    product_id = _product("Rejected Seller")
+    before = _today_revenue()
+    response = client.post("/orders/", json={
+        "total_amount": 1.0, "items": [{"product_id": product_id, "quantity": 5000}]
+    })
+    assert response.status_code == 400
+    assert _today_revenue() == before
+
+def test_revenue_rejects_inverted_range():
+    assert client.get("/reports/revenue?start=2024-02-01&end=2024-01-01").status_code == 400
+
+def test_rebuild_matches_incremental_summaries():
+    product_id = _product("Rebuilt Seller")
+    for quantity in (1, 2, 3):
+        _order(quantity * 5.0, (product_id, quantity))
+
+    def snapshot(db):
+        products = {row.product_id: (row.units_sold, row.order_count)
+                    for row in db.scalars(select(models.ProductSales))}
+        days = {row.day: (row.order_count, row.units_sold, pytest.approx(row.revenue))
+                for row in db.scalars(select(models.DailySales))}
+        return products, days
+
+    with SessionLocal() as db:
+        incremental = snapshot(db)
+        result = rebuild_summaries(db, chunk_size=2)
+        assert result["chunks"] >= 2
+        assert snapshot(db) == incremental
+
+def test_rebuild_swaps_in_complete_totals_and_keeps_orders_placed_meanwhile(monkeypatch):
+    product_id = _product("Rebuilt During Traffic")
+    for quantity in (1, 2, 3):
+        _order(quantity * 5.0, (product_id, quantity))
+
+    def units_sold():
+        with SessionLocal() as other:
+            return other.scalar(select(models.ProductSales.units_sold)
+                                .where(models.ProductSales.product_id == product_id))
+
+    seen_during_rebuild = []
+    summarize = sales._summarize_orders
+
+    def summarize_while_serving(db, first, last):
+        # Reports read the live tables while the staging tables fill up; an order also lands mid-rebuild
+        seen_during_rebuild.append(units_sold())
+        if len(seen_during_rebuild) == 1:
+            _order(20.0, (product_id, 4))
+        return summarize(db, first, last)
+
+    monkeypatch.setattr(sales, "_summarize_orders", summarize_while_serving)
+    with SessionLocal() as db:
+        rebuild_summaries(db, chunk_size=2)
+    assert seen_during_rebuild[0] == 6
+    assert all(units >= 6 for units in seen_during_rebuild)
+    assert units_sold() == 10
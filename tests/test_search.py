@@ -0,0 +1,115 @@
+# tests/test_search.py
+# Author: Thanh Trieu
+# Description: Contains tests for product search and the in-process search index.
+
+import asyncio
+import threading
+import uuid
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.search import ProductSearchIndex, product_search_index
+
+client = TestClient(app)
+
+def _create(name: str, description: str = "Searchable") -> int:
+    return client.post(
+        "/products/",
+        data={"name": name, "description": description, "price": 1.0, "stock": 1}
+    ).json()["id"]
+
+def _search(query: str, **params):
+    response = client.get("/products/search", params={"q": query, **params})
+    assert response.status_code == 200
+    return response
+
+def test_search_ranks_name_matches_before_description_matches():
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    in_description = _create("Plain Item", f"Mentions {word} only here")
+    substring = _create(f"Super{word} Lamp")
+    words = _create(f"Lamp {word}")
+    prefix = _create(f"{word} Lamp")
+    exact = _create(word)
+
+    ids = [product["id"] for product in _search(word).json()]
+    assert ids[:2] == [exact, prefix]
+    assert ids.index(words) < ids.index(substring) < ids.index(in_description)
+    assert client.get(f"/products/{exact}").json() in _search(word).json()
+
+def test_search_follows_cursor():
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    ids = [_create(f"{word} Paged {i}") for i in range(5)]
+    seen = []
+    response = _search(word, limit=2)
+    while True:
+        seen.extend(product["id"] for product in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        response = _search(word, limit=2, cursor=cursor)
+    assert seen == ids
+    assert client.get("/products/search", params={"q": word, "cursor": "bad"}).status_code == 400
+
+def test_search_sees_updates_and_deletes():
+    word, renamed = f"zq{uuid.uuid4().hex[:8]}", f"zq{uuid.uuid4().hex[:8]}"
+    product_id = _create(f"{word} Before")
+    assert [product["id"] for product in _search(word).json()] == [product_id]
+
+    client.put(f"/products/{product_id}", json={"name": f"{renamed} After", "description": "Searchable",
+                                                "price": 1.0, "stock": 1})
+    assert _search(word).json() == []
+    assert [product["id"] for product in _search(renamed).json()] == [product_id]
+
+    client.delete(f"/products/{product_id}")
+    assert _search(renamed).json() == []
+
+def test_index_matches_word_prefixes_and_substrings():
+    index = ProductSearchIndex()
+    index.loaded = True
+    index.add(1, "Blue Widget", "A small gadget")
+    index.add(2, "Widgetizer", "Turns things into widgets")
+    index.add(3, "Red Lamp", "Bright")
+    assert index.search("wid", 10) == [(1, 2), (2, 1)]
+    assert index.search("get", 10) == [(3, 1), (3, 2)]
+    assert index.search("gadg", 10) == [(4, 1)]
+    assert index.search("blue wid", 10) == [(1, 1)]
+    assert index.search("wid", 10, after=(1, 2)) == [(2, 1)]
+    index.remove(1)
+    assert index.search("gadg", 10) == []
+    assert "gadget" not in index._description_words.ids
+
+def test_concurrent_first_searches_do_not_deadlock():
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    product_id = _create(f"{word} Concurrent")
+    product_search_index.reset()
+    statuses = []
+
+    async def search_concurrently():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            responses = await asyncio.gather(*(async_client.get("/products/search", params={"q": word})
+                                               for _ in range(4)))
+        statuses.extend((response.status_code, [row["id"] for row in response.json()]) for response in responses)
+
+    # A deadlock would block the event loop itself, so the timeout is enforced from another thread
+    worker = threading.Thread(target=asyncio.run, args=(search_concurrently(),), daemon=True)
+    worker.start()
+    worker.join(timeout=30)
+    assert not worker.is_alive(), "concurrent first searches deadlocked"
+    assert statuses == [(200, [product_id])] * 4
+
+def test_index_keeps_changes_made_while_it_loads():
+    index = ProductSearchIndex()
+
+    class LoadingSession:
+        def execute(self, statement):
+            # Another request writes while the rows are being read
+            index.add(2, "Loaded Late", "Added during the load")
+            index.remove(1)
+            return iter([(1, "Loaded Early", "Read by the load")])
+
+    index.ensure_loaded(LoadingSession())
+    assert index.loaded
+    assert index.search("loaded", 10) == [(1, 2)]
+    assert index._pending == []
@@ -0,0 +1,54 @@
+# tests/test_timing.py
+# Author: Thanh Trieu
+# Description: Contains tests for the per-request Server-Timing breakdown.
+
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from app import timing
+from app.dynamodb import api_call_log_buffer
+from app.main import app
+from app.utils import s3_utils
+
+client = TestClient(app)
+
+def parse_server_timing(value):
+    spans = {}
+    for metric in value.split(", "):
+        name, *params = metric.split(";")
+        spans[name] = dict(param.split("=", 1) for param in params)
+    return spans
+
+def create_product():
+    return client.post(
+        "/products/",
+        data={"name": "Timed Product", "description": "Timed", "price": 1.0, "stock": 5}
+    ).json()["id"]
+
+def test_response_carries_server_timing_breakdown():
+    product_id = create_product()
+    response = client.post("/orders/", json={"total_amount": 1.0, "items": [{"product_id": product_id, "quantity": 1}]})
+    spans = parse_server_timing(response.headers["Server-Timing"])
+    assert {"db", "validate", "serialize", "render", "total"} <= set(spans)
+    assert spans["db"]["desc"].strip('"').endswith("calls")
+    assert float(spans["total"]["dur"]) >= float(spans["db"]["dur"])
+
+def test_unsampled_requests_have_no_breakdown(monkeypatch):
+    monkeypatch.setattr(timing, "REQUEST_TIMING_SAMPLE_RATE", 0.0)
+    response = client.get("/inventory")
+    assert "Server-Timing" not in response.headers
+    assert "X-Process-Time" in response.headers
+
+def test_breakdown_is_attached_to_the_logged_record():
+    records = []
+    with patch.object(api_call_log_buffer, "enqueue", side_effect=records.append):
+        response = client.get("/inventory")
+    assert records[0]["server_timing"] == response.headers["Server-Timing"]
+
+def test_presigning_counts_as_s3_time():
+    timings = timing.start_request(sample_rate=1.0)
+    s3_utils.presigned_url_cache.clear()
+    with patch.object(s3_utils.get_s3_client(), "generate_presigned_url", return_value="https://signed"):
+        s3_utils.generate_presigned_urls(["products/1/a.png", "products/2/b.png"])
+    s3_utils.presigned_url_cache.clear()
+    assert timings.spans["s3"][1] == 2